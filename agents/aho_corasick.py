@@ -0,0 +1,81 @@
+from collections import deque
+from typing import Dict, Iterator, List, Tuple
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton: finds every occurrence of many patterns in one pass over a text.
+
+    Each pattern carries an integer bit mask; find() returns the union of the masks of all
+    patterns that occur in the text.
+    """
+
+    def __init__(self, patterns: Dict[str, int]):
+        # Node 0 is the root; each node has its transitions, failure link and outputs
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._mask: List[int] = [0]
+        self._outputs: List[List[str]] = [[]]
+        for pattern, mask in patterns.items():
+            if pattern:
+                self._add(pattern, mask)
+        self._link()
+
+    def _add(self, pattern: str, mask: int):
+        node = 0
+        for char in pattern:
+            following = self._goto[node].get(char)
+            if following is None:
+                following = len(self._goto)
+                self._goto[node][char] = following
+                self._goto.append({})
+                self._fail.append(0)
+                self._mask.append(0)
+                self._outputs.append([])
+            node = following
+        self._mask[node] |= mask
+        self._outputs[node].append(pattern)
+
+    def _link(self):
+        """Compute failure links breadth first and fold suffix outputs into each node."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._mask[child] |= self._mask[self._fail[child]]
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+                queue.append(child)
+
+    def _step(self, node: int, char: str) -> int:
+        goto, fail = self._goto, self._fail
+        while node and char not in goto[node]:
+            node = fail[node]
+        return goto[node].get(char, 0)
+
+    def find(self, text: str, stop_mask: int = 0) -> int:
+        """Union of the masks of all patterns occurring in text.
+
+        Scanning stops early once every bit of stop_mask has been found.
+        """
+        found = 0
+        node = 0
+        masks = self._mask
+        for char in text:
+            node = self._step(node, char)
+            if masks[node]:
+                found |= masks[node]
+                if stop_mask and found & stop_mask == stop_mask:
+                    break
+        return found
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """Yield (start, end, pattern) for every occurrence, overlapping ones included."""
+        node = 0
+        for end, char in enumerate(text, start=1):
+            node = self._step(node, char)
+            for pattern in self._outputs[node]:
+                yield end - len(pattern), end, pattern
@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+import openai
+from openai import AsyncOpenAI
+
+from .rate_limiter import LLM_MAX_CONCURRENCY, AdaptiveConcurrencyLimiter, is_overload, retry_after
+from .resilience import Deadline, StreamInterrupted
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated replicas of the OpenAI-compatible server
+LLM_BASE_URLS = os.getenv("LLM_BASE_URLS", "http://10.4.33.13:80/v1")
+LLM_API_KEY = os.getenv("LLM_API_KEY", "123")
+HEALTH_CHECK_INTERVAL = float(os.getenv("LLM_HEALTH_CHECK_INTERVAL", "15"))
+HEALTH_CHECK_TIMEOUT = 5.0
+# Consecutive failures before a replica is ejected from routing
+EJECT_AFTER_FAILURES = 3
+# An ejected replica gets a trial request after this long even without a passing probe
+EJECTION_COOLDOWN = 30.0
+LATENCY_WINDOW = 200
+LATENCY_EWMA_ALPHA = 0.2
+
+
+def parse_base_urls(value: str) -> List[str]:
+    return [url.strip().rstrip("/") for url in value.split(",") if url.strip()]
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """Errors that indicate the replica itself is unhealthy (not the request)."""
+    if isinstance(error, StreamInterrupted) and error.__cause__ is not None:
+        error = error.__cause__
+    if isinstance(error, (asyncio.TimeoutError, openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+class LLMBackend:
+    """One replica of the LLM server with its routing state and latency statistics."""
+
+    def __init__(self, base_url: str, api_key: str = LLM_API_KEY, max_concurrency: int = LLM_MAX_CONCURRENCY):
+        self.base_url = base_url
+        self.client = AsyncOpenAI(base_url=base_url, api_key=api_key, max_retries=0)
+        # AIMD limit of requests in flight, backed off for this replica only
+        self.concurrency = AdaptiveConcurrencyLimiter(max_concurrency)
+        self.outstanding = 0
+        self.healthy = True
+        self.ejected_at: Optional[float] = None
+        self.consecutive_failures = 0
+        self.requests = 0
+        self.failures = 0
+        self.latency_ewma: Optional[float] = None
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def available(self) -> bool:
+        """Healthy, or ejected long enough ago to deserve a trial request."""
+        if self.healthy:
+            return True
+        return self.ejected_at is not None and time.monotonic() - self.ejected_at >= EJECTION_COOLDOWN
+
+    def saturated(self) -> bool:
+        """No free request slot, or paused by a Retry-After."""
+        limiter = self.concurrency
+        return limiter.in_flight >= int(limiter.limit) or limiter.paused_until > time.monotonic()
+
+    def record_success(self, latency: float):
+        self.requests += 1
+        self.consecutive_failures = 0
+        self.latencies.append(latency)
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma += LATENCY_EWMA_ALPHA * (latency - self.latency_ewma)
+        if not self.healthy:
+            self.readmit("request succeeded")
+
+    def record_failure(self, error: BaseException):
+        self.requests += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.healthy and self.consecutive_failures >= EJECT_AFTER_FAILURES:
+            self.eject(f"{self.consecutive_failures} consecutive failures, last: {type(error).__name__}")
+        elif not self.healthy:
+            # Failed trial request: restart the cooldown
+            self.ejected_at = time.monotonic()
+
+    def eject(self, reason: str):
+        self.healthy = False
+        self.ejected_at = time.monotonic()
+        logger.warning(f"Ejecting LLM backend {self.base_url}: {reason}")
+
+    def readmit(self, reason: str):
+        self.healthy = True
+        self.ejected_at = None
+        self.consecutive_failures = 0
+        logger.info(f"Re-admitting LLM backend {self.base_url}: {reason}")
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+
+        def percentile(q: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(int(q * len(latencies)), len(latencies) - 1)], 4)
+
+        return {
+            "base_url": self.base_url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "concurrency_limit": int(self.concurrency.limit),
+            "in_flight": self.concurrency.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "latency_ewma": round(self.latency_ewma, 4) if self.latency_ewma is not None else None,
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+        }
+
+
+class BackendPool:
+    """Routes LLM requests across replicas by least outstanding requests.
+
+    Each replica has its own adaptive concurrency limit, so capacity grows with the
+    number of replicas and an overloaded replica backs off alone. Replicas are ejected after repeated failures and re-admitted by a passing health
+    probe (GET /models), a successful trial request after the cooldown, or both.
+    """
+
+    def __init__(self, base_urls: List[str], api_key: str = LLM_API_KEY,
+                 health_check_interval: float = HEALTH_CHECK_INTERVAL,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY):
+        if not base_urls:
+            raise ValueError("At least one LLM backend URL is required")
+        self.backends = [LLMBackend(url, api_key, max_concurrency) for url in base_urls]
+        self.health_check_interval = health_check_interval
+        self._health_task: Optional[asyncio.Task] = None
+
+    def select(self) -> LLMBackend:
+        """Pick the available replica with a free slot and the fewest requests in flight."""
+        candidates = [b for b in self.backends if b.available()] or self.backends
+        return min(candidates, key=lambda b: (
+            b.saturated(),
+            b.outstanding,
+            not b.healthy,
+            b.latency_ewma if b.latency_ewma is not None else 0.0,
+        ))
+
+    @asynccontextmanager
+    async def backend(self, deadline: Optional[Deadline] = None) -> AsyncIterator[LLMBackend]:
+        """Route one request, wait for a slot on the chosen replica and record the outcome."""
+        backend = self.select()
+        backend.outstanding += 1
+        try:
+            await backend.concurrency.acquire(deadline)
+        except BaseException:
+            backend.outstanding -= 1
+            raise
+        started = time.monotonic()
+        try:
+            yield backend
+        except BaseException as e:
+            if is_overload(e, deadline):
+                backend.concurrency.on_overload(retry_after(e))
+            # Running out of the caller's deadline says nothing about the replica
+            if is_backend_failure(e) and not (deadline and deadline.expired()):
+                backend.record_failure(e)
+            raise
+        else:
+            latency = time.monotonic() - started
+            backend.record_success(latency)
+            backend.concurrency.on_success(latency)
+        finally:
+            backend.outstanding -= 1
+            backend.concurrency.release()
+
+    async def probe(self, backend: LLMBackend) -> bool:
+        """Health-check one replica via the models endpoint."""
+        try:
+            await asyncio.wait_for(backend.client.models.list(), timeout=HEALTH_CHECK_TIMEOUT)
+        except Exception as e:
+            if backend.healthy:
+                backend.eject(f"health check failed: {type(e).__name__}: {e}")
+            return False
+        if not backend.healthy:
+            backend.readmit("health check passed")
+        return True
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.gather(*(self.probe(b) for b in self.backends))
+            await asyncio.sleep(self.health_check_interval)
+
+    def start_health_checks(self):
+        """Start periodic probes on the running event loop (no-op if already running)."""
+        if self.health_check_interval <= 0:
+            return
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    async def stop_health_checks(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [b.stats() for b in self.backends]
+
+
+_backend_pool: Optional[BackendPool] = None
+
+
+def get_backend_pool() -> BackendPool:
+    """Return the pool of LLM replicas configured by LLM_BASE_URLS."""
+    global _backend_pool
+    if _backend_pool is None:
+        _backend_pool = BackendPool(parse_base_urls(LLM_BASE_URLS))
+    return _backend_pool
@@ -0,0 +1,149 @@
+import copy
+import json
+import os
+import re
+from typing import Any, Dict, List, Sequence
+
+from .prompt_builder import estimate_tokens
+from .text_profile import match_heading
+
+# Texts above this many tokens are split into chunks that are extracted concurrently.
+# A chunk plus the extraction instructions stays within the KnowledgeExtractor and
+# JDAnalyzer prompt budgets, so nothing is truncated
+CHUNKED_EXTRACTION_MAX_TOKENS = int(os.getenv("CHUNKED_EXTRACTION_MAX_TOKENS", "3500"))
+
+# Keys that identify a list item when partial results are merged; other list fields are
+# identified by "name", and items without any of these keys by their whole content
+DEDUPE_KEYS: Dict[str, Sequence[str]] = {
+    "experience": ("company", "title", "duration"),
+    "education": ("institution", "degree"),
+    "projects": ("name",),
+}
+_DEFAULT_DEDUPE_KEYS = ("name",)
+_NON_WORD_RE = re.compile(r'[\W_]+')
+
+
+def _split_block(lines: List[str], max_tokens: int) -> List[str]:
+    """Split one section into pieces of whole lines; pieces after the first repeat its heading."""
+    heading = lines[0] if match_heading(lines[0]) else None
+    pieces: List[str] = []
+    current: List[str] = []
+    tokens = 0
+    for line in lines:
+        # A single line longer than a chunk is cut into character slices
+        parts = [line[i:i + max_tokens] for i in range(0, len(line), max_tokens)] or [line]
+        for part in parts:
+            part_tokens = estimate_tokens(part) + 1
+            if current and tokens + part_tokens > max_tokens:
+                pieces.append("\n".join(current))
+                current = [heading] if heading else []
+                tokens = estimate_tokens(heading) + 1 if heading else 0
+            current.append(part)
+            tokens += part_tokens
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+
+def split_text(text: str, max_tokens: int = CHUNKED_EXTRACTION_MAX_TOKENS) -> List[str]:
+    """Split text into chunks of at most about max_tokens tokens on section boundaries.
+
+    Consecutive sections are packed into one chunk while they fit; only a section that is
+    longer than a chunk on its own is split, at line boundaries.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+    blocks: List[List[str]] = [[]]
+    for line in text.split("\n"):
+        if blocks[-1] and match_heading(line):
+            blocks.append([])
+        blocks[-1].append(line)
+
+    chunks: List[str] = []
+    current: List[str] = []
+    tokens = 0
+    for block in blocks:
+        for piece in _split_block(block, max_tokens):
+            piece_tokens = estimate_tokens(piece) + 1
+            if current and tokens + piece_tokens > max_tokens:
+                chunks.append("\n".join(current))
+                current, tokens = [], 0
+            current.append(piece)
+            tokens += piece_tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def _is_empty(value: Any) -> bool:
+    return value in (None, "", [], {})
+
+
+def _normalize(value: Any) -> str:
+    return _NON_WORD_RE.sub("", str(value)).lower()
+
+
+def _item_key(item: Any, keys: Sequence[str]) -> str:
+    """Identity of a list item: its normalized key values, or its normalized content."""
+    if isinstance(item, dict):
+        values = [_normalize(item.get(key, "")) for key in keys]
+        if any(values):
+            return "|".join(values)
+        return json.dumps(item, sort_keys=True, ensure_ascii=False)
+    return _normalize(item) or str(item)
+
+
+def _merge_item(current: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine two descriptions of the same object, e.g. a job split over two chunks.
+
+    Missing values are filled in, lists are united and of two different strings the longer
+    one is kept.
+    """
+    for key, value in new.items():
+        existing = current.get(key)
+        if _is_empty(existing):
+            current[key] = copy.deepcopy(value)
+        elif isinstance(existing, list) and isinstance(value, list):
+            current[key] = merge_lists(existing, value)
+        elif isinstance(existing, dict) and isinstance(value, dict):
+            current[key] = _merge_item(existing, value)
+        elif (isinstance(existing, str) and isinstance(value, str) and len(value) > len(existing)
+              and _normalize(value) != _normalize(existing)):
+            current[key] = value
+    return current
+
+
+def merge_lists(current: List[Any], new: List[Any], keys: Sequence[str] = _DEFAULT_DEDUPE_KEYS) -> List[Any]:
+    """Append the items of new that are not in current; duplicates are merged into the first."""
+    index = {_item_key(item, keys): position for position, item in enumerate(current)}
+    for item in new:
+        key = _item_key(item, keys)
+        if key not in index:
+            index[key] = len(current)
+            current.append(copy.deepcopy(item))
+        elif isinstance(item, dict) and isinstance(current[index[key]], dict):
+            _merge_item(current[index[key]], item)
+    return current
+
+
+def merge_results(results: Sequence[Dict[str, Any]],
+                  dedupe_keys: Dict[str, Sequence[str]] = DEDUPE_KEYS) -> Dict[str, Any]:
+    """Merge the partial JSON results of the chunks of one document, in chunk order.
+
+    Lists are concatenated without duplicates, objects are merged key by key and for
+    other values the first non-empty one wins.
+    """
+    merged: Dict[str, Any] = {}
+    for result in results:
+        if not isinstance(result, dict):
+            continue
+        for field, value in result.items():
+            current = merged.get(field)
+            if isinstance(value, list) and (_is_empty(current) or isinstance(current, list)):
+                # Items repeated within one chunk are duplicates as well
+                merged[field] = merge_lists(current or [], value, dedupe_keys.get(field, _DEFAULT_DEDUPE_KEYS))
+            elif _is_empty(current):
+                merged[field] = copy.deepcopy(value)
+            elif isinstance(current, dict) and isinstance(value, dict):
+                _merge_item(current, value)
+    return merged
@@ -1,6 +1,10 @@
 """
 Contains data about Chinese universities and related utility functions.
 """
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+from ..aho_corasick import AhoCorasick
 
 QS_TOP_20_UNIVERSITIES = {
     # 2024 QS World University Rankings Top 20
@@ -56,6 +60,131 @@ PROJECT_211_UNIVERSITIES = {
     "宁夏大学", "青海大学", "西藏大学", "第二军医大学", "第四军医大学"
 }
 
+# Tier flags as stored on education entries, with the alias set and whether matching ignores case
+TIERS = (
+    ("is_qs_top20", QS_TOP_20_UNIVERSITIES, True),
+    ("is_985", PROJECT_985_UNIVERSITIES, False),
+    ("is_211", PROJECT_211_UNIVERSITIES, False),
+)
+
+
+def clean_university_name(university_name: str) -> str:
+    """Strip whitespace and the generic words "大学" and "学院" from a name."""
+    return university_name.strip().replace("大学", "").replace("学院", "")
+
+
+class UniversityIndex:
+    """Alias index answering all tier lookups for an institution in one pass.
+
+    A name belongs to a tier if its cleaned form is a substring of one of the tier's
+    aliases, or if one of the aliases occurs in the full name. The first check is a dict
+    lookup in the set of all substrings of all aliases; the second is one scan of the name
+    with an Aho-Corasick automaton over the aliases. Case-insensitive tiers use the same
+    structures built over lowercased aliases.
+    """
+
+    def __init__(self, tiers=TIERS):
+        self.flags = [flag for flag, _, _ in tiers]
+        self.masks: Dict[bool, int] = {False: 0, True: 0}
+        substrings: Dict[bool, Dict[str, int]] = {False: {}, True: {}}
+        aliases: Dict[bool, Dict[str, int]] = {False: {}, True: {}}
+        for bit, (_, names, ignore_case) in enumerate(tiers):
+            mask = 1 << bit
+            self.masks[ignore_case] |= mask
+            for name in names:
+                alias = name.lower() if ignore_case else name
+                aliases[ignore_case][alias] = aliases[ignore_case].get(alias, 0) | mask
+                # The empty string is a substring of every alias: a name that cleans to
+                # nothing matches every tier that has aliases
+                for start in range(len(alias) + 1):
+                    for end in range(start, len(alias) + 1):
+                        part = alias[start:end]
+                        substrings[ignore_case][part] = substrings[ignore_case].get(part, 0) | mask
+        self._substrings = substrings
+        self._automata = {ignore_case: AhoCorasick(patterns) for ignore_case, patterns in aliases.items()}
+
+    def mask(self, university_name: str) -> int:
+        """Bit mask of the tiers the name belongs to, in the order of self.flags."""
+        cleaned = clean_university_name(university_name)
+        found = 0
+        for ignore_case in (False, True):
+            tier_mask = self.masks[ignore_case]
+            if not tier_mask:
+                continue
+            name, part = (university_name.lower(), cleaned.lower()) if ignore_case else (university_name, cleaned)
+            matched = self._substrings[ignore_case].get(part, 0)
+            if matched != tier_mask:
+                matched |= self._automata[ignore_case].find(name, stop_mask=tier_mask & ~matched)
+            found |= matched
+        return found
+
+    def find_mentions(self, text: str) -> List[Tuple[int, int]]:
+        """Spans of known university aliases in free text, longest first and non-overlapping.
+
+        Latin aliases must stand as whole words, so "MIT" does not match in "submitted".
+        """
+        spans = []
+        for ignore_case, automaton in self._automata.items():
+            haystack = text.lower() if ignore_case else text
+            for start, end, alias in automaton.iter_matches(haystack):
+                if alias[0].isascii() and start > 0 and text[start - 1].isalnum():
+                    continue
+                if alias[-1].isascii() and end < len(text) and text[end].isalnum():
+                    continue
+                spans.append((start, end))
+        mentions: List[Tuple[int, int]] = []
+        for start, end in sorted(set(spans), key=lambda span: (span[0] - span[1], span[0])):
+            if all(end <= other_start or start >= other_end for other_start, other_end in mentions):
+                mentions.append((start, end))
+        return sorted(mentions)
+
+    def tiers(self, university_name: str) -> Dict[str, bool]:
+        mask = self.mask(university_name)
+        return {flag: bool(mask & (1 << bit)) for bit, flag in enumerate(self.flags)}
+
+
+UNIVERSITY_INDEX = UniversityIndex()
+_TIER_BITS = {flag: 1 << bit for bit, flag in enumerate(UNIVERSITY_INDEX.flags)}
+
+
+@lru_cache(maxsize=4096)
+def _tier_mask(university_name: str) -> int:
+    return UNIVERSITY_INDEX.mask(university_name)
+
+
+def university_tiers(university_name: str) -> Dict[str, bool]:
+    """
+    Look up all rankings of a university at once.
+
+    Args:
+        university_name: Name of the university to check
+
+    Returns:
+        Dict[str, bool]: The "is_qs_top20", "is_985" and "is_211" flags
+    """
+    mask = _tier_mask(university_name)
+    return {flag: bool(mask & bit) for flag, bit in _TIER_BITS.items()}
+
+
+def university_tiers_batch(university_names: Iterable[str]) -> List[Dict[str, bool]]:
+    """
+    Look up the rankings of many universities, each distinct name once.
+
+    Args:
+        university_names: Names of the universities to check
+
+    Returns:
+        List[Dict[str, bool]]: The flags of each name, in input order
+    """
+    seen: Dict[str, Dict[str, bool]] = {}
+    results = []
+    for name in university_names:
+        if name not in seen:
+            seen[name] = university_tiers(name)
+        results.append(dict(seen[name]))
+    return results
+
+
 def is_211_university(university_name: str) -> bool:
     """
     Check if a university is in the 211 Project list.
@@ -66,15 +195,7 @@ def is_211_university(university_name: str) -> bool:
     Returns:
         bool: True if the university is in 211 Project, False otherwise
     """
-    # Clean up the university name
-    cleaned_name = university_name.strip().replace("大学", "").replace("学院", "")
-    
-    # Check if any 211 university name contains the cleaned name
-    for uni in PROJECT_211_UNIVERSITIES:
-        if cleaned_name in uni or uni in university_name:
-            return True
-    
-    return False
+    return bool(_tier_mask(university_name) & _TIER_BITS["is_211"])
 
 def is_985_university(university_name: str) -> bool:
     """
@@ -86,15 +207,7 @@ def is_985_university(university_name: str) -> bool:
     Returns:
         bool: True if the university is in 985 Project, False otherwise
     """
-    # Clean up the university name
-    cleaned_name = university_name.strip().replace("大学", "").replace("学院", "")
-    
-    # Check if any 985 university name contains the cleaned name
-    for uni in PROJECT_985_UNIVERSITIES:
-        if cleaned_name in uni or uni in university_name:
-            return True
-    
-    return False
+    return bool(_tier_mask(university_name) & _TIER_BITS["is_985"])
 
 def is_qs_top20_university(university_name: str) -> bool:
     """
@@ -106,12 +219,4 @@ def is_qs_top20_university(university_name: str) -> bool:
     Returns:
         bool: True if the university is in QS Top 20, False otherwise
     """
-    # Clean up the university name
-    cleaned_name = university_name.strip().replace("大学", "").replace("学院", "")
-    
-    # Check if any QS Top 20 university name contains the cleaned name
-    for uni in QS_TOP_20_UNIVERSITIES:
-        if cleaned_name.lower() in uni.lower() or uni.lower() in university_name.lower():
-            return True
-    
-    return False 
\ No newline at end of file
+    return bool(_tier_mask(university_name) & _TIER_BITS["is_qs_top20"])
@@ -1,20 +1,72 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 import json
+import logging
 from .base_agent import BaseAgent
 from .llm_client import LlamaClient
+from .metrics import FALLBACKS, timed_stage
+from .prompt_builder import PromptBuilder, CANDIDATE_KEY_PRIORITIES, compact_json, estimate_tokens, fit_json
+from .resilience import Deadline, DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+# 批量评估：每次请求的prompt与输出token预算
+BATCH_PROMPT_BUDGET = 12000
+BATCH_COMPLETION_BUDGET = 4000
+COMPLETION_TOKENS_PER_CANDIDATE = 400
+MAX_BATCH_SIZE = 8
+CANDIDATE_LINE_OVERHEAD = 8
+# 职位要求最多占用的批量prompt预算比例，超出时按字段截断，保证候选人信息有足够空间
+BATCH_JD_SHARE = 0.5
+
+# 评估结果的顶层字段，流式解析时全部完成即可停止生成
+EVALUATION_FIELDS = {"scores", "analysis", "overall_score", "recommendation"}
+
+# 模板顺序：固定说明与输出格式在前，其次是职位要求，候选人信息放在最后，
+# 使同一职位下所有请求共享字节一致的前缀，便于推理服务的前缀缓存命中
+BATCH_EVALUATION_TEMPLATE = """请作为专业的HR评估专家，分别分析下列每位候选人与同一职位的匹配程度。
+
+请对每位候选人独立评估，并以以下JSON格式返回结果：
+{{"results": [{{
+    "candidate_id": "候选人编号（整数）",
+    "scores": {{
+        "skills_match": "技能匹配得分(0-1)",
+        "experience_match": "经验匹配得分(0-1)",
+        "education_match": "教育背景匹配得分(0-1)"
+    }},
+    "analysis": {{
+        "skills_analysis": "技能匹配分析",
+        "experience_analysis": "经验匹配分析",
+        "education_analysis": "教育背景匹配分析",
+        "overall_analysis": "整体评估分析"
+    }},
+    "overall_score": "总体匹配得分(0-1)",
+    "recommendation": "建议（'Strong Match - Highly Recommended' | 'Good Match - Recommended' | 'Moderate Match - Consider for Interview' | 'Weak Match - Not Recommended'）"
+}}]}}
+
+请确保：
+1. results中每位候选人恰好一条结果，candidate_id与输入编号一致
+2. 所有得分在0到1之间
+3. 只返回JSON格式数据，不要包含其他说明文字
+
+职位要求：
+{job_requirements}
+
+候选人信息（每行一位，以候选人编号开头）：
+{candidates}"""
 
 class DecisionMakerAgent(BaseAgent):
     """Agent responsible for evaluating candidates against job requirements."""
     
     def __init__(self):
         super().__init__("DecisionMaker")
-        self.llm_client = LlamaClient()
+        self.llm_client = LlamaClient(agent=self.name)
         
     async def validate(self, data: Dict[str, Any]) -> bool:
         """Validate if the input contains required candidate and job data."""
         required_keys = ["candidate_info", "job_requirements"]
         return all(key in data for key in required_keys)
         
+    @timed_stage("evaluation")
     async def process(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Evaluate candidate fit against job requirements using LLM."""
         if not await self.validate(data):
@@ -23,16 +75,14 @@ class DecisionMakerAgent(BaseAgent):
         candidate_info = data["candidate_info"]
         job_requirements = data["job_requirements"]
         
-        # 构建评估提示
-        evaluation_prompt = f"""
+        # 构建评估提示（紧凑JSON，超出token预算时按字段优先级截断候选人信息）
+        # 职位要求优先分配预算，因此其渲染结果与候选人无关，可作为稳定前缀
+        builder = PromptBuilder(self.name)
+        builder.add_json("job_requirements", job_requirements, priority=2)
+        builder.add_json("candidate_info", candidate_info, priority=1, key_priorities=CANDIDATE_KEY_PRIORITIES)
+        evaluation_prompt = builder.build("""
         请作为专业的HR评估专家，分析候选人与职位的匹配程度。
 
-        职位要求：
-        {json.dumps(job_requirements, ensure_ascii=False, indent=2)}
-
-        候选人信息：
-        {json.dumps(candidate_info, ensure_ascii=False, indent=2)}
-
         请提供详细的评估，并以以下JSON格式返回结果：
         {{
             "scores": {{
@@ -54,35 +104,178 @@ class DecisionMakerAgent(BaseAgent):
         1. 所有得分在0到1之间
         2. 分析要具体且有见地
         3. 只返回JSON格式数据，不要包含其他说明文字
-        """
+
+        职位要求：
+        {job_requirements}
+
+        候选人信息：
+        {candidate_info}
+        """)["prompt"]
 
         try:
-            response = await self.llm_client._call_llm(evaluation_prompt)
-            # 提取JSON部分
-            json_str = response[response.find("{"):response.rfind("}")+1]
-            result = json.loads(json_str)
-            
-            # 确保得分在0-1之间
-            result["scores"] = {k: min(max(float(v), 0), 1) for k, v in result["scores"].items()}
-            result["overall_score"] = min(max(float(result["overall_score"]), 0), 1)
-            
-            return result
+            # 按路由规则选择模型；有进度回调时流式返回，字段完成即推送，所有字段解析完毕后提前结束生成
+            return await self.llm_client._call_llm_json(
+                evaluation_prompt,
+                self.name,
+                deadline=data.get("deadline"),
+                validate=self._check_evaluation,
+                input_tokens=estimate_tokens(evaluation_prompt),
+                on_field=data.get("on_progress"),
+                required_fields=EVALUATION_FIELDS
+            )
             
         except (json.JSONDecodeError, ValueError) as e:
             print(f"Error processing LLM response: {e}")
+            FALLBACKS.inc(kind="evaluation_default")
             # 返回默认结果
-            return {
-                "scores": {
-                    "skills_match": 0.0,
-                    "experience_match": 0.0,
-                    "education_match": 0.0
-                },
-                "analysis": {
-                    "skills_analysis": "无法进行技能分析",
-                    "experience_analysis": "无法进行经验分析",
-                    "education_analysis": "无法进行教育背景分析",
-                    "overall_analysis": "评估过程出现错误"
-                },
-                "overall_score": 0.0,
-                "recommendation": "Weak Match - Not Recommended"
-            } 
\ No newline at end of file
+            return self._default_evaluation()
+
+    @timed_stage("batch_evaluation")
+    async def process_batch(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Evaluate several candidates against the same job requirements.
+
+        Candidates are packed into as few LLM calls as the token budget allows, sharing one
+        job requirements header. Candidates whose result is missing or malformed are
+        re-evaluated individually with process(); if that fails too, the candidate gets the
+        default evaluation. Only DeadlineExceeded is raised.
+        """
+        if not isinstance(data, dict) or "candidates" not in data or "job_requirements" not in data:
+            raise ValueError("Invalid input data format")
+
+        candidates = data["candidates"]
+        job_requirements = data["job_requirements"]
+        deadline = data.get("deadline")
+        evaluations: List[Dict[str, Any]] = [None] * len(candidates)
+
+        requirements = self._render_requirements(job_requirements)
+        for batch in self._plan_batches(candidates, requirements):
+            results = await self._evaluate_batch(batch, requirements, deadline)
+            for index, _ in batch:
+                evaluation = results.get(index)
+                if evaluation is None:
+                    logger.warning(f"Batch evaluation missing for candidate {index}, falling back to single evaluation")
+                    FALLBACKS.inc(kind="batch_to_single_evaluation")
+                    try:
+                        evaluation = await self.process({
+                            "candidate_info": candidates[index],
+                            "job_requirements": job_requirements,
+                            "deadline": deadline
+                        })
+                    except DeadlineExceeded:
+                        raise
+                    except Exception as e:
+                        # One failing candidate must not discard the evaluations already done
+                        logger.warning(f"Single evaluation failed for candidate {index}: {e}")
+                        FALLBACKS.inc(kind="evaluation_default")
+                        evaluation = self._default_evaluation()
+                evaluations[index] = evaluation
+        return evaluations
+
+    def _render_requirements(self, job_requirements: Dict[str, Any]) -> str:
+        """Job requirements as compact JSON, cut to BATCH_JD_SHARE of the batch prompt budget."""
+        budget = int(BATCH_PROMPT_BUDGET * BATCH_JD_SHARE)
+        requirements = compact_json(job_requirements)
+        if estimate_tokens(requirements) > budget:
+            logger.warning(f"Job requirements exceed {budget} tokens, truncating them for batch evaluation")
+            requirements = fit_json(job_requirements, budget)
+        return requirements
+
+    def _plan_batches(self, candidates: List[Dict[str, Any]], requirements: str) -> List[List[Tuple[int, str]]]:
+        """Split candidates into batches bounded by prompt and completion token budgets.
+
+        requirements is the job requirements header as rendered by _render_requirements.
+        """
+        header_tokens = estimate_tokens(BATCH_EVALUATION_TEMPLATE) + estimate_tokens(requirements)
+        candidate_budget = max(BATCH_PROMPT_BUDGET - header_tokens, 0)
+        max_batch_size = max(min(MAX_BATCH_SIZE, BATCH_COMPLETION_BUDGET // COMPLETION_TOKENS_PER_CANDIDATE), 1)
+        # 单个候选人最多占用的token，避免一个超长简历独占整个批次
+        per_candidate_cap = max(candidate_budget // max_batch_size, 1)
+
+        batches: List[List[Tuple[int, str]]] = []
+        current: List[Tuple[int, str]] = []
+        used = 0
+        for index, candidate_info in enumerate(candidates):
+            profile = compact_json(candidate_info)
+            if estimate_tokens(profile) > per_candidate_cap:
+                profile = fit_json(candidate_info, per_candidate_cap, CANDIDATE_KEY_PRIORITIES)
+            tokens = estimate_tokens(profile) + CANDIDATE_LINE_OVERHEAD
+            if current and (used + tokens > candidate_budget or len(current) >= max_batch_size):
+                batches.append(current)
+                current, used = [], 0
+            current.append((index, profile))
+            used += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _evaluate_batch(self, batch: List[Tuple[int, str]], requirements: str,
+                              deadline: Optional[Deadline] = None) -> Dict[int, Dict[str, Any]]:
+        """Evaluate one batch in a single LLM call and return valid results keyed by candidate index."""
+        candidate_lines = "\n".join(f"候选人 {index}：{profile}" for index, profile in batch)
+        prompt = BATCH_EVALUATION_TEMPLATE.format(
+            job_requirements=requirements,
+            candidates=candidate_lines
+        )
+
+        try:
+            response = await self.llm_client._call_llm_json(prompt, self.name, deadline=deadline,
+                                                             validate=self._check_batch_response,
+                                                             input_tokens=estimate_tokens(prompt))
+            items = response["results"]
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.warning(f"Error processing batch LLM response: {e}")
+            return {}
+
+        expected = {index for index, _ in batch}
+        results: Dict[int, Dict[str, Any]] = {}
+        for item in items:
+            try:
+                index = int(item.pop("candidate_id"))
+                if index not in expected or index in results:
+                    continue
+                self._check_evaluation(item)
+                results[index] = item
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Malformed batch evaluation entry: {e}")
+        return results
+
+    def _check_batch_response(self, response: Dict[str, Any]):
+        """Raise ValueError unless the batch response holds a results list."""
+        if not isinstance(response.get("results"), list):
+            raise ValueError("missing results list")
+
+    def _check_evaluation(self, result: Dict[str, Any]):
+        """Normalize an evaluation in place; raises ValueError if it is malformed."""
+        if "recommendation" not in result or "analysis" not in result:
+            raise ValueError("missing recommendation or analysis")
+        try:
+            self._normalize_evaluation(result)
+        except (AttributeError, KeyError, TypeError) as e:
+            raise ValueError(f"malformed scores: {e!r}") from e
+
+    def _normalize_evaluation(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate an evaluation returned by the LLM and clamp its scores to 0-1."""
+        # 确保得分在0-1之间
+        result["scores"] = {k: min(max(float(v), 0), 1) for k, v in result["scores"].items()}
+        result["overall_score"] = min(max(float(result["overall_score"]), 0), 1)
+        return result
+
+    def _default_evaluation(self) -> Dict[str, Any]:
+        """Fallback evaluation used when the LLM response cannot be parsed."""
+        return {
+            "scores": {
+                "skills_match": 0.0,
+                "experience_match": 0.0,
+                "education_match": 0.0
+            },
+            "analysis": {
+                "skills_analysis": "无法进行技能分析",
+                "experience_analysis": "无法进行经验分析",
+                "education_analysis": "无法进行教育背景分析",
+                "overall_analysis": "评估过程出现错误"
+            },
+            "overall_score": 0.0,
+            "recommendation": "Weak Match - Not Recommended"
+        }
@@ -0,0 +1,93 @@
+import io
+import zipfile
+from typing import BinaryIO, Iterator, List, Union
+
+from lxml import etree
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_P, _TR, _TC, _R = _W + "p", _W + "tr", _W + "tc", _W + "r"
+_BODY, _TEXT = _W + "body", _W + "t"
+# Run children that stand for a character, as in python-docx's Run.text
+_RUN_CHARACTERS = {_W + "tab": "\t", _W + "br": "\n", _W + "cr": "\n", _W + "noBreakHyphen": "-"}
+# Only these elements reach Python; lxml skips all others while parsing
+_TAGS = [_BODY, _P, _TR, _TC, _TEXT, *_RUN_CHARACTERS]
+
+DOCUMENT_PART = "word/document.xml"
+# Separator between the cells of a table row
+CELL_SEPARATOR = " | "
+
+
+def _release(element):
+    """Drop an element that has been read, and its already read siblings."""
+    element.clear(keep_tail=True)
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
+
+
+def iter_docx_lines(source: Union[bytes, str, BinaryIO]) -> Iterator[str]:
+    """Yield the paragraphs and table rows of a DOCX file in document order.
+
+    word/document.xml is parsed incrementally from the zip, and paragraphs and table rows
+    are dropped once they have been read, so memory stays bounded by the largest row. A
+    table row is one line with its cells separated by CELL_SEPARATOR; nested tables become
+    part of their cell. Paragraphs of text boxes are yielded before the paragraph that
+    anchors them.
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    with zipfile.ZipFile(source) as archive, archive.open(DOCUMENT_PART) as xml:
+        # Open paragraphs and cells, innermost last
+        containers: List[str] = []
+        paragraphs: List[List[str]] = []
+        # Per open table row its cell texts; per open cell its paragraph texts
+        rows: List[List[str]] = []
+        cells: List[List[str]] = []
+        for event, element in etree.iterparse(xml, events=("start", "end"), tag=_TAGS):
+            tag = element.tag
+            if event == "start":
+                if tag == _P:
+                    paragraphs.append([])
+                    containers.append(tag)
+                elif tag == _TC:
+                    cells.append([])
+                    containers.append(tag)
+                elif tag == _TR:
+                    rows.append([])
+                continue
+
+            if tag == _TEXT:
+                if paragraphs:
+                    paragraphs[-1].append(element.text or "")
+            elif tag in _RUN_CHARACTERS:
+                # w:tab also defines tab stops in paragraph properties
+                if paragraphs and element.getparent().tag == _R:
+                    paragraphs[-1].append(_RUN_CHARACTERS[tag])
+            elif tag == _P:
+                containers.pop()
+                text = "".join(paragraphs.pop())
+                if containers and containers[-1] == _TC:
+                    cells[-1].append(text)
+                else:
+                    yield text
+                # Text box paragraphs are read with the run that contains them
+                if not containers:
+                    _release(element)
+            elif tag == _TC:
+                containers.pop()
+                rows[-1].append(" ".join(text for text in cells.pop() if text))
+            elif tag == _TR:
+                line = CELL_SEPARATOR.join(rows.pop())
+                if containers and containers[-1] == _TC:
+                    cells[-1].append(line)
+                else:
+                    yield line
+                _release(element)
+            elif tag == _BODY:
+                _release(element)
+
+
+def extract_docx_text(source: Union[bytes, str, BinaryIO]) -> str:
+    """Text of a DOCX file, one paragraph or table row per line."""
+    return "\n".join(iter_docx_lines(source))
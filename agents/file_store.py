@@ -0,0 +1,154 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from an upload and written to disk per step
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(2**20)))
+TEMP_PREFIX = ".upload-"
+
+# (device, inode, size, mtime_ns): renames and hard links keep it, rewrites change it
+StatKey = Tuple[int, int, int, int]
+
+
+class FileExistsWithOtherContent(FileExistsError):
+    """A different file is already stored under the uploaded name."""
+
+
+def _stat_key(stat: os.stat_result) -> StatKey:
+    return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def hash_file(path: str, chunk_size: int = UPLOAD_CHUNK_BYTES) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileStore:
+    """An asset directory whose files are known by SHA-256.
+
+    Uploads are streamed to a temporary file in the directory while they are hashed, then
+    renamed into place atomically. Content already stored under another name is hard linked
+    instead of stored twice. The directory is hashed once, on the first commit; after that an
+    index of digest -> file name is kept up to date by the commits themselves, and entries
+    changed behind the store's back are checked by stat when used. Digests are remembered by
+    device, inode, size and mtime, so a file is only hashed again after it has been rewritten.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._digests: Dict[StatKey, str] = {}
+        self._by_digest: Optional[Dict[str, str]] = None
+        # Commits run in threads; one at a time sees a consistent directory
+        self._lock = threading.Lock()
+
+    def digest_of(self, path: str) -> Optional[str]:
+        """The known SHA-256 of a stored file, without reading it; None if not known."""
+        try:
+            return self._digests.get(_stat_key(os.stat(path)))
+        except OSError:
+            return None
+
+    def _digest(self, path: str) -> Optional[str]:
+        """SHA-256 of a file, hashing it only if not known; None if it is gone."""
+        try:
+            key = _stat_key(os.stat(path))
+            if key not in self._digests:
+                self._digests[key] = hash_file(path)
+            return self._digests[key]
+        except OSError:
+            return None
+
+    def _index(self) -> Dict[str, str]:
+        """Digest -> a file name with that content, from one scan of the directory."""
+        if self._by_digest is None:
+            self._by_digest = {}
+            for entry in os.scandir(self.directory):
+                if entry.name.startswith(TEMP_PREFIX) or not entry.is_file(follow_symlinks=False):
+                    continue
+                digest = self._digest(entry.path)
+                if digest is not None:
+                    self._by_digest.setdefault(digest, entry.name)
+        return self._by_digest
+
+    def _commit(self, temp_path: str, filename: str, digest: str) -> Dict[str, Any]:
+        with self._lock:
+            return self._commit_locked(temp_path, filename, digest)
+
+    def _commit_locked(self, temp_path: str, filename: str, digest: str) -> Dict[str, Any]:
+        by_digest = self._index()
+        path = os.path.join(self.directory, filename)
+        if os.path.exists(path):
+            os.remove(temp_path)
+            if self._digest(path) != digest:
+                raise FileExistsWithOtherContent(f"A different file named {filename} already exists")
+            return {"filename": filename, "sha256": digest, "deduplicated": True}
+
+        existing = by_digest.get(digest)
+        # Files deleted, renamed or rewritten outside the store leave stale entries
+        if existing is not None and self._digest(os.path.join(self.directory, existing)) != digest:
+            del by_digest[digest]
+            existing = None
+        if existing is not None:
+            try:
+                os.link(os.path.join(self.directory, existing), path)
+                os.remove(temp_path)
+                self._digests[_stat_key(os.stat(path))] = digest
+                return {"filename": filename, "sha256": digest, "deduplicated": True, "linked_to": existing}
+            except OSError as e:
+                # Filesystems without hard links get a copy after all
+                logger.warning(f"Could not link {filename} to {existing}: {e}")
+
+        os.replace(temp_path, path)
+        self._digests[_stat_key(os.stat(path))] = digest
+        by_digest.setdefault(digest, filename)
+        return {"filename": filename, "sha256": digest, "deduplicated": False}
+
+    async def save(self, read: Callable[[int], Awaitable[bytes]], filename: str) -> Dict[str, Any]:
+        """Stream an upload into the directory under filename; read(n) returns the next chunk.
+
+        Returns the file name, SHA-256, size and whether existing content was reused. Raises
+        FileExistsWithOtherContent if filename is taken by different content; the same content
+        under the same name is accepted as is.
+        """
+        filename = os.path.basename(filename)
+        digest = hashlib.sha256()
+        size = 0
+        # In the target directory, so that the final rename stays on one filesystem
+        temp_path = os.path.join(self.directory, f"{TEMP_PREFIX}{uuid.uuid4().hex}.tmp")
+        try:
+            with open(temp_path, 'xb') as temp:
+
+                def write(chunk: bytes):
+                    digest.update(chunk)
+                    temp.write(chunk)
+
+                while chunk := await read(UPLOAD_CHUNK_BYTES):
+                    size += len(chunk)
+                    await asyncio.to_thread(write, chunk)
+            result = await asyncio.to_thread(self._commit, temp_path, filename, digest.hexdigest())
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return {**result, "bytes": size}
+
+
+_stores: Dict[str, FileStore] = {}
+
+
+def get_file_store(directory: str) -> FileStore:
+    """Return the store of an asset directory."""
+    directory = os.path.abspath(directory)
+    if directory not in _stores:
+        _stores[directory] = FileStore(directory)
+    return _stores[directory]
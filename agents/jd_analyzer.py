@@ -1,72 +1,99 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+import asyncio
 import json
 from .base_agent import BaseAgent
+from .chunking import CHUNKED_EXTRACTION_MAX_TOKENS, merge_results, split_text
 from .llm_client import LlamaClient
+from .metrics import FALLBACKS, timed_stage
+from .prompt_builder import PromptBuilder, estimate_tokens
+from .resilience import Deadline
 
 class JDAnalyzerAgent(BaseAgent):
     """Agent responsible for analyzing job descriptions and breaking them down into structured criteria."""
     
     def __init__(self):
         super().__init__("JDAnalyzer")
-        self.llm_client = LlamaClient()
+        self.llm_client = LlamaClient(agent=self.name)
         
     async def validate(self, data: Dict[str, str]) -> bool:
         """Validate if the input contains required job description data."""
         return isinstance(data, dict) and "text" in data
         
+    @timed_stage("jd_analysis")
     async def process(self, data: Dict[str, str]) -> Dict[str, Any]:
         """Break down job description into structured criteria using LLM."""
         if not await self.validate(data):
             raise ValueError("Invalid input data format")
             
-        text = data["text"]
-        
-        # 直接使用LLM分析整个JD
-        prompt = """
+        # 超长JD按章节切块并发分析，再合并去重
+        chunks = split_text(data["text"], CHUNKED_EXTRACTION_MAX_TOKENS)
+        results = await asyncio.gather(*(self.analyze_text(chunk, data.get("deadline")) for chunk in chunks),
+                                       return_exceptions=True)
+        partials = []
+        for result in results:
+            if isinstance(result, json.JSONDecodeError):
+                print(f"Error parsing LLM response: {result}")
+                if len(chunks) > 1:
+                    FALLBACKS.inc(kind="jd_chunk_default")
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            partials.append(result)
+        if partials:
+            return partials[0] if len(partials) == 1 else merge_results(partials)
+
+        FALLBACKS.inc(kind="jd_analysis_default")
+        return {
+            "job_title": "",
+            "industry": "",
+            "required_skills": [],
+            "preferred_skills": [],
+            "responsibilities": [],
+            "experience_requirements": {
+                "years": "",
+                "description": ""
+            },
+            "education_requirements": {
+                "degree": "",
+                "major": ""
+            },
+            "additional_requirements": []
+        }
+
+    async def analyze_text(self, text: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Analyze a job description, or one chunk of it, with the model routed for this agent.
+
+        Raises json.JSONDecodeError if neither the routed model nor the escalation model
+        returns a valid JSON object.
+        """
+        # 固定说明在前、JD文本在后，便于前缀缓存
+        prompt = PromptBuilder(self.name).add_text("jd_text", text).build("""
         请分析以下工作描述，提取关键信息并以JSON格式返回，包含以下字段：
-        {
+        {{
             "job_title": "职位名称",
             "industry": "所属行业",
             "required_skills": ["必需技能列表"],
             "preferred_skills": ["加分技能列表"],
             "responsibilities": ["工作职责列表"],
-            "experience_requirements": {
+            "experience_requirements": {{
                 "years": "要求年限",
                 "description": "经验要求描述"
-            },
-            "education_requirements": {
+            }},
+            "education_requirements": {{
                 "degree": "学历要求",
                 "major": "专业要求"
-            },
+            }},
             "additional_requirements": ["其他要求列表"]
-        }
-        工作描述："""+text+"""
+        }}
         请确保返回的是有效的JSON格式。只返回JSON数据，不要包含其他说明文字。
-        """
+
+        工作描述：
+        {jd_text}
+        """)["prompt"]
         
-        try:
-            response = await self.llm_client._call_llm(prompt)
-            # 提取JSON部分（以防LLM返回了额外的文本）
-            json_str = response[response.find("{"):response.rfind("}")+1]
-            return json.loads(json_str)
-        except json.JSONDecodeError as e:
-            print(f"Error parsing LLM response: {e}")
-            return {
-                "job_title": "",
-                "industry": "",
-                "required_skills": [],
-                "preferred_skills": [],
-                "responsibilities": [],
-                "experience_requirements": {
-                    "years": "",
-                    "description": ""
-                },
-                "education_requirements": {
-                    "degree": "",
-                    "major": ""
-                },
-                "additional_requirements": []
-            }
+        # 按路由规则选择模型，无效JSON时升级到大模型重试
+        return await self.llm_client._call_llm_json(prompt, self.name, deadline=deadline,
+                                                    input_tokens=estimate_tokens(text))
         
     async def _extract_job_title(self, text: str) -> str:
         """Extract the job title from the description."""
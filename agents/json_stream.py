@@ -0,0 +1,131 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class IncrementalJSONParser:
+    """Incrementally parses the first top-level JSON object of a streamed LLM response.
+
+    Text before the opening brace is ignored. Each top-level field is published as soon as
+    its value is complete: strings, objects and arrays when they close, numbers and literals
+    when the following delimiter arrives.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self.start: Optional[int] = None
+        self.end: Optional[int] = None
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self._value_kind: Optional[str] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume a chunk of text and return the top-level fields completed by it."""
+        completed: List[Tuple[str, Any]] = []
+        if self.done:
+            return completed
+        self.buffer += chunk
+        buf = self.buffer
+
+        while self._pos < len(buf) and not self.done:
+            pos = self._pos
+            char = buf[pos]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        if self._key_start is not None:
+                            self._key = self._loads(buf[self._key_start:pos + 1])
+                            self._key_start = None
+                        elif self._value_kind == "string":
+                            self._emit(buf[self._value_start:pos + 1], completed)
+                continue
+
+            if self.start is None:
+                # Skip any preamble before the object
+                if char == "{":
+                    self.start = pos
+                    self._depth = 1
+                    self._expect_key = True
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    if self._expect_key:
+                        self._key_start = pos
+                        self._expect_key = False
+                    elif self._key is not None and self._value_start is None:
+                        self._value_start, self._value_kind = pos, "string"
+            elif char in "{[":
+                if self._depth == 1 and self._key is not None and self._value_start is None:
+                    self._value_start, self._value_kind = pos, "composite"
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._value_kind == "composite":
+                    self._emit(buf[self._value_start:pos + 1], completed)
+                elif self._depth == 0:
+                    if self._value_kind == "scalar":
+                        self._emit(buf[self._value_start:pos], completed)
+                    self.done = True
+                    self.end = pos
+            elif self._depth == 1:
+                if char == ",":
+                    if self._value_kind == "scalar":
+                        self._emit(buf[self._value_start:pos], completed)
+                    self._expect_key = True
+                elif char not in " \t\r\n:" and self._key is not None and self._value_start is None:
+                    self._value_start, self._value_kind = pos, "scalar"
+        return completed
+
+    def text(self) -> Optional[str]:
+        """Return the raw text of the complete top-level object, if it has been closed."""
+        if not self.done:
+            return None
+        return self.buffer[self.start:self.end + 1]
+
+    def _emit(self, raw: str, completed: List[Tuple[str, Any]]):
+        key = self._key
+        self._key = None
+        self._value_start = None
+        self._value_kind = None
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        self.fields[key] = value
+        completed.append((key, value))
+
+    @staticmethod
+    def _loads(raw: str) -> Optional[str]:
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            return None
+
+
+def parse_json_response(response: str) -> Dict[str, Any]:
+    """Parse the first JSON object in an LLM response, ignoring any text around it.
+
+    Raises json.JSONDecodeError if the response contains no valid object.
+    """
+    parser = IncrementalJSONParser()
+    parser.feed(response)
+    if parser.done:
+        return json.loads(parser.text())
+    # Fall back to the outermost braces, e.g. when the object is not properly closed
+    return json.loads(response[response.find("{"):response.rfind("}")+1])
@@ -1,44 +1,64 @@
-from typing import Dict, Any, List
-import re
+import asyncio
+from typing import Dict, Any, List, Optional
 from .base_agent import BaseAgent
-from .llm_client import LlamaClient
-from .data.universities import is_211_university, is_985_university, is_qs_top20_university
+from .chunking import CHUNKED_EXTRACTION_MAX_TOKENS, merge_results, split_text
+from .llm_client import EXTRACTION_FIELDS, LlamaClient
+from .local_extractor import cross_check, extract_local, skippable_fields
+from .metrics import FALLBACKS, timed_stage
+from .data.universities import university_tiers_batch
+from .resilience import Deadline, DeadlineExceeded
+from .sectionizer import plan_extraction
+from .text_profile import profile_text
+from .tracing import trace_span
 
 class KnowledgeExtractorAgent(BaseAgent):
     """Agent responsible for extracting key information from resume text."""
     
     def __init__(self):
         super().__init__("KnowledgeExtractor")
-        self.llm_client = LlamaClient()
+        self.llm_client = LlamaClient(agent=self.name)
     
     def detect_language(self, text: str) -> str:
         """Detect if the text is primarily Chinese or English."""
-        chinese_chars = len(re.findall(r'[\u4e00-\u9fff]', text))
-        english_words = len(re.findall(r'[a-zA-Z]+', text))
-        return "zh" if chinese_chars > english_words else "en"
+        return profile_text(text).language
     
     async def validate(self, data: Dict[str, str]) -> bool:
         """Validate if the input contains required text data."""
         return isinstance(data, dict) and "text" in data
         
+    @timed_stage("extraction")
     async def process(self, data: Dict[str, str]) -> Dict[str, Any]:
         """Extract key information from the resume text."""
         if not await self.validate(data):
             raise ValueError("Invalid input data format")
             
-        text = data["text"]
-        language = self.detect_language(text)
+        # Callers that already profiled the text pass the profile along
+        profile = data.get("profile") or profile_text(data["text"])
         
-        # Use LLM to get structured information
-        llm_result = await self.llm_client.extract_structured_info(text, language)
+        # Contact details and labelled fields are read locally; the LLM skips what is complete
+        local = extract_local(profile)
+        skipped = skippable_fields(local)
+        
+        # Use LLM to get structured information, section by section for long resumes
+        fields = [field for field in EXTRACTION_FIELDS if field not in skipped]
+        plan = plan_extraction(profile, exclude=skipped)
+        if plan is None and profile.tokens > CHUNKED_EXTRACTION_MAX_TOKENS:
+            # Too long for one call but without the headings for a sectioned extraction
+            plan = {"resume": {"fields": fields, "text": profile.text}}
+        if plan:
+            llm_result = await self.extract_sections(plan, profile.language, data.get("deadline"))
+        else:
+            llm_result = await self.llm_client.extract_structured_info(
+                profile.text, profile.language, deadline=data.get("deadline"), input_tokens=profile.tokens,
+                fields=fields
+            )
+        llm_result = cross_check(llm_result, local, profile.text)
         
         # Process education information to check for university rankings
         education = llm_result.get("education", [])
-        for edu in education:
-            if isinstance(edu, dict) and "institution" in edu:
-                edu["is_qs_top20"] = is_qs_top20_university(edu["institution"])
-                edu["is_985"] = is_985_university(edu["institution"])
-                edu["is_211"] = is_211_university(edu["institution"])
+        entries = [edu for edu in education if isinstance(edu, dict) and "institution" in edu]
+        for edu, tiers in zip(entries, university_tiers_batch(edu["institution"] for edu in entries)):
+            edu.update(tiers)
         
         # Return processed results
         return {
@@ -51,4 +71,32 @@ class KnowledgeExtractorAgent(BaseAgent):
             "projects": llm_result.get("projects", []),
             "certifications": llm_result.get("certifications", []),
             "languages": llm_result.get("languages", [])
-        } 
\ No newline at end of file
+        } 
+
+    async def extract_sections(self, plan: Dict[str, Dict[str, Any]], language: str,
+                               deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Extract the fields of each section group concurrently and merge them into one result.
+
+        Group texts longer than a chunk are split into chunks that are extracted concurrently
+        as well. The results of a failed call are left out, so its fields may get their defaults.
+        """
+        calls = [(group, chunk, spec["fields"]) for group, spec in plan.items()
+                 for chunk in split_text(spec["text"], CHUNKED_EXTRACTION_MAX_TOKENS)]
+
+        async def extract_chunk(group: str, index: int, text: str, fields: List[str]) -> Dict[str, Any]:
+            with trace_span("extraction_section", group=group, chunk=index, fields=len(fields)):
+                return await self.llm_client.extract_fields(text, language, fields, deadline=deadline)
+
+        results = await asyncio.gather(*(extract_chunk(group, index, text, fields)
+                                         for index, (group, text, fields) in enumerate(calls)),
+                                       return_exceptions=True)
+        partials: List[Dict[str, Any]] = []
+        for (group, _, fields), result in zip(calls, results):
+            if isinstance(result, DeadlineExceeded):
+                raise result
+            if isinstance(result, BaseException):
+                print(f"Error extracting {group} section with LLM: {result}")
+                FALLBACKS.inc(kind="extraction_section_default")
+                continue
+            partials.append({field: result[field] for field in fields if field in result})
+        return merge_results(partials)
@@ -1,91 +1,325 @@
-from openai import AsyncOpenAI
+import asyncio
 import json
-from typing import Dict, Any, List
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set
+from .backend_pool import BackendPool, get_backend_pool
+from .json_stream import IncrementalJSONParser, parse_json_response
+from .tracing import annotate, start_span, trace_span
+from .metrics import FALLBACKS, LLM_CALL_SECONDS, LLM_IN_FLIGHT, record_llm_usage
+from .model_router import LLM_LARGE_MODEL, ModelRoute, ModelRouter, get_model_router
+from .prompt_builder import PromptBuilder, estimate_tokens
+from .rate_limiter import LLMRateLimiter, get_rate_limiter
+from .resilience import Deadline, DeadlineExceeded, RetryPolicy, StreamInterrupted, call_timeout
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for a single LLM request (connect + generation)
+LLM_CALL_TIMEOUT = 120.0
+# Completion tokens reserved from the rate limiter before the real usage is known
+COMPLETION_TOKENS_ESTIMATE = 1024
+# Fields of the extraction result that must be lists when present
+EXTRACTION_LIST_FIELDS = ("skills", "experience", "education", "projects", "certifications", "languages")
+EXTRACTION_CORE_FIELDS = ("basic_info", "skills", "experience", "education")
+EXTRACTION_FIELDS = ("basic_info", "contact", "summary", "skills", "experience", "education", "projects",
+                     "certifications", "languages")
+
+# Opening and closing line of the extraction prompt per language
+EXTRACTION_PROMPT_FRAME = {
+    "en": ("Extract the following information from the resume in JSON format:",
+           "Return the information in valid JSON format only."),
+    "zh": ("请从简历中提取以下信息，并以JSON格式返回：", "仅返回有效的JSON格式数据。"),
+}
+# Description of each candidate field: first line, then the keys of list items
+EXTRACTION_FIELD_SPECS = {
+    "en": {
+        "basic_info": ["basic_info: Basic information including name, age, years of experience, current location"],
+        "contact": ["contact: Contact information including email and phone number"],
+        "summary": ["summary: A brief professional summary"],
+        "skills": ["skills: List of technical and professional skills"],
+        "experience": ["experience: List of work experiences with:", "company: Company name", "title: Job title",
+                       "duration: Employment period", "responsibilities: Key responsibilities and achievements"],
+        "education": ["education: List of educational background with:", "degree: Degree name",
+                      "institution: School/University name", "year: Graduation year", "major: Field of study"],
+        "projects": ["projects: List of significant projects with:", "name: Project name",
+                     "description: Project description", "technologies: Technologies used", "role: Your role"],
+        "certifications": ["certifications: List of professional certifications"],
+        "languages": ["languages: Language proficiencies"],
+    },
+    "zh": {
+        "basic_info": ["basic_info: 基本信息，包括姓名、年龄、工作年限、所在地"],
+        "contact": ["contact: 联系方式，包括邮箱和电话号码"],
+        "summary": ["summary: 个人简介"],
+        "skills": ["skills: 技术和专业技能列表"],
+        "experience": ["experience: 工作经历列表，包含：", "company: 公司名称", "title: 职位名称",
+                       "duration: 工作时间段", "responsibilities: 主要职责和成就"],
+        "education": ["education: 教育背景列表，包含：", "degree: 学位", "institution: 学校名称",
+                      "year: 毕业年份", "major: 专业"],
+        "projects": ["projects: 项目经验列表，包含：", "name: 项目名称", "description: 项目描述",
+                     "technologies: 使用的技术", "role: 担任角色"],
+        "certifications": ["certifications: 专业证书列表"],
+        "languages": ["languages: 语言能力"],
+    },
+}
+_PROMPT_INDENT = "\n" + " " * 20
+
+
+def extraction_instructions(language: str, fields: Sequence[str] = EXTRACTION_FIELDS) -> str:
+    """Numbered instructions for extracting the given candidate fields from a resume."""
+    opening, closing = EXTRACTION_PROMPT_FRAME[language]
+    items = []
+    for number, field in enumerate(fields, start=1):
+        first, *keys = EXTRACTION_FIELD_SPECS[language][field]
+        items.append(f"{number}. {first}" + "".join(f"{_PROMPT_INDENT}   - {key}" for key in keys))
+    return opening + _PROMPT_INDENT + _PROMPT_INDENT.join(items) + _PROMPT_INDENT + _PROMPT_INDENT + closing
+
+
+def check_extraction_schema(result: Dict[str, Any], required: Sequence[str] = EXTRACTION_CORE_FIELDS):
+    """Raise ValueError if an extraction result does not follow the candidate schema.
+
+    At least one of the required fields must be present.
+    """
+    if not isinstance(result, dict):
+        raise ValueError("Extraction result is not a JSON object")
+    if not any(field in result for field in required):
+        raise ValueError("Extraction result has none of the candidate fields")
+    for field in EXTRACTION_LIST_FIELDS:
+        if field in result and not isinstance(result[field], list):
+            raise ValueError(f"Extraction field '{field}' is not a list")
+    for field in ("basic_info", "contact"):
+        if field in result and not isinstance(result[field], dict):
+            raise ValueError(f"Extraction field '{field}' is not an object")
+
 
 class LlamaClient:
     """Client for interacting with Llama 3.3 70B model."""
     
-    def __init__(self):
-        self.client = AsyncOpenAI(
-            base_url="http://10.4.33.13:80/v1",
-            api_key="123"
-        )
-        self.model = "ibnzterrell/Meta-Llama-3.3-70B-Instruct-AWQ-INT4"
+    def __init__(self, timeout: float = LLM_CALL_TIMEOUT, retry_policy: Optional[RetryPolicy] = None,
+                 rate_limiter: Optional[LLMRateLimiter] = None, pool: Optional[BackendPool] = None,
+                 router: Optional[ModelRouter] = None, agent: str = "default"):
+        self.agent = agent  # Label for metrics
+        # Requests are spread over the replicas in LLM_BASE_URLS
+        self.pool = pool or get_backend_pool()
+        self.model = LLM_LARGE_MODEL
+        self.router = router or get_model_router()
+        self.timeout = timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+
+    def _messages(self, prompt: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": "You are a helpful assistant that extracts structured information from resumes."},
+            {"role": "user", "content": prompt}
+        ]
+
+    async def _create(self, prompt: str, deadline: Optional[Deadline] = None,
+                      consume: Optional[Callable[[Any], Awaitable[str]]] = None,
+                      route: Optional[ModelRoute] = None, **kwargs) -> Any:
+        """Create a chat completion with a per-call timeout and retries for transient errors.
+
+        Every attempt is admitted by the shared rate limiter. For streaming calls, consume is
+        awaited with the stream inside the same admission slot and its result is returned;
+        a stream that breaks midway raises StreamInterrupted and is not retried.
+        Without a route, the client's own model and pool are used.
+        """
+        model = route.model if route else self.model
+        pool = (route.pool if route else None) or self.pool
+        prompt_tokens = estimate_tokens(prompt)
+        estimated_tokens = prompt_tokens + COMPLETION_TOKENS_ESTIMATE
+        attempt = 0
+        while True:
+            if deadline:
+                deadline.check("LLM call")
+            started = time.perf_counter()
+            try:
+                with trace_span("llm_request", agent=self.agent, model=model, attempt=attempt + 1,
+                                streamed=consume is not None):
+                    queue_wait = start_span("queue_wait")
+                    async with self.rate_limiter.slot(estimated_tokens, deadline) as permit, \
+                            pool.backend(deadline) as backend:
+                        queue_wait.finish()
+                        annotate(backend=backend.base_url)
+                        with LLM_IN_FLIGHT.track_inprogress(agent=self.agent):
+                            timeout = call_timeout(self.timeout, deadline)
+                            response = await asyncio.wait_for(
+                                backend.client.chat.completions.create(
+                                    model=model,
+                                    messages=self._messages(prompt),
+                                    timeout=timeout,
+                                    **kwargs
+                                ),
+                                timeout=timeout
+                            )
+                            if consume is None:
+                                usage = getattr(response, "usage", None)
+                                permit.record_usage(getattr(usage, "total_tokens", None))
+                                self._record_call(model, started, "success", usage)
+                                return response
+                            try:
+                                result = await consume(response)
+                            except DeadlineExceeded:
+                                raise
+                            except Exception as e:
+                                raise StreamInterrupted(f"LLM stream interrupted: {type(e).__name__}: {e}") from e
+                            completion_tokens = estimate_tokens(result)
+                            permit.record_usage(prompt_tokens + completion_tokens)
+                            # Aborted streams carry no usage; count the estimates instead
+                            self._record_call(model, started, "success")
+                            record_llm_usage(self.agent, model, prompt_tokens, completion_tokens)
+                            annotate(prompt_tokens_estimate=prompt_tokens, completion_tokens_estimate=completion_tokens)
+                            return result
+            except Exception as e:
+                timed_out = isinstance(e, (asyncio.TimeoutError, DeadlineExceeded))
+                self._record_call(model, started, "timeout" if timed_out else "error")
+                if deadline and deadline.expired():
+                    if isinstance(e, DeadlineExceeded):
+                        raise
+                    raise DeadlineExceeded("Deadline exceeded during LLM call") from e
+                delay = self.retry_policy.backoff(attempt)
+                if not self.retry_policy.should_retry(e, attempt, delay, deadline):
+                    raise
+                logger.warning(f"LLM call failed ({type(e).__name__}: {e}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
         
-    async def _call_llm(self, prompt: str) -> str:
+    def _record_call(self, model: str, started: float, outcome: str, usage: Any = None):
+        LLM_CALL_SECONDS.observe(time.perf_counter() - started, agent=self.agent, model=model, outcome=outcome)
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", None)
+        if isinstance(prompt_tokens, int) and isinstance(completion_tokens, int):
+            cached_tokens = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None)
+            cached_tokens = cached_tokens if isinstance(cached_tokens, int) else None
+            record_llm_usage(self.agent, model, prompt_tokens, completion_tokens, cached_tokens)
+            # cached_tokens is the outcome of the server's prefix cache lookup
+            annotate(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, cached_tokens=cached_tokens)
+
+    async def _call_llm(self, prompt: str, deadline: Optional[Deadline] = None,
+                        route: Optional[ModelRoute] = None) -> str:
         """Make an async call to the Llama API."""
-        response = await self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that extracts structured information from resumes."},
-                {"role": "user", "content": prompt}
-            ],
+        response = await self._create(
+            prompt,
+            deadline,
+            route=route,
             temperature=0.1  # Low temperature for more consistent outputs
         )
         return response.choices[0].message.content
+
+    async def _call_llm_json(
+        self,
+        prompt: str,
+        agent: str,
+        deadline: Optional[Deadline] = None,
+        validate: Optional[Callable[[Dict[str, Any]], None]] = None,
+        input_tokens: Optional[int] = None,
+        language: Optional[str] = None,
+        on_field: Optional[Callable[[str, Any], Awaitable[None]]] = None,
+        required_fields: Optional[Set[str]] = None
+    ) -> Dict[str, Any]:
+        """Call the model routed for agent and parse its JSON answer.
+
+        If the answer is not valid JSON or validate raises ValueError, the prompt is sent
+        again to the escalation (large) model. Raises ValueError if that fails as well.
+        With on_field, every attempt is streamed through _stream_llm.
+        """
+        route = self.router.route(agent, input_tokens, language)
+        while True:
+            if on_field:
+                response = await self._stream_llm(prompt, required_fields, on_field, deadline, route=route)
+            else:
+                response = await self._call_llm(prompt, deadline=deadline, route=route)
+            try:
+                result = parse_json_response(response)
+                if validate:
+                    validate(result)
+                return result
+            except ValueError as e:
+                escalation = self.router.escalate(route)
+                if escalation is None:
+                    raise
+                logger.warning(f"{agent}: invalid output from {route.model} ({e}), escalating to {escalation.model}")
+                FALLBACKS.inc(kind="model_escalation")
+                route = escalation
+
+    async def _stream_llm(
+        self,
+        prompt: str,
+        required_fields: Optional[Set[str]] = None,
+        on_field: Optional[Callable[[str, Any], Awaitable[None]]] = None,
+        deadline: Optional[Deadline] = None,
+        route: Optional[ModelRoute] = None
+    ) -> str:
+        """Stream a completion, publishing top-level JSON fields as soon as they are complete.
+
+        Generation is aborted once the JSON object is closed or all required_fields have been
+        parsed, so trailing text is never decoded. Returns the JSON text of the object.
+        Only establishing the stream is retried; a stream that breaks midway raises.
+        """
+        async def consume(stream) -> str:
+            parser = IncrementalJSONParser()
+            parts = []
+
+            async def read():
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if not delta:
+                        continue
+                    parts.append(delta)
+                    for key, value in parser.feed(delta):
+                        if on_field:
+                            await on_field(key, value)
+                    if parser.done or (required_fields and required_fields <= parser.fields.keys()):
+                        break
+
+            try:
+                await asyncio.wait_for(read(), timeout=call_timeout(self.timeout, deadline))
+            except asyncio.TimeoutError as e:
+                if deadline and deadline.expired():
+                    raise DeadlineExceeded("Deadline exceeded while streaming LLM response") from e
+                raise
+            finally:
+                # Closing the connection makes the server stop decoding
+                await stream.close()
+
+            if parser.done:
+                return parser.text()
+            if required_fields and required_fields <= parser.fields.keys():
+                return json.dumps(parser.fields, ensure_ascii=False)
+            return "".join(parts)
+
+        return await self._create(prompt, deadline, consume=consume, route=route, temperature=0.1, stream=True)
     
-    async def extract_structured_info(self, text: str, language: str) -> Dict[str, Any]:
+    async def extract_fields(self, text: str, language: str, fields: Sequence[str] = EXTRACTION_FIELDS,
+                             deadline: Optional[Deadline] = None,
+                             input_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """Extract the given candidate fields from resume text, or from one of its sections.
+
+        Raises ValueError if no model returns a valid result.
+        """
+        prompt = PromptBuilder("KnowledgeExtractor").add_text("resume_text", text).build(
+            extraction_instructions(language, fields) + "\n\nResume text:\n{resume_text}"
+        )["prompt"]
+        required = [field for field in fields if field in EXTRACTION_CORE_FIELDS] or list(fields)
+        # Short resumes go to the small model if one is configured
+        return await self._call_llm_json(
+            prompt,
+            "KnowledgeExtractor",
+            deadline=deadline,
+            validate=lambda result: check_extraction_schema(result, required),
+            input_tokens=input_tokens if input_tokens is not None else estimate_tokens(text),
+            language=language
+        )
+
+    async def extract_structured_info(self, text: str, language: str, deadline: Optional[Deadline] = None,
+                                      input_tokens: Optional[int] = None,
+                                      fields: Sequence[str] = EXTRACTION_FIELDS) -> Dict[str, Any]:
         """Extract structured information from resume text using LLM."""
-        system_prompt = {
-            "en": """Extract the following information from the resume in JSON format:
-                    1. basic_info: Basic information including name, age, years of experience, current location
-                    2. contact: Contact information including email and phone number
-                    3. summary: A brief professional summary
-                    4. skills: List of technical and professional skills
-                    5. experience: List of work experiences with:
-                       - company: Company name
-                       - title: Job title
-                       - duration: Employment period
-                       - responsibilities: Key responsibilities and achievements
-                    6. education: List of educational background with:
-                       - degree: Degree name
-                       - institution: School/University name
-                       - year: Graduation year
-                       - major: Field of study
-                    7. projects: List of significant projects with:
-                       - name: Project name
-                       - description: Project description
-                       - technologies: Technologies used
-                       - role: Your role
-                    8. certifications: List of professional certifications
-                    9. languages: Language proficiencies
-                    
-                    Return the information in valid JSON format only.""",
-            "zh": """请从简历中提取以下信息，并以JSON格式返回：
-                    1. basic_info: 基本信息，包括姓名、年龄、工作年限、所在地
-                    2. contact: 联系方式，包括邮箱和电话号码
-                    3. summary: 个人简介
-                    4. skills: 技术和专业技能列表
-                    5. experience: 工作经历列表，包含：
-                       - company: 公司名称
-                       - title: 职位名称
-                       - duration: 工作时间段
-                       - responsibilities: 主要职责和成就
-                    6. education: 教育背景列表，包含：
-                       - degree: 学位
-                       - institution: 学校名称
-                       - year: 毕业年份
-                       - major: 专业
-                    7. projects: 项目经验列表，包含：
-                       - name: 项目名称
-                       - description: 项目描述
-                       - technologies: 使用的技术
-                       - role: 担任角色
-                    8. certifications: 专业证书列表
-                    9. languages: 语言能力
-                    
-                    仅返回有效的JSON格式数据。"""
-        }
-        
-        prompt = f"{system_prompt[language]}\n\nResume text:\n{text}"
-        
         try:
-            response = await self._call_llm(prompt)
-            # Extract JSON from response
-            json_str = response[response.find("{"):response.rfind("}")+1]
-            return json.loads(json_str)
+            return await self.extract_fields(text, language, fields, deadline=deadline, input_tokens=input_tokens)
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             print(f"Error processing with LLM: {e}")
+            FALLBACKS.inc(kind="extraction_default")
             return {
                 "basic_info": {},
                 "contact": {},
@@ -0,0 +1,191 @@
+import re
+from typing import Any, Dict, List, Optional
+
+from .data.universities import UNIVERSITY_INDEX
+from .metrics import EXTRACTION_CROSSCHECK
+from .text_profile import TextProfile
+
+EMAIL_RE = re.compile(r'[A-Za-z0-9._%+\-]+@[A-Za-z0-9\-]+(?:\.[A-Za-z0-9\-]+)*\.[A-Za-z]{2,}')
+# Chinese mobile numbers, optionally with +86 and separators, then international numbers
+CN_MOBILE_RE = re.compile(r'(?<!\d)(?:\+?86[\s\-]?)?(1[3-9]\d[\s\-]?\d{4}[\s\-]?\d{4})(?!\d)')
+PHONE_RE = re.compile(r'(?<![\w+])(\+?\d{1,3}[\s\-.]?)?(\(\d{2,4}\)|\d{2,4})[\s\-.]\d{3,4}[\s\-.]\d{3,4}(?!\d)')
+YEAR_RE = re.compile(r'(?<!\d)((?:19|20)\d{2})(?!\d)')
+
+# Labelled basic information: "姓名：张三", "Age: 28", "现居：上海"
+_LABEL_SEPARATOR = r'\s*[:：]\s*'
+BASIC_INFO_PATTERNS = {
+    "name": re.compile(r'^(?:姓\s*名|name)' + _LABEL_SEPARATOR + r'(\S.{0,30}?)\s*$', re.IGNORECASE | re.MULTILINE),
+    "age": re.compile(r'(?:年\s*龄|(?<![A-Za-z])age)' + _LABEL_SEPARATOR + r'(\d{2})\b|(?<!\d)(\d{2})\s*岁', re.IGNORECASE),
+    "years_of_experience": re.compile(
+        r'(\d{1,2})\s*\+?\s*年(?:以上)?(?:的)?(?:工作|开发|相关)?(?:经验|工作经历)'
+        r'|(\d{1,2})\+?\s*years?\s+(?:of\s+)?(?:professional\s+|work\s+|industry\s+)?experience',
+        re.IGNORECASE),
+    "location": re.compile(r'^(?:现居(?:住)?地?|所在地|居住地|location|based in)' + _LABEL_SEPARATOR + r'(\S.{0,30}?)\s*$',
+                           re.IGNORECASE | re.MULTILINE),
+}
+# Fields read only from the sections describing the candidate: elsewhere "Name:" labels a
+# project and "60岁" the users of a product
+HEADER_FIELDS = ("name", "age", "location")
+HEADER_SECTIONS = ("header", "basic_info", "contact")
+
+# Institutions that are not in the tier dictionaries: "XX大学", "XX学院", "University of X", "X College"
+_CJK_INSTITUTION_RE = re.compile(r'^[\u4e00-\u9fff]{2,16}(?:大学|学院)(?:[（(][\u4e00-\u9fff]{2,6}[)）])?$')
+_LATIN_INSTITUTION_RE = re.compile(
+    r"\b(?:University of (?:[A-Z][A-Za-z.&'\-]*)(?: (?:[A-Z][A-Za-z.&'\-]*|at|and))*"
+    r"|(?:[A-Z][A-Za-z.&'\-]* )+(?:University|College|Institute of Technology))\b"
+)
+_TOKEN_SPLIT_RE = re.compile(r'[\s,，;；|/、·]+')
+_INSTITUTION_PREFIX_RE = re.compile(r'^(?:毕业于|就读于|毕业院校[:：]?|学校[:：])')
+
+
+def extract_contact(text: str) -> Dict[str, str]:
+    """First email address and phone number in the text."""
+    contact = {}
+    email = EMAIL_RE.search(text)
+    if email:
+        contact["email"] = email.group(0)
+    mobile = CN_MOBILE_RE.search(text)
+    if mobile:
+        contact["phone"] = re.sub(r'[\s\-]', "", mobile.group(1))
+    else:
+        phone = PHONE_RE.search(text)
+        if phone:
+            contact["phone"] = phone.group(0).strip()
+    return contact
+
+
+def extract_basic_info(text: str, header: Optional[str] = None) -> Dict[str, str]:
+    """Basic information that the resume states with an explicit label or unit.
+
+    If header is given, the HEADER_FIELDS are only looked for in it.
+    """
+    info = {}
+    for field, pattern in BASIC_INFO_PATTERNS.items():
+        match = pattern.search(header if header is not None and field in HEADER_FIELDS else text)
+        if match:
+            info[field] = next(group for group in match.groups() if group)
+    return info
+
+
+def find_institutions(line: str) -> List[str]:
+    """Institution names in one line: known aliases first, then generic university names."""
+    mentions = [line[start:end] for start, end in UNIVERSITY_INDEX.find_mentions(line)]
+    if mentions:
+        return mentions
+    tokens = (_INSTITUTION_PREFIX_RE.sub("", token) for token in _TOKEN_SPLIT_RE.split(line))
+    found = [token for token in tokens if _CJK_INSTITUTION_RE.match(token)]
+    return found or _LATIN_INSTITUTION_RE.findall(line)
+
+
+def extract_education(text: str) -> List[Dict[str, str]]:
+    """One entry per line naming an institution, with the last year on that line."""
+    entries = []
+    for line in text.split("\n"):
+        institutions = find_institutions(line)
+        if not institutions:
+            continue
+        entry = {"institution": institutions[0]}
+        years = YEAR_RE.findall(line)
+        if years:
+            entry["year"] = years[-1]
+        entries.append(entry)
+    return entries
+
+
+def extract_local(profile: TextProfile) -> Dict[str, Any]:
+    """Fields that can be read off the resume text deterministically.
+
+    profile.text only lost whitespace, glyph artifacts, page markers and separators, so a
+    phone number or year on a line of its own is still found.
+    """
+    education_text = profile.section_text("education") or profile.text
+    header = "\n".join(profile.section_text(name) for name in HEADER_SECTIONS)
+    return {
+        "contact": extract_contact(profile.text),
+        "basic_info": extract_basic_info(profile.text, header),
+        "education": extract_education(education_text),
+    }
+
+
+def skippable_fields(local: Dict[str, Any]) -> List[str]:
+    """Candidate fields the LLM does not need to extract because the local result is complete."""
+    skipped = []
+    if {"email", "phone"} <= local["contact"].keys():
+        skipped.append("contact")
+    return skipped
+
+
+def _normalize(value: Any) -> str:
+    return re.sub(r'[\s\-()（）+]', "", str(value)).lower()
+
+
+def _phone_digits(value: Any) -> str:
+    digits = re.sub(r'\D', "", str(value))
+    return digits[2:] if digits.startswith("86") and len(digits) == 13 else digits
+
+
+def _check(field: str, llm_value: Any, local_value: Any, same: bool) -> Any:
+    """Keep the local value when the two disagree and record the outcome."""
+    if local_value in (None, ""):
+        return llm_value
+    if llm_value in (None, "", [], {}):
+        EXTRACTION_CROSSCHECK.inc(field=field, outcome="filled")
+    elif same:
+        EXTRACTION_CROSSCHECK.inc(field=field, outcome="agree")
+    else:
+        EXTRACTION_CROSSCHECK.inc(field=field, outcome="corrected")
+    return local_value
+
+
+def cross_check(llm_result: Dict[str, Any], local: Dict[str, Any], text: str) -> Dict[str, Any]:
+    """Merge the local extraction into the LLM result, preferring local values that disagree.
+
+    LLM institutions that do not occur in the resume text are replaced by the locally found
+    institution at the same position when both found the same number of entries.
+    """
+    result = dict(llm_result)
+
+    contact = dict(result.get("contact") or {}) if isinstance(result.get("contact"), dict) else {}
+    for key, value in local["contact"].items():
+        if key == "phone":
+            same = _phone_digits(contact.get(key, "")) == _phone_digits(value)
+        else:
+            same = _normalize(contact.get(key, "")) == _normalize(value)
+        contact[key] = _check(f"contact.{key}", contact.get(key), value, same)
+    result["contact"] = contact
+
+    basic_info = dict(result.get("basic_info") or {}) if isinstance(result.get("basic_info"), dict) else {}
+    for key, value in local["basic_info"].items():
+        basic_info[key] = _check(f"basic_info.{key}", basic_info.get(key), value,
+                                 _normalize(value) in _normalize(basic_info.get(key, "")))
+    result["basic_info"] = basic_info
+
+    education = result.get("education")
+    local_education = local["education"]
+    if not isinstance(education, list) or not education:
+        if local_education:
+            EXTRACTION_CROSSCHECK.inc(field="education.institution", outcome="filled")
+            result["education"] = [dict(entry) for entry in local_education]
+        return result
+
+    normalized_text = _normalize(text)
+    aligned = len(education) == len(local_education)
+    checked = []
+    for index, entry in enumerate(education):
+        if not isinstance(entry, dict):
+            checked.append(entry)
+            continue
+        entry = dict(entry)
+        local_entry: Optional[Dict[str, str]] = local_education[index] if aligned else None
+        institution = entry.get("institution")
+        if institution and _normalize(institution) in normalized_text:
+            EXTRACTION_CROSSCHECK.inc(field="education.institution", outcome="agree")
+        elif local_entry:
+            outcome = "corrected" if institution else "filled"
+            EXTRACTION_CROSSCHECK.inc(field="education.institution", outcome=outcome)
+            entry["institution"] = local_entry["institution"]
+        else:
+            EXTRACTION_CROSSCHECK.inc(field="education.institution", outcome="unverified")
+        checked.append(entry)
+    result["education"] = checked
+    return result
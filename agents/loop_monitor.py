@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from .metrics import EVENT_LOOP_LAG_SECONDS, EVENT_LOOP_STALLS
+
+logger = logging.getLogger(__name__)
+
+# How often the heartbeat task asks to be woken up
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.1"))
+# A callback that keeps the loop from running this long is reported as a stall
+LOOP_STALL_THRESHOLD = float(os.getenv("LOOP_STALL_THRESHOLD", "0.25"))
+LAG_WINDOW = 3000
+STALL_HISTORY = 50
+STACK_LIMIT = 30
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    return sorted_values[min(int(q * len(sorted_values)), len(sorted_values) - 1)]
+
+
+class LoopMonitor:
+    """Measures event loop scheduling delay and captures the stack of callbacks that stall it.
+
+    A heartbeat task sleeps for a fixed interval and records how late it wakes up. A
+    watchdog thread notices when the heartbeat is overdue by more than the stall threshold
+    and snapshots the loop thread's stack while the blocking callback is still running.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, stall_threshold: float = LOOP_STALL_THRESHOLD):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.lags: Deque[float] = deque(maxlen=LAG_WINDOW)
+        self.stalls: Deque[Dict[str, Any]] = deque(maxlen=STALL_HISTORY)
+        self.stall_count = 0
+        self.max_lag = 0.0
+        self._last_beat = time.perf_counter()
+        self._pending_stall: Optional[Dict[str, Any]] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start monitoring the running event loop (idempotent)."""
+        if self._task and not self._task.done():
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _heartbeat(self):
+        while True:
+            scheduled = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self._beat(time.perf_counter() - scheduled - self.interval)
+
+    def _beat(self, lag: float):
+        lag = max(lag, 0.0)
+        EVENT_LOOP_LAG_SECONDS.observe(lag)
+        with self._lock:
+            self._last_beat = time.perf_counter()
+            self.lags.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            stall, self._pending_stall = self._pending_stall, None
+            if stall is None and lag >= self.stall_threshold:
+                # Blocked between two watchdog checks; the stack is already gone
+                stall = {"detected_at": time.time(), "stack": None}
+            if stall is not None:
+                stall["lag_seconds"] = round(lag, 4)
+                self.stalls.append(stall)
+                self.stall_count += 1
+        if stall is not None:
+            EVENT_LOOP_STALLS.inc()
+            where = stall["stack"][-1].strip() if stall["stack"] else "unknown"
+            logger.warning(f"Event loop blocked for {lag:.3f}s at {where}")
+
+    def _watch(self):
+        check_every = min(self.interval, self.stall_threshold) / 2
+        while not self._stopped.wait(check_every):
+            with self._lock:
+                overdue = time.perf_counter() - self._last_beat - self.interval
+                if overdue < self.stall_threshold or self._pending_stall is not None:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None and os.path.basename(frame.f_code.co_filename) == "selectors.py":
+                    # Waiting for I/O: the loop is idle and about to run the late heartbeat
+                    continue
+                stack = traceback.format_stack(frame, limit=STACK_LIMIT) if frame else None
+                self._pending_stall = {"detected_at": time.time(), "stack": stack}
+
+    def stats(self) -> Dict[str, Any]:
+        """Lag percentiles over the recent window and the most recent stalls."""
+        with self._lock:
+            lags = sorted(self.lags)
+            stalls = list(self.stalls)
+        summary = {
+            "interval_seconds": self.interval,
+            "stall_threshold_seconds": self.stall_threshold,
+            "samples": len(lags),
+            "max_lag_seconds": round(self.max_lag, 4),
+            "stalls": self.stall_count,
+            "recent_stalls": stalls[::-1],
+        }
+        for name, q in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+            value = percentile(lags, q)
+            summary[f"lag_{name}_seconds"] = round(value, 4) if value is not None else None
+        return summary
+
+    def reset(self):
+        with self._lock:
+            self.lags.clear()
+            self.stalls.clear()
+            self.stall_count = 0
+            self.max_lag = 0.0
+
+
+_loop_monitor: Optional[LoopMonitor] = None
+
+
+def get_loop_monitor() -> LoopMonitor:
+    """Process-wide loop monitor."""
+    global _loop_monitor
+    if _loop_monitor is None:
+        _loop_monitor = LoopMonitor()
+    return _loop_monitor
@@ -0,0 +1,143 @@
+import asyncio
+import os
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+from .metrics import DOCUMENT_MEMORY_RESERVED, DOCUMENT_MEMORY_WAITS
+from .resilience import Deadline, DeadlineExceeded
+
+MB = 2**20
+# Largest single document and largest sum of documents accepted by one request
+MAX_DOCUMENT_BYTES = int(float(os.getenv("MAX_DOCUMENT_MB", "50")) * MB)
+MAX_REQUEST_BYTES = int(float(os.getenv("MAX_REQUEST_MB", "500")) * MB)
+# Memory all requests together may spend on documents being read and extracted; 0 disables
+DOCUMENT_MEMORY_BUDGET_BYTES = int(float(os.getenv("DOCUMENT_MEMORY_BUDGET_MB", "1024")) * MB)
+# Peak memory of extracting a document as a multiple of its size: the bytes themselves,
+# the parser's objects and the copies sent to PDF worker processes
+DOCUMENT_MEMORY_FACTOR = float(os.getenv("DOCUMENT_MEMORY_FACTOR", "4"))
+
+
+class DocumentTooLarge(ValueError):
+    """A document, or all documents of a request together, exceed the size limits."""
+
+    def __init__(self, message: str, size: int, limit: int):
+        super().__init__(message)
+        self.size = size
+        self.limit = limit
+
+
+def check_document_sizes(sizes: Dict[str, int], max_document: int = MAX_DOCUMENT_BYTES,
+                         max_request: int = MAX_REQUEST_BYTES):
+    """Raise DocumentTooLarge if a document (name -> bytes) or their sum exceeds the limits."""
+    for name, size in sizes.items():
+        if size > max_document:
+            raise DocumentTooLarge(f"{name} is {size / MB:.1f} MB, the limit is {max_document / MB:g} MB",
+                                   size, max_document)
+    total = sum(sizes.values())
+    if total > max_request:
+        raise DocumentTooLarge(f"Documents total {total / MB:.1f} MB, the limit is {max_request / MB:g} MB",
+                               total, max_request)
+
+
+def document_footprint(size: int) -> int:
+    """Memory to reserve for reading and extracting a document of size bytes."""
+    return int(size * DOCUMENT_MEMORY_FACTOR)
+
+
+class MemoryBudget:
+    """Admits documents into the pipeline while their estimated memory fits a shared budget.
+
+    Waiters are admitted in arrival order, so a large document is not starved by small
+    ones. A reservation larger than the whole budget is admitted once nothing else is
+    reserved.
+    """
+
+    def __init__(self, capacity: int = DOCUMENT_MEMORY_BUDGET_BYTES):
+        self.capacity = capacity
+        self.reserved = 0
+        self.admitted = 0
+        self.waited = 0
+        self._waiters: Deque[Tuple[int, asyncio.Future]] = deque()
+
+    def _fits(self, nbytes: int) -> bool:
+        return self.reserved + nbytes <= self.capacity
+
+    def _admit(self, nbytes: int):
+        self.reserved += nbytes
+        self.admitted += 1
+        DOCUMENT_MEMORY_RESERVED.set(self.reserved)
+
+    def _wake(self):
+        while self._waiters:
+            nbytes, future = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if not self._fits(nbytes):
+                return
+            self._waiters.popleft()
+            self._admit(nbytes)
+            future.set_result(None)
+
+    def release(self, nbytes: int):
+        self.reserved -= nbytes
+        DOCUMENT_MEMORY_RESERVED.set(self.reserved)
+        self._wake()
+
+    async def acquire(self, nbytes: int, deadline: Optional[Deadline] = None) -> int:
+        """Wait until nbytes fit the budget and reserve them; returns the bytes to release."""
+        if self.capacity <= 0:
+            return 0
+        nbytes = min(nbytes, self.capacity)
+        if not self._waiters and self._fits(nbytes):
+            self._admit(nbytes)
+            return nbytes
+
+        self.waited += 1
+        DOCUMENT_MEMORY_WAITS.inc()
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((nbytes, future))
+        try:
+            await asyncio.wait_for(future, deadline.remaining() if deadline else None)
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # Admitted just as the wait was given up
+                self.release(nbytes)
+            else:
+                future.cancel()
+                self._wake()
+            if isinstance(e, asyncio.TimeoutError):
+                raise DeadlineExceeded("Deadline exceeded waiting for document memory budget") from e
+            raise
+        return nbytes
+
+    @asynccontextmanager
+    async def reserve(self, nbytes: int, deadline: Optional[Deadline] = None) -> AsyncIterator[None]:
+        """Hold nbytes of the budget for the duration of the block."""
+        reserved = await self.acquire(nbytes, deadline)
+        try:
+            yield
+        finally:
+            if reserved:
+                self.release(reserved)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "capacity_bytes": self.capacity,
+            "reserved_bytes": self.reserved,
+            "waiting": sum(1 for _, future in self._waiters if not future.done()),
+            "admitted": self.admitted,
+            "waited": self.waited,
+        }
+
+
+_budget: Optional[MemoryBudget] = None
+
+
+def get_memory_budget() -> MemoryBudget:
+    """Return the process-wide document memory budget."""
+    global _budget
+    if _budget is None:
+        _budget = MemoryBudget()
+    return _budget
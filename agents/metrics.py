@@ -0,0 +1,278 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .tracing import trace_span
+
+# Seconds; covers fast local parsing up to slow LLM generations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """A named family of time series, one per combination of label values."""
+
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        return lines + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    @contextmanager
+    def track_inprogress(self, **labels) -> Iterator[None]:
+        """Count the enclosed block as in progress while it runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+
+class Histogram(Metric):
+    """Distribution of observations in cumulative buckets."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> (per-bucket counts, sum, count)
+        self._values: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._values.get(self._key(labels))
+        return series[2] if series else 0
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the wall-clock duration of the enclosed block, also when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, ([*series[0]], series[1], series[2])) for key, series in self._values.items())
+        lines = []
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics.values():
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "screening_stage_duration_seconds", "Duration of each screening pipeline stage.", ["stage"])
+STAGE_ERRORS = REGISTRY.counter(
+    "screening_stage_errors_total", "Pipeline stages that raised.", ["stage"])
+FALLBACKS = REGISTRY.counter(
+    "screening_fallbacks_total", "Degraded results: local PDF parsing, default evaluations and the like.", ["kind"])
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    "llm_call_duration_seconds", "Duration of each LLM request attempt.", ["agent", "model", "outcome"])
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total", "Tokens reported by the LLM server (estimated for aborted streams).", ["agent", "model", "type"])
+LLM_CACHE_HIT_RATIO = REGISTRY.gauge(
+    "llm_prefix_cache_hit_ratio", "Share of prompt tokens served from the server's prefix cache.", ["model"])
+LLM_IN_FLIGHT = REGISTRY.gauge(
+    "llm_requests_in_flight", "LLM requests currently waiting for a response.", ["agent"])
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served.")
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds", "Duration of HTTP requests by route.", ["method", "route", "status"])
+WEBSOCKET_CONNECTIONS = REGISTRY.gauge(
+    "websocket_connections", "Open log WebSocket connections.")
+TEXT_EXTRACTION_SECONDS = REGISTRY.histogram(
+    "text_extraction_duration_seconds", "Duration of each text extraction attempt by engine.",
+    ["engine", "format", "outcome"])
+TEXT_EXTRACTION_CACHE = REGISTRY.counter(
+    "text_extraction_cache_total", "Text extraction cache lookups by content hash.", ["outcome"])
+DOCUMENT_MEMORY_RESERVED = REGISTRY.gauge(
+    "document_memory_reserved_bytes", "Estimated memory reserved by documents being read and extracted.")
+DOCUMENT_MEMORY_WAITS = REGISTRY.counter(
+    "document_memory_waits_total", "Documents that waited for the document memory budget.")
+DOCUMENTS_REJECTED = REGISTRY.counter(
+    "documents_rejected_total", "Uploads and requests rejected for exceeding the size limits.", ["reason"])
+EXTRACTION_CROSSCHECK = REGISTRY.counter(
+    "extraction_crosscheck_total", "LLM extraction fields compared with the local extraction, by outcome.",
+    ["field", "outcome"])
+EVENT_LOOP_LAG_SECONDS = REGISTRY.histogram(
+    "event_loop_lag_seconds", "How late the event loop ran a timer callback.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+EVENT_LOOP_STALLS = REGISTRY.counter(
+    "event_loop_stalls_total", "Callbacks that blocked the event loop longer than the stall threshold.")
+
+_cache_totals: Dict[str, List[int]] = {}
+_cache_lock = threading.Lock()
+
+
+def record_llm_usage(agent: str, model: str, prompt_tokens: int, completion_tokens: int,
+                     cached_tokens: Optional[int] = None):
+    """Count the tokens of one LLM response and update the prefix cache hit ratio."""
+    LLM_TOKENS.inc(prompt_tokens, agent=agent, model=model, type="prompt")
+    LLM_TOKENS.inc(completion_tokens, agent=agent, model=model, type="completion")
+    if cached_tokens is None:
+        return
+    LLM_TOKENS.inc(cached_tokens, agent=agent, model=model, type="cached")
+    with _cache_lock:
+        totals = _cache_totals.setdefault(model, [0, 0])
+        totals[0] += cached_tokens
+        totals[1] += prompt_tokens
+        ratio = totals[0] / totals[1] if totals[1] else 0.0
+    LLM_CACHE_HIT_RATIO.set(ratio, model=model)
+
+
+def timed_stage(stage: str) -> Callable:
+    """Decorator for async functions: record their duration, and errors, as a pipeline stage.
+
+    The call is also recorded as a span of the current trace, if any.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with STAGE_SECONDS.time(stage=stage), trace_span(stage):
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    STAGE_ERRORS.inc(stage=stage)
+                    raise
+        return wrapper
+    return decorator
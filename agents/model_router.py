@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from .backend_pool import BackendPool, parse_base_urls
+
+logger = logging.getLogger(__name__)
+
+# Model used for judgement and as the escalation target for every other route
+LLM_LARGE_MODEL = os.getenv("LLM_LARGE_MODEL", "ibnzterrell/Meta-Llama-3.3-70B-Instruct-AWQ-INT4")
+# Optional smaller model for structured extraction; routing to it is disabled while unset
+LLM_SMALL_MODEL = os.getenv("LLM_SMALL_MODEL", "")
+# Replicas serving the small model; empty means the same servers as LLM_BASE_URLS
+LLM_SMALL_BASE_URLS = os.getenv("LLM_SMALL_BASE_URLS", "")
+# Resumes longer than this (estimated prompt tokens) go to the large model
+SMALL_MODEL_MAX_INPUT_TOKENS = int(os.getenv("LLM_SMALL_MODEL_MAX_INPUT_TOKENS", "3000"))
+
+# Rules are checked in order; the first one matching the agent, input size and language
+# selects the route. Override with a JSON list in LLM_ROUTING_RULES.
+DEFAULT_ROUTING_RULES: List[Dict[str, Any]] = [
+    {"agent": "KnowledgeExtractor", "max_input_tokens": SMALL_MODEL_MAX_INPUT_TOKENS, "route": "small"},
+]
+
+
+class ModelRoute:
+    """A model and the backends serving it. Without a pool, the client's own pool is used."""
+
+    def __init__(self, name: str, model: str, pool: Optional[BackendPool] = None):
+        self.name = name
+        self.model = model
+        self.pool = pool
+
+
+def rule_matches(rule: Dict[str, Any], agent: str, input_tokens: Optional[int], language: Optional[str]) -> bool:
+    if "agent" in rule and rule["agent"] != agent:
+        return False
+    if "languages" in rule and language not in rule["languages"]:
+        return False
+    if input_tokens is not None:
+        if input_tokens > rule.get("max_input_tokens", input_tokens):
+            return False
+        if input_tokens < rule.get("min_input_tokens", input_tokens):
+            return False
+    elif "max_input_tokens" in rule or "min_input_tokens" in rule:
+        return False
+    return True
+
+
+class ModelRouter:
+    """Chooses the model for an LLM call by agent, input size and language.
+
+    Output of any route other than the escalation route that fails JSON or schema
+    validation is retried once on the escalation (large) model.
+    """
+
+    def __init__(self, routes: Dict[str, ModelRoute], rules: Optional[List[Dict[str, Any]]] = None,
+                 default: str = "large", escalation: str = "large"):
+        if default not in routes or escalation not in routes:
+            raise ValueError("Default and escalation routes must be configured")
+        self.routes = routes
+        self.rules = DEFAULT_ROUTING_RULES if rules is None else rules
+        self.default = default
+        self.escalation = escalation
+        self.counters: Dict[str, int] = {"escalations": 0}
+
+    def route(self, agent: str, input_tokens: Optional[int] = None, language: Optional[str] = None) -> ModelRoute:
+        """Return the route of the first matching rule, or the default route."""
+        name = self.default
+        for rule in self.rules:
+            if rule.get("route") in self.routes and rule_matches(rule, agent, input_tokens, language):
+                name = rule["route"]
+                break
+        self.counters[name] = self.counters.get(name, 0) + 1
+        return self.routes[name]
+
+    def escalate(self, route: ModelRoute) -> Optional[ModelRoute]:
+        """Route to retry on after invalid output, or None if route is already the largest."""
+        if route.name == self.escalation:
+            return None
+        self.counters["escalations"] += 1
+        return self.routes[self.escalation]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "routes": {name: route.model for name, route in self.routes.items()},
+            "counters": dict(self.counters),
+        }
+
+
+def load_routing_rules() -> List[Dict[str, Any]]:
+    value = os.getenv("LLM_ROUTING_RULES")
+    if not value:
+        return DEFAULT_ROUTING_RULES
+    try:
+        rules = json.loads(value)
+    except json.JSONDecodeError as e:
+        logger.error(f"Ignoring invalid LLM_ROUTING_RULES: {e}")
+        return DEFAULT_ROUTING_RULES
+    return rules
+
+
+_model_router: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    """Return the router configured from the environment."""
+    global _model_router
+    if _model_router is None:
+        routes = {"large": ModelRoute("large", LLM_LARGE_MODEL)}
+        if LLM_SMALL_MODEL:
+            small_urls = parse_base_urls(LLM_SMALL_BASE_URLS)
+            routes["small"] = ModelRoute("small", LLM_SMALL_MODEL, BackendPool(small_urls) if small_urls else None)
+        _model_router = ModelRouter(routes, load_routing_rules())
+    return _model_router
@@ -1,27 +1,33 @@
 import aiohttp
 import logging
-from typing import Dict, Any
+import os
+from typing import Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
 
+PDF_PARSER_URL = os.getenv("PDF_PARSER_URL", "http://10.2.3.50:8000/parse_document/pdf")
+
 class PDFParserAgent:
     """Agent responsible for parsing PDF documents using external API."""
     
-    def __init__(self, api_url: str = "http://10.2.3.50:8000/parse_document/pdf"):
+    def __init__(self, api_url: str = PDF_PARSER_URL, timeout: float = 60.0):
         self.api_url = api_url
+        self.timeout = timeout
         
-    async def parse_pdf(self, pdf_content: bytes) -> Dict[str, Any]:
+    async def parse_pdf(self, pdf_content: bytes, timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Parse PDF content using the external API.
         
         Args:
             pdf_content: The binary content of the PDF file
+            timeout: Total time allowed for the request, defaults to the agent's timeout
             
         Returns:
             Dict containing the parsed PDF data
         """
         try:
-            async with aiohttp.ClientSession() as session:
+            client_timeout = aiohttp.ClientTimeout(total=timeout if timeout is not None else self.timeout)
+            async with aiohttp.ClientSession(timeout=client_timeout) as session:
                 form = aiohttp.FormData()
                 form.add_field('file',
                              pdf_content,
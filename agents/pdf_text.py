@@ -0,0 +1,100 @@
+import asyncio
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import PyPDF2
+
+from .profiling import current_profiler, run_profiled
+
+# PDFs with at least this many (capped) pages are extracted by worker processes, if
+# there is more than one
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16"))
+# Fewest pages per worker task. A document is split into at most one task per worker,
+# since each task parses the whole document once before extracting its range
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Only the first pages of a resume are read; appendices and publication lists beyond are
+# not worth the extraction time. 0 reads every page
+RESUME_MAX_PAGES = int(os.getenv("RESUME_MAX_PAGES", "20"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+    return _pool
+
+
+def shutdown_pdf_pool():
+    """Stop the worker processes, e.g. when the server shuts down."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def page_ranges(pages: int, per_task: int = PDF_PAGES_PER_TASK) -> List[Tuple[int, int]]:
+    """Split pages 0..pages into consecutive [start, end) ranges of per_task pages."""
+    return [(start, min(start + per_task, pages)) for start in range(0, pages, per_task)]
+
+
+def _page_texts(reader: PyPDF2.PdfReader, start: int, end: int) -> List[str]:
+    return [reader.pages[index].extract_text() or "" for index in range(start, end)]
+
+
+def extract_page_range(pdf_content: bytes, start: int, end: int) -> List[str]:
+    """Text of pages start..end-1; runs in a worker process."""
+    return _page_texts(PyPDF2.PdfReader(io.BytesIO(pdf_content)), start, end)
+
+
+def worker_ranges(pages: int) -> List[Tuple[int, int]]:
+    """Page ranges for the worker processes, one per worker; empty if not worth it."""
+    if PDF_WORKERS <= 1 or pages < PDF_PARALLEL_MIN_PAGES:
+        return []
+    ranges = page_ranges(pages, max(PDF_PAGES_PER_TASK, -(-pages // PDF_WORKERS)))
+    # A single range would only parse the document a second time
+    return ranges if len(ranges) > 1 else []
+
+
+def _extract_serial(pdf_content: bytes, max_pages: int) -> Tuple[List[Tuple[int, int]], List[str]]:
+    reader = PyPDF2.PdfReader(io.BytesIO(pdf_content))
+    pages = len(reader.pages)
+    if max_pages:
+        pages = min(pages, max_pages)
+    ranges = worker_ranges(pages)
+    if ranges:
+        return ranges, []
+    return ranges, _page_texts(reader, 0, pages)
+
+
+async def extract_pdf_text(pdf_content: bytes, max_pages: int = 0) -> str:
+    """Extract the text of a PDF with PyPDF2, one line break after every page.
+
+    Small documents are read in a thread. From PDF_PARALLEL_MIN_PAGES pages on, and with
+    more than one worker, each worker process extracts one range of at least
+    PDF_PAGES_PER_TASK pages and the ranges are reassembled in page order. max_pages caps
+    the number of pages read; 0 reads all of them.
+    """
+    # Counting the pages parses the document; small ones are extracted right away
+    ranges, texts = await asyncio.to_thread(_extract_serial, pdf_content, max_pages)
+    if ranges:
+        loop = asyncio.get_running_loop()
+        pool = get_pdf_pool()
+        profiler = current_profiler()
+        if profiler:
+            futures = [loop.run_in_executor(pool, run_profiled, extract_page_range, pdf_content, start, end)
+                       for start, end in ranges]
+        else:
+            futures = [loop.run_in_executor(pool, extract_page_range, pdf_content, start, end)
+                       for start, end in ranges]
+        texts = []
+        for result in await asyncio.gather(*futures):
+            if profiler:
+                result, stats = result
+                profiler.add_worker_stats(stats)
+            texts.extend(result)
+    return "".join(text + "\n" for text in texts)
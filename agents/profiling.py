@@ -0,0 +1,155 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Seconds between stack samples for the collapsed stack output
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+PSTATS_SUFFIX = ".prof"
+COLLAPSED_SUFFIX = ".collapsed.txt"
+
+_current_profiler: ContextVar[Optional["RequestProfiler"]] = ContextVar("current_profiler", default=None)
+# cProfile hooks the interpreter of a whole thread, so only one request can be profiled at a time
+_active_lock = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Another request is already being profiled."""
+
+
+class _StatsSnapshot:
+    """Raw cProfile statistics in the shape pstats.Stats.add accepts."""
+
+    def __init__(self, stats: Dict[Any, Any]):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    """The event loop waiting for I/O, or an executor thread waiting for work."""
+    filename = os.path.basename(frame.f_code.co_filename)
+    return filename == "selectors.py" or (filename == "thread.py" and frame.f_code.co_name == "_worker")
+
+
+class RequestProfiler:
+    """Profiles the event loop thread, and the default executor threads, while one request runs.
+
+    Produces a deterministic cProfile (pstats) of the loop thread and collapsed stacks
+    sampled every PROFILE_SAMPLE_INTERVAL seconds, the input format of flamegraph.pl and
+    speedscope. Both also cover other requests the loop serves in the meantime. Worker
+    processes report their own cProfile statistics through run_profiled.
+    """
+
+    def __init__(self, sample_interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.sample_interval = sample_interval
+        self.samples: Counter = Counter()
+        self.worker_stats = []
+        self.started: Optional[float] = None
+        self.elapsed: Optional[float] = None
+        self._profile = cProfile.Profile()
+        self._thread_id: Optional[int] = None
+        self._sampler: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._token = None
+
+    @property
+    def running(self) -> bool:
+        return self.started is not None and self.elapsed is None
+
+    def start(self):
+        if not _active_lock.acquire(blocking=False):
+            raise ProfilerBusy("Another request is being profiled")
+        self._thread_id = threading.get_ident()
+        self._token = _current_profiler.set(self)
+        self.started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+        self._sampler.start()
+        self._profile.enable()
+
+    def stop(self):
+        if not self.running:
+            return
+        self._profile.disable()
+        self.elapsed = time.perf_counter() - self.started
+        self._stopped.set()
+        self._sampler.join()
+        _current_profiler.reset(self._token)
+        _active_lock.release()
+
+    def _sample(self):
+        while not self._stopped.wait(self.sample_interval):
+            executor_threads = {t.ident for t in threading.enumerate() if t.name.startswith("asyncio_")}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self._thread_id:
+                    thread = "event_loop"
+                elif thread_id in executor_threads:
+                    thread = "executor"
+                else:
+                    continue
+                if _is_idle(frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(thread)
+                self.samples[";".join(reversed(stack))] += 1
+
+    def add_worker_stats(self, stats: Dict[Any, Any]):
+        """Merge the statistics returned by run_profiled in a worker process."""
+        self.worker_stats.append(stats)
+
+    def pstats(self) -> pstats.Stats:
+        stats = pstats.Stats(self._profile, stream=io.StringIO())
+        for worker in self.worker_stats:
+            stats.add(_StatsSnapshot(worker))
+        return stats
+
+    def collapsed(self) -> str:
+        """Sampled stacks as "root;...;leaf count" lines."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def save(self, directory: str, name: str) -> Dict[str, Any]:
+        """Write name.prof and name.collapsed.txt into directory."""
+        self.stop()
+        pstats_file = name + PSTATS_SUFFIX
+        collapsed_file = name + COLLAPSED_SUFFIX
+        self.pstats().dump_stats(os.path.join(directory, pstats_file))
+        with open(os.path.join(directory, collapsed_file), 'w', encoding='utf-8') as f:
+            f.write(self.collapsed())
+        return {
+            "pstats": pstats_file,
+            "collapsed": collapsed_file,
+            "seconds": round(self.elapsed, 3),
+            "samples": sum(self.samples.values()),
+            "worker_profiles": len(self.worker_stats),
+        }
+
+
+def current_profiler() -> Optional[RequestProfiler]:
+    """The profiler of the request being served, if it asked to be profiled."""
+    return _current_profiler.get()
+
+
+def run_profiled(func: Callable, *args, **kwargs) -> Tuple[Any, Dict[Any, Any]]:
+    """Run func under cProfile; submit this to a process pool instead of func when profiling.
+
+    Returns func's result and the raw statistics for RequestProfiler.add_worker_stats.
+    """
+    profile = cProfile.Profile()
+    result = profile.runcall(func, *args, **kwargs)
+    profile.create_stats()
+    return result, profile.stats
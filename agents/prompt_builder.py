@@ -0,0 +1,255 @@
+import inspect
+import json
+import logging
+import math
+import re
+from typing import Any, Dict, List, Optional, Set
+
+from .text_patterns import BOILERPLATE_RE, CID_RE, INLINE_WS_RE
+
+logger = logging.getLogger(__name__)
+
+# Prompt token budgets (instructions + variable content) per agent name
+PROMPT_BUDGETS = {
+    "KnowledgeExtractor": 6000,
+    "JDAnalyzer": 4000,
+    "DecisionMaker": 4000,
+}
+DEFAULT_PROMPT_BUDGET = 4000
+
+# Candidate fields ordered by how much they matter for evaluation
+CANDIDATE_KEY_PRIORITIES = {
+    "skills": 9,
+    "experience": 8,
+    "education": 7,
+    "projects": 6,
+    "summary": 5,
+    "certifications": 4,
+    "basic_info": 3,
+    "languages": 2,
+    "contact": 1,
+}
+
+_CJK_RE = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]')
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+# Short lines that open or close a page this often are treated as running headers/footers
+_REPEATED_LINE_MIN = 3
+_REPEATED_LINE_MAX_LEN = 60
+
+TRUNCATION_MARKER = "...[truncated]"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of LLM tokens in a piece of text.
+
+    CJK characters count as one token each, the rest at about four characters per token.
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def prune_empty(value: Any) -> Any:
+    """Recursively drop None, empty strings, empty lists and empty dicts."""
+    if isinstance(value, dict):
+        pruned = {k: prune_empty(v) for k, v in value.items()}
+        return {k: v for k, v in pruned.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        pruned = [prune_empty(v) for v in value]
+        return [v for v in pruned if v not in (None, "", [], {})]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def compact_json(data: Any) -> str:
+    """Serialize data as JSON without indentation and without empty fields."""
+    return json.dumps(prune_empty(data), ensure_ascii=False, separators=(",", ":"))
+
+
+def _running_lines(lines: List[str], breaks: List[bool], boilerplate: List[bool]) -> Set[str]:
+    """Short lines that open or close a page at least _REPEATED_LINE_MIN times.
+
+    A line opens or closes a page if the nearest content line before or after it is a
+    page break, or if there is none.
+    """
+    content = [i for i, line in enumerate(lines) if breaks[i] or (line and not boilerplate[i])]
+    counts: Dict[str, int] = {}
+    for position, index in enumerate(content):
+        line = lines[index]
+        if breaks[index] or len(line) > _REPEATED_LINE_MAX_LEN:
+            continue
+        opens = position == 0 or breaks[content[position - 1]]
+        closes = position == len(content) - 1 or breaks[content[position + 1]]
+        if opens or closes:
+            counts[line] = counts.get(line, 0) + 1
+    return {line for line, count in counts.items() if count >= _REPEATED_LINE_MIN}
+
+
+def clean_text(text: str) -> str:
+    """Strip boilerplate lines, PDF noise and duplicate whitespace from document text.
+
+    Page breaks are form feeds and page markers such as "Page 2 of 3". Short lines repeated
+    next to them are running headers or footers and are dropped; lines repeated within the
+    pages, e.g. a job title held at several employers, are kept.
+    """
+    text = CID_RE.sub("", text.replace("\r\n", "\n").replace("\r", "\n"))
+    raw_lines = text.replace("\f", "\n\f\n").split("\n")
+    lines = [INLINE_WS_RE.sub(" ", line).strip() for line in raw_lines]
+    matches = [BOILERPLATE_RE.match(line) for line in lines]
+    breaks = [raw == "\f" or bool(match and match.group("page")) for raw, match in zip(raw_lines, matches)]
+    running = _running_lines(lines, breaks, [match is not None for match in matches])
+
+    kept = [line for line, match in zip(lines, matches) if match is None and line not in running]
+    return _BLANK_LINES_RE.sub("\n\n", "\n".join(kept)).strip()
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Cut text at a line boundary so that it fits into max_tokens."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    budget = max_tokens - estimate_tokens(TRUNCATION_MARKER)
+    if budget <= 0:
+        return ""
+    kept, used = [], 0
+    for line in text.split("\n"):
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            # Fill the remainder with a prefix of the line that does not fit
+            remaining = budget - used
+            if remaining > 8:
+                kept.append(_truncate_chars(line, remaining))
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept) + "\n" + TRUNCATION_MARKER
+
+
+def _truncate_chars(text: str, max_tokens: int) -> str:
+    """Cut a single line to roughly max_tokens by binary search on its length."""
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low]
+
+
+def fit_json(data: Any, max_tokens: int, key_priorities: Optional[Dict[str, int]] = None) -> str:
+    """Render data as compact JSON that fits into max_tokens.
+
+    Top-level keys are added in priority order; a key that does not fit entirely keeps
+    as many list items (or as much of its string) as the remaining budget allows.
+    """
+    data = prune_empty(data)
+    rendered = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    if estimate_tokens(rendered) <= max_tokens or not isinstance(data, dict):
+        return rendered if estimate_tokens(rendered) <= max_tokens else ""
+
+    priorities = key_priorities or {}
+    keys = sorted(data.keys(), key=lambda k: -priorities.get(k, 0))
+    result: Dict[str, Any] = {}
+    for key in keys:
+        value = data[key]
+        candidate = dict(result, **{key: value})
+        if estimate_tokens(json.dumps(candidate, ensure_ascii=False, separators=(",", ":"))) <= max_tokens:
+            result = candidate
+            continue
+        if isinstance(value, list):
+            items: List[Any] = []
+            for item in value:
+                trial = dict(result, **{key: items + [item]})
+                if estimate_tokens(json.dumps(trial, ensure_ascii=False, separators=(",", ":"))) > max_tokens:
+                    break
+                items.append(item)
+            if items:
+                result[key] = items
+        elif isinstance(value, str):
+            overhead = estimate_tokens(json.dumps(dict(result, **{key: ""}), ensure_ascii=False, separators=(",", ":")))
+            if max_tokens - overhead > 8:
+                result[key] = _truncate_chars(value, max_tokens - overhead - 1)
+
+    # Keep the caller's key order in the output
+    return json.dumps({k: result[k] for k in data if k in result}, ensure_ascii=False, separators=(",", ":"))
+
+
+class PromptBuilder:
+    """Builds an LLM prompt from a template and prioritized sections within a token budget."""
+
+    def __init__(self, agent_name: str, budget: Optional[int] = None):
+        self.agent_name = agent_name
+        self.budget = budget or PROMPT_BUDGETS.get(agent_name, DEFAULT_PROMPT_BUDGET)
+        self.sections: List[Dict[str, Any]] = []
+
+    def add_text(self, name: str, text: str, priority: int = 0) -> "PromptBuilder":
+        """Add a free-text section, e.g. resume or JD text."""
+        self.sections.append({
+            "name": name,
+            "kind": "text",
+            "raw": text,
+            "content": clean_text(text),
+            "priority": priority,
+        })
+        return self
+
+    def add_json(self, name: str, data: Any, priority: int = 0,
+                 key_priorities: Optional[Dict[str, int]] = None) -> "PromptBuilder":
+        """Add a structured section that is serialized as compact JSON."""
+        self.sections.append({
+            "name": name,
+            "kind": "json",
+            "raw": json.dumps(data, ensure_ascii=False, indent=2),
+            "data": data,
+            "content": compact_json(data),
+            "priority": priority,
+            "key_priorities": key_priorities,
+        })
+        return self
+
+    def build(self, template: str) -> Dict[str, Any]:
+        """Render the template, truncating the lowest-priority sections to fit the budget.
+
+        The template uses str.format placeholders named after the sections, so literal
+        braces must be doubled. Returns the prompt together with its token accounting.
+        """
+        original_tokens = estimate_tokens(template.format(**{s["name"]: s["raw"] for s in self.sections}))
+        template = inspect.cleandoc(template)
+        header_tokens = estimate_tokens(template.format(**{s["name"]: "" for s in self.sections}))
+
+        available = max(self.budget - header_tokens, 0)
+        rendered: Dict[str, str] = {}
+        truncated: List[str] = []
+        for section in sorted(self.sections, key=lambda s: -s["priority"]):
+            content = section["content"]
+            tokens = estimate_tokens(content)
+            if tokens > available:
+                if section["kind"] == "json":
+                    content = fit_json(section["data"], available, section["key_priorities"])
+                else:
+                    content = truncate_text(content, available)
+                truncated.append(section["name"])
+                tokens = estimate_tokens(content)
+            rendered[section["name"]] = content
+            available = max(available - tokens, 0)
+
+        prompt = template.format(**rendered)
+        prompt_tokens = estimate_tokens(prompt)
+        stats = {
+            "prompt": prompt,
+            "agent": self.agent_name,
+            "budget": self.budget,
+            "original_tokens": original_tokens,
+            "prompt_tokens": prompt_tokens,
+            "tokens_saved": max(original_tokens - prompt_tokens, 0),
+            "truncated_sections": truncated,
+        }
+        logger.info(
+            f"[{self.agent_name}] prompt {prompt_tokens} tokens "
+            f"(raw {original_tokens}, saved {stats['tokens_saved']}, budget {self.budget})"
+            + (f", truncated: {', '.join(truncated)}" if truncated else "")
+        )
+        return stats
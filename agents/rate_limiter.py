@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import openai
+
+from .resilience import Deadline, DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+# Shared LLM server capacity; override through the environment per deployment
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "200000"))
+# Requests in flight per LLM replica; each replica of a pool has its own adaptive limit
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_LATENCY_TARGET = float(os.getenv("LLM_LATENCY_TARGET", "60"))
+
+# Status codes that signal the server is overloaded
+OVERLOAD_STATUS_CODES = {429, 503}
+# Longest Retry-After honoured; longer values are capped
+MAX_RETRY_AFTER = 60.0
+
+
+def is_overload(error: BaseException, deadline: Optional[Deadline] = None) -> bool:
+    """Whether a failed request signals an overloaded server: 429/503 or a call timeout."""
+    if isinstance(error, DeadlineExceeded):
+        return False
+    if isinstance(error, (asyncio.TimeoutError, openai.APITimeoutError)):
+        # A call cut short by the caller's deadline says nothing about the server
+        return not (deadline and deadline.expired())
+    return isinstance(error, openai.APIStatusError) and error.status_code in OVERLOAD_STATUS_CODES
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds to wait from the Retry-After header of an error response, if it has one."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    value = headers.get("retry-after") if headers is not None else None
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a fixed tokens-per-minute rate."""
+
+    def __init__(self, tokens_per_minute: int, capacity: Optional[int] = None):
+        self.rate = tokens_per_minute / 60.0
+        self.capacity = capacity or tokens_per_minute
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, amount: int, deadline: Optional[Deadline] = None):
+        """Wait until amount tokens are available and take them."""
+        amount = min(amount, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            wait = (amount - self.tokens) / self.rate
+            if deadline and deadline.remaining() < wait:
+                raise DeadlineExceeded("Deadline exceeded waiting for LLM token budget")
+            await asyncio.sleep(wait)
+
+    def adjust(self, delta: float):
+        """Return (positive) or charge (negative) tokens once the real usage is known."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + delta)
+
+
+class AdaptiveConcurrencyLimiter:
+    """Caps requests in flight; the cap follows AIMD on observed latency and overload errors."""
+
+    def __init__(self, max_limit: int, min_limit: int = 1, latency_target: float = LLM_LATENCY_TARGET,
+                 decrease_factor: float = 0.5):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = float(max_limit)
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        # No requests are started before this time (monotonic), set from Retry-After
+        self.paused_until = 0.0
+        self._waiters: List[asyncio.Future] = []
+
+    async def acquire(self, deadline: Optional[Deadline] = None):
+        """Wait out a Retry-After pause, then for a free request slot."""
+        while (pause := self.paused_until - time.monotonic()) > 0:
+            if deadline and deadline.remaining() < pause:
+                raise DeadlineExceeded("Deadline exceeded waiting out the server's Retry-After")
+            await asyncio.sleep(pause)
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await asyncio.wait_for(waiter, timeout=deadline.remaining() if deadline else None)
+            except BaseException as e:
+                if waiter.done() and not waiter.cancelled():
+                    # Woken for a free slot but giving up: pass the wakeup on
+                    self._waiters.remove(waiter)
+                    self._wake()
+                if isinstance(e, asyncio.TimeoutError):
+                    raise DeadlineExceeded("Deadline exceeded waiting for an LLM request slot")
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def on_success(self, latency: float):
+        """Additive increase while latency is healthy, multiplicative decrease when it is not."""
+        if latency > self.latency_target:
+            self._decrease(f"latency {latency:.1f}s above target")
+        else:
+            self.limit = min(self.max_limit, self.limit + 1.0 / max(self.limit, 1.0))
+            self._wake()
+
+    def on_overload(self, retry_after: Optional[float] = None):
+        """Multiplicative decrease; with retry_after, also hold new requests back that long."""
+        self._decrease("server overloaded")
+        if retry_after:
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+    def _decrease(self, reason: str):
+        previous = int(self.limit)
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        if int(self.limit) != previous:
+            logger.warning(f"LLM concurrency limit {previous} -> {int(self.limit)} ({reason})")
+
+    def _wake(self):
+        free = int(self.limit) - self.in_flight
+        for waiter in list(self._waiters):
+            if free <= 0:
+                break
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+
+class RequestPermit:
+    """Handle for one admitted LLM request, used to report its actual token usage."""
+
+    def __init__(self, estimated_tokens: int):
+        self.estimated_tokens = estimated_tokens
+        self.actual_tokens: Optional[int] = None
+
+    def record_usage(self, total_tokens: Optional[int]):
+        if total_tokens is not None:
+            self.actual_tokens = total_tokens
+
+
+class LLMRateLimiter:
+    """Process-wide admission control for LLM requests.
+
+    Limits estimated prompt + completion tokens per minute (token bucket), so that all
+    agents together stay within the capacity of the LLM server. Concurrency is limited per
+    replica by the backend pool; max_concurrency adds an optional process-wide cap
+    (adaptive, AIMD) on top, 0 disables it.
+    """
+
+    def __init__(self, tokens_per_minute: int = LLM_TOKENS_PER_MINUTE,
+                 max_concurrency: int = 0,
+                 latency_target: float = LLM_LATENCY_TARGET):
+        self.bucket = TokenBucket(tokens_per_minute)
+        self.concurrency: Optional[AdaptiveConcurrencyLimiter] = None
+        if max_concurrency > 0:
+            self.concurrency = AdaptiveConcurrencyLimiter(max_concurrency, latency_target=latency_target)
+        self.counters = {"requests": 0, "overloaded": 0, "estimated_tokens": 0, "actual_tokens": 0}
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int, deadline: Optional[Deadline] = None) -> AsyncIterator[RequestPermit]:
+        """Admit one request; feeds its latency and outcome back into the limits on exit."""
+        if self.concurrency:
+            await self.concurrency.acquire(deadline)
+        try:
+            await self.bucket.acquire(estimated_tokens, deadline)
+        except BaseException:
+            if self.concurrency:
+                self.concurrency.release()
+            raise
+
+        permit = RequestPermit(estimated_tokens)
+        self.counters["requests"] += 1
+        self.counters["estimated_tokens"] += estimated_tokens
+        started = time.monotonic()
+        try:
+            yield permit
+        except BaseException as e:
+            if is_overload(e, deadline):
+                self.counters["overloaded"] += 1
+                if self.concurrency:
+                    self.concurrency.on_overload(retry_after(e))
+            raise
+        else:
+            if self.concurrency:
+                self.concurrency.on_success(time.monotonic() - started)
+        finally:
+            if permit.actual_tokens is not None:
+                self.counters["actual_tokens"] += permit.actual_tokens
+                self.bucket.adjust(estimated_tokens - permit.actual_tokens)
+            if self.concurrency:
+                self.concurrency.release()
+
+    def stats(self) -> Dict[str, Any]:
+        self.bucket._refill()
+        stats = dict(self.counters, tokens_available=int(self.bucket.tokens))
+        if self.concurrency:
+            stats.update(concurrency_limit=int(self.concurrency.limit), in_flight=self.concurrency.in_flight)
+        return stats
+
+
+_rate_limiter: Optional[LLMRateLimiter] = None
+
+
+def get_rate_limiter() -> LLMRateLimiter:
+    """Return the limiter shared by every LLM client in this process."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = LLMRateLimiter()
+    return _rate_limiter
@@ -0,0 +1,76 @@
+import asyncio
+import random
+import time
+from typing import Optional
+
+import openai
+
+# HTTP status codes worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a screening runs past its end-to-end deadline."""
+
+
+class StreamInterrupted(RuntimeError):
+    """Raised when a streamed LLM response breaks after output has been consumed."""
+
+
+class Deadline:
+    """End-to-end time budget shared by every call made for one screening."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)."""
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, what: str = "operation"):
+        """Raise DeadlineExceeded if the deadline has passed."""
+        if self.expired():
+            raise DeadlineExceeded(f"Deadline of {self.seconds:.0f}s exceeded before {what}")
+
+    def timeout(self, per_call: float) -> float:
+        """Timeout for the next call: the per-call limit capped by the remaining time."""
+        return min(per_call, self.remaining())
+
+
+def call_timeout(per_call: float, deadline: Optional[Deadline] = None) -> float:
+    """Timeout for a single call, optionally capped by a deadline."""
+    return deadline.timeout(per_call) if deadline else per_call
+
+
+class RetryPolicy:
+    """Bounded retries with full-jitter exponential backoff."""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number attempt (0-based), drawn uniformly up to the exponential cap."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def is_retryable(self, error: Exception) -> bool:
+        """Whether an error is transient and the call may be repeated."""
+        if isinstance(error, DeadlineExceeded):
+            return False
+        if isinstance(error, (asyncio.TimeoutError, openai.APITimeoutError, openai.APIConnectionError)):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code in RETRYABLE_STATUS_CODES
+        return False
+
+    def should_retry(self, error: Exception, attempt: int, delay: float,
+                     deadline: Optional[Deadline] = None) -> bool:
+        """Whether to retry after a failed attempt, given the backoff delay and the deadline."""
+        if attempt + 1 >= self.max_attempts or not self.is_retryable(error):
+            return False
+        return deadline is None or deadline.remaining() > delay
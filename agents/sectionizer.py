@@ -0,0 +1,66 @@
+import os
+from typing import Dict, List, Optional, Sequence
+
+from .text_profile import TextProfile
+
+# Resumes shorter than this are extracted in one call; below it the repeated instructions
+# of several calls cost more than they save
+SECTIONED_EXTRACTION_MIN_TOKENS = int(os.getenv("SECTIONED_EXTRACTION_MIN_TOKENS", "1200"))
+SECTIONED_EXTRACTION = os.getenv("SECTIONED_EXTRACTION", "1") != "0"
+
+# Extraction group -> candidate fields it extracts and the resume sections it reads
+EXTRACTION_GROUPS: Dict[str, Dict[str, List[str]]] = {
+    "profile": {
+        "fields": ["basic_info", "contact", "summary", "certifications", "languages"],
+        "sections": ["header", "basic_info", "contact", "summary", "certifications", "languages"],
+    },
+    "experience": {"fields": ["experience"], "sections": ["experience"]},
+    "education": {"fields": ["education"], "sections": ["education"]},
+    "skills": {"fields": ["skills"], "sections": ["skills"]},
+    "projects": {"fields": ["projects"], "sections": ["projects"]},
+}
+# Without a section of their own, skills and projects are usually described in the work
+# experience; all other fields fall back to the profile group
+FIELD_FALLBACK_GROUP = {"skills": "experience", "projects": "experience"}
+DEFAULT_GROUP = "profile"
+# Both must have a heading for the sectioned extraction to be used
+REQUIRED_GROUPS = ("experience", "education")
+
+
+def sectionize(profile: TextProfile) -> Dict[str, str]:
+    """Resume text per extraction group; sections without a group go to the profile group."""
+    section_group = {section: group for group, spec in EXTRACTION_GROUPS.items() for section in spec["sections"]}
+    parts: Dict[str, List[str]] = {}
+    for section in profile.sections:
+        group = section_group.get(section["name"], DEFAULT_GROUP)
+        parts.setdefault(group, []).append(profile.text[section["start"]:section["end"]])
+    return {group: "\n\n".join(texts) for group, texts in parts.items()}
+
+
+def plan_extraction(profile: TextProfile, min_tokens: int = SECTIONED_EXTRACTION_MIN_TOKENS,
+                    exclude: Sequence[str] = ()) -> Optional[Dict[str, Dict[str, object]]]:
+    """Split a resume into per-group extraction calls, or None to extract it in one call.
+
+    Returns group -> {"fields": [...], "text": ...}. Every candidate field except those in
+    exclude is extracted by exactly one group; fields whose group has no section move to
+    a fallback group.
+    """
+    if not SECTIONED_EXTRACTION or profile.tokens < min_tokens:
+        return None
+    texts = sectionize(profile)
+    if not all(group in texts for group in REQUIRED_GROUPS):
+        return None
+
+    plan: Dict[str, Dict[str, object]] = {}
+    for group, spec in EXTRACTION_GROUPS.items():
+        for field in spec["fields"]:
+            if field in exclude:
+                continue
+            target = group if group in texts else FIELD_FALLBACK_GROUP.get(field, DEFAULT_GROUP)
+            if target not in texts:
+                target = DEFAULT_GROUP
+            # A resume that opens with a heading has no header; name and contact are then
+            # looked for in the whole text
+            entry = plan.setdefault(target, {"fields": [], "text": texts.get(target) or profile.text})
+            entry["fields"].append(field)
+    return plan
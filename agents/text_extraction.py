@@ -0,0 +1,436 @@
+import asyncio
+import codecs
+import hashlib
+import io
+import logging
+import os
+import re
+import time
+import zipfile
+from collections import OrderedDict, deque
+from html.parser import HTMLParser
+from typing import Any, BinaryIO, Deque, Dict, List, Optional, Tuple, Union
+
+from .docx_text import DOCUMENT_PART, extract_docx_text
+from .metrics import FALLBACKS, STAGE_ERRORS, STAGE_SECONDS, TEXT_EXTRACTION_CACHE, TEXT_EXTRACTION_SECONDS
+from .pdf_parser import PDFParserAgent
+from .pdf_text import extract_pdf_text
+from .resilience import Deadline, DeadlineExceeded, call_timeout
+from .text_patterns import CID_RE
+from .tracing import annotate, trace_span
+
+logger = logging.getLogger(__name__)
+
+# File extension -> format; the sniffed content decides, the extension only tells
+# Markdown from plain text
+EXTENSION_FORMATS = {
+    ".pdf": "pdf",
+    ".docx": "docx",
+    ".txt": "text",
+    ".md": "markdown",
+    ".markdown": "markdown",
+    ".html": "html",
+    ".htm": "html",
+}
+SUPPORTED_EXTENSIONS = tuple(EXTENSION_FORMATS)
+# Extracted texts kept by content hash, so a file screened again is not parsed again
+EXTRACTION_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", "256"))
+# Upper bound for a local engine; the remote parser has its own timeout
+LOCAL_EXTRACTION_TIMEOUT = float(os.getenv("LOCAL_EXTRACTION_TIMEOUT", "60"))
+# Consecutive failures before an engine is only tried after all others
+EJECT_AFTER_FAILURES = 3
+# An ejected engine is tried in its normal place again after this long
+EJECTION_COOLDOWN = 30.0
+LATENCY_EWMA_ALPHA = 0.2
+RECENT_FILES = 100
+SNIFF_BYTES = 2048
+
+_HTML_RE = re.compile(rb'\s*(?:<!--.*?-->\s*)*<(?:!doctype\s+html|html|head|body)\b', re.IGNORECASE | re.DOTALL)
+_CONTROL_RE = re.compile(r'[\x00-\x08\x0b\x0e-\x1f\ufffd]')
+_WHITESPACE_RE = re.compile(r'\s+')
+_TEXT_ENCODINGS = ("utf-8-sig", "gb18030")
+
+
+class UnsupportedFormat(ValueError):
+    """The content is not in a format any extraction engine can read."""
+
+
+def _decode(data: bytes, final: bool = True) -> Optional[str]:
+    """Decode text as UTF-8 or GB18030; None if it is neither."""
+    for encoding in _TEXT_ENCODINGS:
+        try:
+            return codecs.getincrementaldecoder(encoding)().decode(data, final=final)
+        except UnicodeDecodeError:
+            continue
+    return None
+
+
+def sniff_format(source: Union[bytes, BinaryIO], filename: str = "") -> Optional[str]:
+    """Format of a document from its magic bytes: pdf, docx, html, markdown, text or None.
+
+    source is the content or a seekable binary file, which is left at its start.
+    """
+    if isinstance(source, bytes):
+        head = source[:SNIFF_BYTES]
+    else:
+        head = source.read(SNIFF_BYTES)
+        source.seek(0)
+
+    if b"%PDF-" in head[:1024]:
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        try:
+            with zipfile.ZipFile(io.BytesIO(source) if isinstance(source, bytes) else source) as archive:
+                names = set(archive.namelist())
+        except zipfile.BadZipFile:
+            return None
+        finally:
+            if not isinstance(source, bytes):
+                source.seek(0)
+        return "docx" if DOCUMENT_PART in names else None
+    if b"\x00" in head or _decode(head, final=False) is None:
+        return None
+    if _HTML_RE.match(head.lstrip(codecs.BOM_UTF8)):
+        return "html"
+    extension_format = EXTENSION_FORMATS.get(os.path.splitext(filename)[1].lower())
+    return extension_format if extension_format in ("markdown", "html") else "text"
+
+
+def text_quality(text: str) -> Dict[str, Any]:
+    """Indicators of a usable extraction: amount of text and share of garbled characters."""
+    non_whitespace = len(_WHITESPACE_RE.sub("", text))
+    garbled = len(_CONTROL_RE.findall(text)) + len(CID_RE.findall(text))
+    return {
+        "chars": len(text),
+        "non_whitespace": non_whitespace,
+        "lines": text.count("\n") + 1 if text else 0,
+        "garbled_ratio": round(garbled / non_whitespace, 4) if non_whitespace else 0.0,
+    }
+
+
+class ExtractionEngine:
+    """One text extraction backend with its routing state and observed performance."""
+
+    name = ""
+    formats: Tuple[str, ...] = ()
+    priority = 0
+    local = True
+
+    def __init__(self, timeout: float = LOCAL_EXTRACTION_TIMEOUT):
+        self.timeout = timeout
+        self.healthy = True
+        self.ejected_at: Optional[float] = None
+        self.consecutive_failures = 0
+        self.files = 0
+        self.failures = 0
+        # Seconds per MB, so that small and large files weigh the same
+        self.seconds_per_mb_ewma: Optional[float] = None
+
+    async def extract(self, content: bytes, max_pages: int = 0) -> str:
+        raise NotImplementedError
+
+    def available(self) -> bool:
+        """Healthy, or ejected long enough ago to deserve a trial."""
+        if self.healthy:
+            return True
+        return self.ejected_at is not None and time.monotonic() - self.ejected_at >= EJECTION_COOLDOWN
+
+    def record_success(self, seconds: float, size: int):
+        self.files += 1
+        self.consecutive_failures = 0
+        seconds_per_mb = seconds / max(size / 2**20, 0.01)
+        if self.seconds_per_mb_ewma is None:
+            self.seconds_per_mb_ewma = seconds_per_mb
+        else:
+            self.seconds_per_mb_ewma += LATENCY_EWMA_ALPHA * (seconds_per_mb - self.seconds_per_mb_ewma)
+        if not self.healthy:
+            self.healthy = True
+            self.ejected_at = None
+            logger.info(f"Re-admitting extraction engine {self.name}: extraction succeeded")
+
+    def record_failure(self, error: BaseException):
+        self.files += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.healthy and self.consecutive_failures >= EJECT_AFTER_FAILURES:
+            self.healthy = False
+            self.ejected_at = time.monotonic()
+            logger.warning(f"Ejecting extraction engine {self.name}: {self.consecutive_failures} consecutive "
+                           f"failures, last: {type(error).__name__}")
+        elif not self.healthy:
+            # Failed trial: restart the cooldown
+            self.ejected_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "formats": list(self.formats),
+            "priority": self.priority,
+            "local": self.local,
+            "healthy": self.healthy,
+            "files": self.files,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "seconds_per_mb_ewma": round(self.seconds_per_mb_ewma, 4) if self.seconds_per_mb_ewma is not None else None,
+        }
+
+
+class RemotePDFEngine(ExtractionEngine):
+    """The external PDF parsing service."""
+
+    name = "external_parser"
+    formats = ("pdf",)
+    priority = 100
+    local = False
+
+    def __init__(self, parser: Optional[PDFParserAgent] = None):
+        self.parser = parser or PDFParserAgent()
+        super().__init__(self.parser.timeout)
+
+    async def extract(self, content: bytes, max_pages: int = 0) -> str:
+        # The enclosing timeout already bounds the request
+        result = await self.parser.parse_pdf(content, timeout=self.timeout)
+        if not isinstance(result, dict) or "text" not in result:
+            raise ValueError("External PDF parser didn't return text field")
+        return result["text"]
+
+
+class PyPDF2Engine(ExtractionEngine):
+    """PyPDF2, page-parallel for large documents."""
+
+    name = "pypdf2"
+    formats = ("pdf",)
+    priority = 50
+
+    async def extract(self, content: bytes, max_pages: int = 0) -> str:
+        return await extract_pdf_text(content, max_pages)
+
+
+class DocxStreamEngine(ExtractionEngine):
+    """Paragraphs and tables streamed out of word/document.xml."""
+
+    name = "docx_stream"
+    formats = ("docx",)
+    priority = 50
+
+    async def extract(self, content: bytes, max_pages: int = 0) -> str:
+        return await asyncio.to_thread(extract_docx_text, content)
+
+
+class PlainTextEngine(ExtractionEngine):
+    """Plain text and Markdown, kept as written."""
+
+    name = "plain_text"
+    formats = ("text", "markdown")
+    priority = 50
+
+    async def extract(self, content: bytes, max_pages: int = 0) -> str:
+        text = _decode(content)
+        if text is None:
+            raise UnicodeError("Text is neither UTF-8 nor GB18030")
+        return text
+
+
+class _HTMLTextParser(HTMLParser):
+    _SKIPPED = {"script", "style", "head", "template", "noscript"}
+    _BLOCKS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "table", "section",
+               "article", "header", "footer", "ul", "ol", "dt", "dd", "pre", "blockquote", "hr"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIPPED:
+            self.skipping += 1
+        elif tag in self._BLOCKS:
+            self.parts.append("\n")
+        elif tag in ("td", "th"):
+            self.parts.append(" | ")
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIPPED:
+            self.skipping = max(self.skipping - 1, 0)
+        elif tag in self._BLOCKS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.parts.append(data)
+
+
+class HTMLEngine(ExtractionEngine):
+    """Visible text of an HTML page, one block element per line."""
+
+    name = "html_text"
+    formats = ("html",)
+    priority = 50
+
+    async def extract(self, content: bytes, max_pages: int = 0) -> str:
+        text = _decode(content)
+        if text is None:
+            raise UnicodeError("HTML is neither UTF-8 nor GB18030")
+        parser = _HTMLTextParser()
+        parser.feed(text)
+        parser.close()
+        lines = (re.sub(r'^(?:\s*\|\s*)+', "", line).strip() for line in "".join(parser.parts).split("\n"))
+        return "\n".join(line for line in lines if line)
+
+
+class ExtractionResult:
+    """Text of one file with the engine that produced it and how it went."""
+
+    def __init__(self, text: str, format: str, backend: str, seconds: float,
+                 attempts: List[Dict[str, Any]], cached: bool = False):
+        self.text = text
+        self.format = format
+        self.backend = backend
+        self.seconds = seconds
+        self.attempts = attempts
+        self.cached = cached
+        self.quality = text_quality(text)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Everything but the text itself, e.g. for logs and the engine statistics."""
+        return {
+            "format": self.format,
+            "backend": self.backend,
+            "seconds": round(self.seconds, 4),
+            "cached": self.cached,
+            "attempts": self.attempts,
+            **self.quality,
+        }
+
+
+class ExtractionRegistry:
+    """Extracts the text of any supported document through the best available engine.
+
+    The format is sniffed from the content. Engines for that format are tried by priority,
+    then by observed seconds per MB; engines that failed repeatedly go last until their
+    cooldown has passed. An engine that fails or returns no text hands over to the next.
+    Results are cached by content hash.
+    """
+
+    def __init__(self, engines: Optional[List[ExtractionEngine]] = None, cache_size: int = EXTRACTION_CACHE_SIZE):
+        self.engines: List[ExtractionEngine] = []
+        for engine in engines or []:
+            self.register(engine)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, int, bool], ExtractionResult]" = OrderedDict()
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=RECENT_FILES)
+
+    def register(self, engine: ExtractionEngine):
+        self.engines.append(engine)
+
+    def engines_for(self, format: str, local_only: bool = False) -> List[ExtractionEngine]:
+        """Engines that read format, in the order they are tried."""
+        candidates = [e for e in self.engines if format in e.formats and (e.local or not local_only)]
+        return sorted(candidates, key=lambda e: (
+            not e.available(),
+            -e.priority,
+            e.seconds_per_mb_ewma if e.seconds_per_mb_ewma is not None else 0.0,
+        ))
+
+    async def extract(self, content: bytes, filename: str = "", deadline: Optional[Deadline] = None,
+                      max_pages: int = 0, local_only: bool = False, digest: Optional[str] = None) -> ExtractionResult:
+        """Extract the text of one file; max_pages caps the pages read from a PDF, 0 reads all.
+
+        digest is the SHA-256 of content if already known, e.g. from the file store.
+
+        Raises UnsupportedFormat for content no engine reads, and the last engine's error if
+        all of them fail.
+        """
+        format = sniff_format(content, filename)
+        if format is None:
+            raise UnsupportedFormat(f"Unsupported file type: {filename}")
+        engines = self.engines_for(format, local_only)
+        if not engines:
+            raise UnsupportedFormat(f"No extraction engine for {format}: {filename}")
+
+        key = (digest or hashlib.sha256(content).hexdigest(), max_pages if format == "pdf" else 0, local_only)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            TEXT_EXTRACTION_CACHE.inc(outcome="hit")
+            annotate(backend=cached.backend, cached=True)
+            return ExtractionResult(cached.text, format, cached.backend, 0.0, [], cached=True)
+        TEXT_EXTRACTION_CACHE.inc(outcome="miss")
+
+        stage = f"{format}_parsing"
+        with STAGE_SECONDS.time(stage=stage), trace_span(stage):
+            try:
+                result = await self._extract_with(engines, content, format, deadline, max_pages)
+            except Exception:
+                STAGE_ERRORS.inc(stage=stage)
+                raise
+            annotate(backend=result.backend, chars=result.quality["chars"])
+
+        self.recent.append({"file": filename, "bytes": len(content), **result.to_dict()})
+        if result.quality["non_whitespace"] and self.cache_size > 0:
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    async def _extract_with(self, engines: List[ExtractionEngine], content: bytes, format: str,
+                            deadline: Optional[Deadline], max_pages: int) -> ExtractionResult:
+        attempts: List[Dict[str, Any]] = []
+        started = time.perf_counter()
+        empty: Optional[Tuple[ExtractionEngine, str]] = None
+        error: Optional[Exception] = None
+        for engine in engines:
+            if deadline:
+                deadline.check(f"{format} parsing")
+            attempt_started = time.perf_counter()
+            try:
+                text = await asyncio.wait_for(engine.extract(content, max_pages),
+                                              timeout=call_timeout(engine.timeout, deadline))
+            except Exception as e:
+                seconds = time.perf_counter() - attempt_started
+                if deadline and deadline.expired():
+                    raise DeadlineExceeded(f"Deadline of {deadline.seconds:.0f}s exceeded during {format} parsing") from e
+                engine.record_failure(e)
+                TEXT_EXTRACTION_SECONDS.observe(seconds, engine=engine.name, format=format, outcome="error")
+                attempts.append({"backend": engine.name, "outcome": "error", "seconds": round(seconds, 4),
+                                 "error": f"{type(e).__name__}: {e}"})
+                logger.warning(f"Error using extraction engine {engine.name}: {e}. Trying the next engine")
+                error = e
+                continue
+
+            seconds = time.perf_counter() - attempt_started
+            engine.record_success(seconds, len(content))
+            outcome = "ok" if text.strip() else "empty"
+            TEXT_EXTRACTION_SECONDS.observe(seconds, engine=engine.name, format=format, outcome=outcome)
+            attempts.append({"backend": engine.name, "outcome": outcome, "seconds": round(seconds, 4)})
+            if outcome == "empty":
+                # A scanned page may still yield text with another engine
+                empty = empty or (engine, text)
+                continue
+            if any(e.priority > engine.priority for e in engines):
+                FALLBACKS.inc(kind=engine.name)
+            return ExtractionResult(text, format, engine.name, time.perf_counter() - started, attempts)
+
+        if empty is not None:
+            return ExtractionResult(empty[1], format, empty[0].name, time.perf_counter() - started, attempts)
+        raise error
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "engines": [engine.stats() for engine in self.engines],
+            "cache_entries": len(self._cache),
+            "recent": list(self.recent),
+        }
+
+
+_registry: Optional[ExtractionRegistry] = None
+
+
+def get_extraction_registry() -> ExtractionRegistry:
+    """Return the registry with the remote PDF parser and all local engines."""
+    global _registry
+    if _registry is None:
+        _registry = ExtractionRegistry([
+            RemotePDFEngine(), PyPDF2Engine(), DocxStreamEngine(), PlainTextEngine(), HTMLEngine(),
+        ])
+    return _registry
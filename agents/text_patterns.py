@@ -0,0 +1,22 @@
+import re
+
+# Runs of whitespace inside a line, collapsed to one space
+INLINE_WS_RE = re.compile(r'[ \t\u00a0\u3000\f\v]+')
+# Glyphs a PDF extractor could not map to characters
+CID_RE = re.compile(r'\(cid:\d+\)')
+
+# Lines that carry no information (page markers, separators, PDF noise), one alternative
+# per kind so that a line is tested with a single match. Page markers, which also tell
+# where pages break, are the "page" group; a bare number is not one, since a year or phone
+# number on its own line looks the same
+BOILERPLATE_RE = re.compile(
+    r'^\s*(?:'
+    r'(?P<page>(?:page\s*)?\d{1,3}\s*(?:/|of)\s*\d{1,3}'
+    r'|page\s*\d{1,3}'
+    r'|第\s*\d+\s*页\s*(?:[/，,]?\s*共\s*\d+\s*页)?'
+    r'|[-–—]\s*\d{1,3}\s*[-–—])'
+    r'|[-_=*~·•.]{3,}'
+    r'|references\s+(?:are\s+)?available\s+(?:up)?on\s+request\.?'
+    r')\s*$',
+    re.IGNORECASE
+)
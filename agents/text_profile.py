@@ -0,0 +1,160 @@
+import hashlib
+import math
+import re
+from typing import Any, Dict, List, Optional
+
+from .text_patterns import BOILERPLATE_RE, CID_RE, INLINE_WS_RE
+
+# Canonical section name -> headings as they appear in Chinese and English resumes and JDs
+SECTION_HEADINGS: Dict[str, List[str]] = {
+    "basic_info": ["基本信息", "个人信息", "个人资料", "personal information", "personal details"],
+    "contact": ["联系方式", "联系信息", "contact", "contact information", "contact details"],
+    "summary": ["个人简介", "个人总结", "自我评价", "自我介绍", "个人优势", "求职意向",
+                "summary", "profile", "professional summary", "about me", "objective", "career objective"],
+    "experience": ["工作经历", "工作经验", "实习经历", "职业经历", "experience", "work experience",
+                   "professional experience", "employment history", "work history", "internships"],
+    "education": ["教育背景", "教育经历", "学习经历", "education", "education background", "academic background"],
+    "skills": ["专业技能", "技能", "技能特长", "技术栈", "skills", "technical skills", "core competencies"],
+    "projects": ["项目经历", "项目经验", "项目", "projects", "project experience", "personal projects"],
+    "certifications": ["证书", "资格证书", "证书资质", "获奖情况", "certifications", "certificates", "awards"],
+    "languages": ["语言能力", "外语能力", "languages", "language skills"],
+    "publications": ["发表论文", "论文发表", "学术成果", "publications", "selected publications"],
+    "responsibilities": ["岗位职责", "工作职责", "职位描述", "工作内容", "responsibilities", "job description",
+                         "what you will do", "duties"],
+    "requirements": ["任职要求", "岗位要求", "任职资格", "职位要求", "requirements", "qualifications",
+                     "minimum qualifications", "what we are looking for"],
+    "preferred": ["加分项", "优先条件", "preferred qualifications", "nice to have", "bonus points"],
+}
+_HEADING_INDEX = {heading: name for name, headings in SECTION_HEADINGS.items() for heading in headings}
+_MAX_HEADING_LENGTH = 40
+
+# Enumerators and bullets in front of headings: "一、", "(2)", "3.", "■", "【"
+_HEADING_PREFIX_RE = re.compile(
+    r'^(?:[一二三四五六七八九十]+[、.．]'
+    r'|[(（]?\d+[).、）]'
+    r'|[■□●◆▶•【\[#*>\-])\s*'
+)
+_HEADING_STRIP = " :：】]"
+# Runs of Han characters, of the other characters in prompt_builder's _CJK_RE, and Latin
+# words, so that one scan counts all three
+_COUNT_RE = re.compile(
+    r'(?P<han>[\u4e00-\u9fff]+)'
+    r'|(?P<cjk>[\u3040-\u30ff\u3400-\u4dbf\uac00-\ud7af\uff00-\uffef]+)'
+    r'|(?P<latin>[a-zA-Z]+)'
+)
+
+
+def match_heading(line: str) -> Optional[str]:
+    """Canonical section name if the line is a section heading, e.g. "一、工作经历：" or "Skills: Python"."""
+    if len(line) > _MAX_HEADING_LENGTH:
+        head = re.split(r'[:：]', line, maxsplit=1)[0]
+        if head == line or len(head) > _MAX_HEADING_LENGTH:
+            return None
+        line = head
+    candidate = _HEADING_PREFIX_RE.sub("", line).strip(_HEADING_STRIP).lower()
+    name = _HEADING_INDEX.get(candidate)
+    if name is None and (":" in candidate or "：" in candidate):
+        # Heading followed by content on the same line
+        name = _HEADING_INDEX.get(re.split(r'[:：]', candidate, maxsplit=1)[0].strip())
+    return name
+
+
+class TextProfile:
+    """Normalized document text with the statistics every agent needs, computed once.
+
+    sections lists the headed parts of the text as dicts with the canonical name, the
+    heading line and start/end offsets into text. Text before the first heading is a
+    section named "header" without heading.
+    """
+
+    def __init__(self, text: str, sha256: str, lines: int, cjk_chars: int, han_chars: int,
+                 latin_words: int, sections: List[Dict[str, Any]]):
+        self.text = text
+        self.sha256 = sha256
+        self.chars = len(text)
+        self.lines = lines
+        self.cjk_chars = cjk_chars
+        self.han_chars = han_chars
+        self.latin_words = latin_words
+        self.sections = sections
+        # Same estimate as prompt_builder.estimate_tokens
+        self.tokens = cjk_chars + math.ceil((self.chars - cjk_chars) / 4)
+        self.language = "zh" if han_chars > latin_words else "en"
+
+    def section_text(self, name: str) -> str:
+        """Text of all sections with this canonical name, headings included."""
+        return "\n".join(self.text[s["start"]:s["end"]] for s in self.sections if s["name"] == name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The statistics without the text itself, e.g. for logs and results."""
+        return {
+            "sha256": self.sha256,
+            "chars": self.chars,
+            "lines": self.lines,
+            "tokens": self.tokens,
+            "language": self.language,
+            "cjk_chars": self.cjk_chars,
+            "latin_words": self.latin_words,
+            "sections": [dict(s) for s in self.sections],
+        }
+
+
+def profile_text(text: str) -> TextProfile:
+    """Normalize extracted document text in one pass over its lines, then count its characters.
+
+    Normalization drops (cid:N) glyph artifacts, page markers and separator lines, collapses
+    runs of whitespace, strips lines and keeps at most one blank line in a row. Form
+    feeds and other PDF page breaks become line breaks. Lines holding only a number, such
+    as a year or a phone number, are kept.
+    """
+    digest = hashlib.sha256()
+    kept: List[str] = []
+    sections: List[Dict[str, Any]] = []
+    offset = 0
+    content_end = 0
+    blank_pending = False
+    for raw_line in text.splitlines():
+        line = INLINE_WS_RE.sub(" ", CID_RE.sub("", raw_line)).strip()
+        if not line:
+            blank_pending = True
+            continue
+        if BOILERPLATE_RE.match(line):
+            continue
+        if kept:
+            separator = "\n\n" if blank_pending else "\n"
+            if blank_pending:
+                kept.append("")
+            digest.update(separator.encode("utf-8"))
+            offset += len(separator)
+        blank_pending = False
+
+        name = match_heading(line)
+        if name is not None:
+            if sections:
+                sections[-1]["end"] = content_end
+            elif offset:
+                sections.append({"name": "header", "heading": None, "start": 0, "end": content_end})
+            sections.append({"name": name, "heading": line, "start": offset, "end": None})
+
+        kept.append(line)
+        digest.update(line.encode("utf-8"))
+        offset += len(line)
+        content_end = offset
+
+    if sections:
+        sections[-1]["end"] = offset
+    elif offset:
+        sections.append({"name": "header", "heading": None, "start": 0, "end": offset})
+    normalized = "\n".join(kept)
+    # Counted in a second scan: one finditer over the whole text is faster than one per line,
+    # and the separators hold no CJK or Latin characters
+    han = other_cjk = latin = 0
+    for match in _COUNT_RE.finditer(normalized):
+        if match.lastgroup == "latin":
+            latin += 1
+        elif match.lastgroup == "han":
+            han += match.end() - match.start()
+        else:
+            other_cjk += match.end() - match.start()
+    return TextProfile(normalized, digest.hexdigest(), sum(1 for line in kept if line), han + other_cjk, han, latin,
+                       sections)
@@ -0,0 +1,152 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class Span:
+    """A timed unit of work with wall and CPU time, attributes and child spans.
+
+    CPU time is the thread CPU time spent while the span was open; in the event loop
+    this includes other tasks that ran in the meantime.
+    """
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, **attributes):
+        self.name = name
+        self.parent = parent
+        self.attributes: Dict[str, Any] = dict(attributes)
+        self.children: List["Span"] = []
+        self.start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+        self.end: Optional[float] = None
+        self.cpu_end: Optional[float] = None
+        if parent is not None:
+            parent.children.append(self)
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def finish(self):
+        if self.end is None:
+            self.end = time.perf_counter()
+            self.cpu_end = time.thread_time()
+        for child in self.children:
+            child.finish()
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        """Span tree with times in milliseconds relative to origin."""
+        end = self.end if self.end is not None else time.perf_counter()
+        cpu_end = self.cpu_end if self.cpu_end is not None else time.thread_time()
+        span = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "wall_ms": round((end - self.start) * 1000, 3),
+            "cpu_ms": round((cpu_end - self.cpu_start) * 1000, 3),
+        }
+        if self.attributes:
+            span["attributes"] = self.attributes
+        if self.children:
+            span["children"] = [child.to_dict(origin) for child in self.children]
+        return span
+
+
+class _NullSpan:
+    """Stands in for a span when no trace is being recorded."""
+
+    def set(self, **attributes):
+        pass
+
+    def finish(self):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Trace:
+    """Span tree of one unit of work, e.g. screening one resume."""
+
+    def __init__(self, name: str, **attributes):
+        self.started_at = time.time()
+        self.root = Span(name, **attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.root.to_dict(self.root.start), started_at=self.started_at)
+
+
+@contextmanager
+def start_trace(name: str, enabled: bool = True, **attributes) -> Iterator[Optional[Trace]]:
+    """Record spans opened in this context into a new trace (yields None when disabled)."""
+    if not enabled:
+        yield None
+        return
+    trace = Trace(name, **attributes)
+    token = _current_span.set(trace.root)
+    try:
+        yield trace
+    finally:
+        _current_span.reset(token)
+        trace.root.finish()
+
+
+@contextmanager
+def trace_span(name: str, **attributes) -> Iterator[Any]:
+    """Open a child span of the current span; a no-op outside of a trace."""
+    parent = _current_span.get()
+    if parent is None:
+        yield NULL_SPAN
+        return
+    span = Span(name, parent, **attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.set(error=type(e).__name__)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.finish()
+
+
+def start_span(name: str, **attributes) -> Any:
+    """Start a child span of the current span that the caller finishes explicitly."""
+    parent = _current_span.get()
+    return Span(name, parent, **attributes) if parent is not None else NULL_SPAN
+
+
+def annotate(**attributes):
+    """Add attributes to the current span, if any."""
+    span = _current_span.get()
+    if span is not None:
+        span.set(**attributes)
+
+
+def to_chrome_trace(traces: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Convert span trees from Trace.to_dict into the Chrome trace event format.
+
+    Each trace gets its own thread row; the result loads in chrome://tracing, Perfetto
+    and speedscope for flame graphs.
+    """
+    events: List[Dict[str, Any]] = []
+
+    def add(span: Dict[str, Any], base_us: float, tid: int):
+        args = dict(span.get("attributes", {}), cpu_ms=span["cpu_ms"])
+        events.append({
+            "name": span["name"],
+            "cat": "screening",
+            "ph": "X",
+            "ts": round(base_us + span["start_ms"] * 1000, 1),
+            "dur": round(span["wall_ms"] * 1000, 1),
+            "pid": 1,
+            "tid": tid,
+            "args": args,
+        })
+        for child in span.get("children", []):
+            add(child, base_us, tid)
+
+    for tid, trace in enumerate(traces, start=1):
+        events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": trace["name"]}})
+        add(trace, trace.get("started_at", 0) * 1e6, tid)
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
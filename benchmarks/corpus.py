@@ -0,0 +1,249 @@
+"""
+Synthetic, reproducible corpora of JDs, resumes and screening results for benchmarks.
+
+The same seed and sizes always produce the same files, so reports from different
+commits are comparable. A manifest in the corpus directory records the parameters and
+lets an existing corpus be reused instead of regenerated.
+"""
+import io
+import json
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from docx import Document
+
+try:
+    import pymupdf
+except ImportError:  # PyMuPDF < 1.24 only provides the fitz module
+    import fitz as pymupdf
+
+MANIFEST = "corpus.json"
+LINES_PER_PAGE = 50
+
+SKILLS = ["Python", "Java", "Go", "Docker", "Kubernetes", "AWS", "React", "PostgreSQL",
+          "Kafka", "Redis", "Spark", "TensorFlow", "Terraform", "gRPC", "Elasticsearch"]
+SKILLS_ZH = ["微服务架构", "分布式系统", "机器学习", "数据分析", "高并发", "云原生"]
+COMPANIES = ["Tech Corp", "StartUp Inc", "Cloud Co", "DataWorks", "FinServ Ltd", "Retail Group"]
+COMPANIES_ZH = ["腾讯科技", "阿里巴巴", "字节跳动", "华为技术", "美团", "京东"]
+UNIVERSITIES = ["Tsinghua University", "Peking University", "Zhejiang University",
+                "State University", "University of Technology", "MIT"]
+UNIVERSITIES_ZH = ["清华大学", "北京大学", "浙江大学", "复旦大学", "上海交通大学", "武汉大学"]
+FIRST_NAMES = ["Wei", "Jing", "Lei", "Min", "Alex", "Sam", "Chris", "Taylor"]
+LAST_NAMES = ["Zhang", "Wang", "Li", "Liu", "Chen", "Smith", "Brown", "Lee"]
+NAMES_ZH = ["张伟", "王芳", "李娜", "刘洋", "陈静", "杨帆", "赵磊", "黄丽"]
+RESPONSIBILITIES = ["Built and operated microservices handling 10k requests per second",
+                    "Led a team of five engineers", "Optimized slow database queries",
+                    "Designed streaming data pipelines", "Mentored junior developers",
+                    "Migrated services to Kubernetes", "Introduced automated testing and CI"]
+RESPONSIBILITIES_ZH = ["负责核心交易系统的设计与开发", "带领五人团队完成系统重构", "优化数据库查询性能",
+                       "设计实时数据处理管道", "指导初级工程师", "推动服务迁移到容器平台"]
+
+
+def resume_lines(rng: random.Random, index: int, language: str = "en", jobs: int = 3) -> List[str]:
+    """Text lines of one synthetic resume in English or Chinese."""
+    if language == "zh":
+        lines = [rng.choice(NAMES_ZH), f"电话：138{rng.randint(10000000, 99999999)}",
+                 f"邮箱：candidate{index}@example.com", "", "专业技能",
+                 "、".join(rng.sample(SKILLS, 4) + rng.sample(SKILLS_ZH, 2)), "", "工作经历"]
+        for _ in range(jobs):
+            start = rng.randint(2008, 2020)
+            lines += [f"{start}-{start + rng.randint(1, 4)}  {rng.choice(COMPANIES_ZH)}  高级工程师"]
+            lines += [f"- {item}" for item in rng.sample(RESPONSIBILITIES_ZH, 2)]
+        lines += ["", "教育背景", f"{rng.choice(UNIVERSITIES_ZH)}  计算机科学与技术  硕士  {rng.randint(2005, 2018)}"]
+        return lines
+
+    lines = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+             f"Phone: +86 138{rng.randint(10000000, 99999999)}", f"Email: candidate{index}@example.com", "",
+             "SKILLS", ", ".join(rng.sample(SKILLS, rng.randint(4, 8))), "", "EXPERIENCE"]
+    for _ in range(jobs):
+        start = rng.randint(2008, 2020)
+        lines += [f"{rng.choice(['Software Engineer', 'Senior Engineer', 'Tech Lead'])}, {rng.choice(COMPANIES)}, "
+                  f"{start}-{start + rng.randint(1, 4)}"]
+        lines += [f"- {item}" for item in rng.sample(RESPONSIBILITIES, 2)]
+    lines += ["", "EDUCATION", f"{rng.choice(['Bachelor', 'Master'])} of Computer Science, "
+              f"{rng.choice(UNIVERSITIES)}, {rng.randint(2005, 2018)}"]
+    return lines
+
+
+def jd_lines(rng: random.Random, index: int) -> List[str]:
+    return [f"Senior Backend Engineer #{index}", "",
+            f"Required Skills: {', '.join(rng.sample(SKILLS, 5))}",
+            f"Preferred Skills: {', '.join(rng.sample(SKILLS, 2))}", "", "Responsibilities:",
+            "- Design scalable services", "- Mentor junior developers", "",
+            f"Requirements: {rng.randint(3, 8)}+ years of experience, Bachelor's degree in Computer Science"]
+
+
+def pdf_bytes(lines: List[str], cjk: bool = False) -> bytes:
+    """Render lines into a PDF, LINES_PER_PAGE lines per page."""
+    doc = pymupdf.open()
+    for start in range(0, max(len(lines), 1), LINES_PER_PAGE):
+        page = doc.new_page()
+        page.insert_text((50, 60), "\n".join(lines[start:start + LINES_PER_PAGE]),
+                         fontname="china-s" if cjk else "helv", fontsize=10)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def table_pdf_bytes(rows: List[List[str]], rows_per_page: int = 35) -> bytes:
+    """Render rows as a ruled table, rows_per_page rows per page."""
+    doc = pymupdf.open()
+    columns = len(rows[0]) if rows else 1
+    for start in range(0, max(len(rows), 1), rows_per_page):
+        page = doc.new_page()
+        width = (page.rect.width - 80) / columns
+        # One shape per page: drawing cell by cell on the page rewrites its content stream each time
+        shape = page.new_shape()
+        for r, row in enumerate(rows[start:start + rows_per_page]):
+            top = 40 + r * 20
+            for c, value in enumerate(row):
+                cell = pymupdf.Rect(40 + c * width, top, 40 + (c + 1) * width, top + 20)
+                shape.draw_rect(cell)
+                shape.insert_text((cell.x0 + 3, cell.y1 - 6), value[:24], fontname="helv", fontsize=8)
+        shape.finish(width=0.5)
+        shape.commit()
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def docx_bytes(lines: List[str], table_rows: List[List[str]] = None) -> bytes:
+    """Render lines as paragraphs of a DOCX file, optionally followed by a table."""
+    document = Document()
+    for line in lines:
+        document.add_paragraph(line)
+    if table_rows:
+        table = document.add_table(rows=len(table_rows), cols=len(table_rows[0]))
+        for row, values in zip(table.rows, table_rows):
+            for cell, value in zip(row.cells, values):
+                cell.text = value
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def result_record(rng: random.Random, index: int, jd_file: str, timestamp: datetime,
+                  candidates: int = 5) -> Dict[str, Any]:
+    """A screening result in the format written by ScreeningResult.save_result."""
+    evaluated = []
+    for i in range(candidates):
+        score = round(rng.uniform(0.2, 0.95), 2)
+        evaluated.append({
+            "file_name": f"resume_{index}_{i}.pdf",
+            "candidate_info": {"basic_info": {"name": f"Candidate {index}-{i}"},
+                               "skills": rng.sample(SKILLS, 4), "experience": [], "education": []},
+            "evaluation": {"scores": {"skills_match": score, "experience_match": score, "education_match": score},
+                           "overall_score": score, "recommendation": "Moderate Match - Consider for Interview"},
+        })
+    evaluated.sort(key=lambda c: c["evaluation"]["overall_score"], reverse=True)
+    return {
+        "timestamp": timestamp.isoformat(),
+        "jd_file": jd_file,
+        "result": {"candidates": evaluated, "job_requirements": {"job_title": "Senior Backend Engineer"}},
+    }
+
+
+def generate_corpus(root: str, num_jds: int = 5, num_resumes: int = 100, num_results: int = 100,
+                    docx_ratio: float = 0.3, seed: int = 42) -> Dict[str, Any]:
+    """Write JDs to root/job, resumes to root/resume and results to root/results.
+
+    Returns the manifest. An existing corpus generated with the same parameters is reused.
+    """
+    params = {"num_jds": num_jds, "num_resumes": num_resumes, "num_results": num_results,
+              "docx_ratio": docx_ratio, "seed": seed}
+    manifest_path = os.path.join(root, MANIFEST)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("params") == params:
+            return manifest
+
+    rng = random.Random(seed)
+    for name in ("job", "resume", "results", "logs"):
+        os.makedirs(os.path.join(root, name), exist_ok=True)
+
+    jd_files = []
+    for i in range(num_jds):
+        name = f"jd_{i:04d}.pdf"
+        with open(os.path.join(root, "job", name), 'wb') as f:
+            f.write(pdf_bytes(jd_lines(rng, i)))
+        jd_files.append(name)
+
+    resume_files = []
+    for i in range(num_resumes):
+        if rng.random() < docx_ratio:
+            name = f"resume_{i:05d}.docx"
+            data = docx_bytes(resume_lines(rng, i, language=rng.choice(["en", "zh"])))
+        else:
+            name = f"resume_{i:05d}.pdf"
+            data = pdf_bytes(resume_lines(rng, i))
+        with open(os.path.join(root, "resume", name), 'wb') as f:
+            f.write(data)
+        resume_files.append(name)
+
+    result_files = []
+    started = datetime(2024, 1, 1)
+    for i in range(num_results):
+        timestamp = started + timedelta(minutes=i)
+        jd_file = jd_files[i % len(jd_files)] if jd_files else "jd.pdf"
+        name = f"screening_{timestamp.strftime('%Y%m%d_%H%M%S')}_{os.path.splitext(jd_file)[0]}.json"
+        with open(os.path.join(root, "results", name), 'w', encoding='utf-8') as f:
+            json.dump(result_record(rng, i, jd_file, timestamp), f, ensure_ascii=False, indent=2)
+        result_files.append(name)
+
+    manifest = {"params": params, "jd_files": jd_files, "resume_files": resume_files, "result_files": result_files}
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+EXTRACTION_KINDS = ("text", "table", "cjk")
+EXTRACTION_PAGE_COUNTS = (1, 5, 10, 25, 50)
+
+
+def _pages_of_lines(rng: random.Random, pages: int, language: str) -> List[str]:
+    lines: List[str] = []
+    index = 0
+    while len(lines) < pages * LINES_PER_PAGE:
+        lines += resume_lines(rng, index, language=language, jobs=6) + [""]
+        index += 1
+    return lines[:pages * LINES_PER_PAGE]
+
+
+def _table_rows(rng: random.Random, count: int) -> List[List[str]]:
+    rows = [["Company", "Title", "Period", "Skills", "Result"]]
+    for _ in range(count - 1):
+        start = rng.randint(2008, 2020)
+        rows.append([rng.choice(COMPANIES), rng.choice(["Engineer", "Senior Engineer", "Lead"]),
+                     f"{start}-{start + rng.randint(1, 4)}", ", ".join(rng.sample(SKILLS, 2)),
+                     f"+{rng.randint(5, 80)}% throughput"])
+    return rows
+
+
+def generate_extraction_corpus(root: str, page_counts=EXTRACTION_PAGE_COUNTS, kinds=EXTRACTION_KINDS,
+                               seed: int = 42) -> List[Dict[str, Any]]:
+    """Write one PDF and one DOCX per kind and page count for extraction benchmarks.
+
+    Returns one entry per file with its path, format, kind, pages and size.
+    """
+    os.makedirs(root, exist_ok=True)
+    documents = []
+    for kind in kinds:
+        for pages in page_counts:
+            rng = random.Random(f"{seed}:{kind}:{pages}")
+            rows = _table_rows(rng, pages * 35) if kind == "table" else None
+            lines = None if rows else _pages_of_lines(rng, pages, "zh" if kind == "cjk" else "en")
+            for fmt in ("pdf", "docx"):
+                path = os.path.join(root, f"{kind}_{pages:02d}p.{fmt}")
+                if not os.path.exists(path):
+                    if fmt == "pdf":
+                        data = table_pdf_bytes(rows) if rows else pdf_bytes(lines, cjk=kind == "cjk")
+                    else:
+                        data = docx_bytes([], table_rows=rows) if rows else docx_bytes(lines)
+                    with open(path, 'wb') as f:
+                        f.write(data)
+                documents.append({"path": path, "format": fmt, "kind": kind, "pages": pages,
+                                  "bytes": os.path.getsize(path)})
+    return documents
@@ -0,0 +1,254 @@
+"""
+Micro-benchmark of the document text extraction backends.
+
+Generates PDF and DOCX files of 1-50 pages (text-heavy, table-heavy and CJK) and runs
+every backend on every file of its format in a fresh subprocess, so that peak RSS can be
+attributed to a single extraction. Reports time per file, pages and MB per second, peak
+RSS growth and extracted text length.
+
+Usage:
+    python -m benchmarks.extraction_bench --output extraction.json
+    python -m benchmarks.extraction_bench --save-baseline benchmarks/extraction_baseline.json
+    python -m benchmarks.extraction_bench --baseline benchmarks/extraction_baseline.json --tolerance 0.25
+
+With --baseline the exit code is 1 if any backend got slower than the baseline by more
+than the tolerance on any file.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.corpus import EXTRACTION_KINDS, EXTRACTION_PAGE_COUNTS, generate_extraction_corpus
+
+# Differences below this many seconds are treated as noise in regression mode
+MIN_REGRESSION_SECONDS = 0.002
+
+# name -> (format, description); the callables are created inside the worker process
+BACKENDS: Dict[str, Tuple[str, str]] = {
+    "pypdf2": ("pdf", "agents.pdf_text.extract_pdf_text, the local PDF engine of the extraction registry "
+                      "(page ranges in worker processes from PDF_PARALLEL_MIN_PAGES pages)"),
+    "pypdf2_serial": ("pdf", "Legacy sequential PyPDF2 loop with string concatenation, kept for comparison"),
+    "document_converter_pdf": ("pdf", "DocumentConverterAgent.process (local engines of the registry, from a path)"),
+    "pymupdf": ("pdf", "PyMuPDF page.get_text(), installed with pdf2docx"),
+    "docx_stream": ("docx", "agents.docx_text.extract_docx_text (streamed word/document.xml, paragraphs and tables)"),
+    "python_docx": ("docx", "Legacy python-docx object model, paragraphs only, kept for comparison"),
+    "document_converter_docx": ("docx", "DocumentConverterAgent.process (local engines of the registry, from a path)"),
+}
+
+
+def legacy_pypdf2(content: bytes) -> str:
+    """The PyPDF2 fallback before page-parallel extraction."""
+    import PyPDF2
+    reader = PyPDF2.PdfReader(io.BytesIO(content))
+    text = ""
+    for page in reader.pages:
+        text += page.extract_text() + "\n"
+    return text
+
+
+def legacy_python_docx(content: bytes) -> str:
+    """The DOCX extraction before streaming; tables are lost."""
+    from docx import Document
+    return "\n".join(paragraph.text for paragraph in Document(io.BytesIO(content)).paragraphs)
+
+
+def load_backend(name: str) -> Callable[[str, bytes], str]:
+    """Return extract(path, content) -> text for a backend."""
+    loop = asyncio.new_event_loop()
+
+    if name == "pypdf2":
+        from agents.pdf_text import extract_pdf_text
+        return lambda path, content: loop.run_until_complete(extract_pdf_text(content))
+
+    if name == "pypdf2_serial":
+        return lambda path, content: legacy_pypdf2(content)
+
+    if name == "python_docx":
+        return lambda path, content: legacy_python_docx(content)
+
+    if name == "docx_stream":
+        from agents.docx_text import extract_docx_text
+        return lambda path, content: extract_docx_text(content)
+
+    if name.startswith("document_converter"):
+        from agents.document_converter import DocumentConverterAgent
+        from agents.text_extraction import get_extraction_registry
+        # Timed runs re-read the same file; measure the extraction, not the cache
+        get_extraction_registry().cache_size = 0
+        agent = DocumentConverterAgent()
+        return lambda path, content: loop.run_until_complete(agent.process(path))["text"]
+
+    if name == "pymupdf":
+        from benchmarks.corpus import pymupdf
+
+        def extract(path: str, content: bytes) -> str:
+            with pymupdf.open(stream=content, filetype="pdf") as doc:
+                return "\n".join(page.get_text() for page in doc)
+        return extract
+
+    raise ValueError(f"Unknown backend: {name}")
+
+
+def peak_rss_kb() -> int:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_worker(backend: str, path: str, repeat: int) -> Dict[str, Any]:
+    """Measure one backend on one file inside the current process."""
+    extract = load_backend(backend)
+    with open(path, 'rb') as f:
+        content = f.read()
+    rss_before = peak_rss_kb()
+    text = extract(path, content)  # Warm-up, also the run that determines peak memory
+    rss_after = peak_rss_kb()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        extract(path, content)
+        timings.append(time.perf_counter() - started)
+    return {
+        "seconds": statistics.median(timings),
+        "seconds_min": min(timings),
+        "peak_rss_delta_mb": round((rss_after - rss_before) / 1024, 2),
+        "peak_rss_mb": round(rss_after / 1024, 2),
+        "text_length": len(text),
+    }
+
+
+def measure(backend: str, document: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    """Run one backend on one document in a fresh interpreter."""
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.extraction_bench", "--worker", backend, document["path"],
+         "--repeat", str(repeat)],
+        capture_output=True, text=True,
+    )
+    entry = {"backend": backend, "file": os.path.basename(document["path"]), "kind": document["kind"],
+             "pages": document["pages"], "bytes": document["bytes"]}
+    if completed.returncode != 0:
+        entry["error"] = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed"
+        return entry
+    entry.update(json.loads(completed.stdout.strip().splitlines()[-1]))
+    entry["pages_per_second"] = round(document["pages"] / entry["seconds"], 2) if entry["seconds"] else None
+    entry["mb_per_second"] = round(document["bytes"] / 2**20 / entry["seconds"], 3) if entry["seconds"] else None
+    entry["seconds"] = round(entry["seconds"], 6)
+    entry["seconds_min"] = round(entry["seconds_min"], 6)
+    return entry
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Totals per backend over all files it processed successfully."""
+    summary = {}
+    for backend in BACKENDS:
+        rows = [r for r in results if r["backend"] == backend and "error" not in r]
+        if not rows:
+            continue
+        seconds = sum(r["seconds"] for r in rows)
+        summary[backend] = {
+            "files": len(rows),
+            "errors": sum(1 for r in results if r["backend"] == backend and "error" in r),
+            "total_seconds": round(seconds, 4),
+            "pages_per_second": round(sum(r["pages"] for r in rows) / seconds, 2) if seconds else None,
+            "mb_per_second": round(sum(r["bytes"] for r in rows) / 2**20 / seconds, 3) if seconds else None,
+            "max_peak_rss_delta_mb": max(r["peak_rss_delta_mb"] for r in rows),
+            "text_length": sum(r["text_length"] for r in rows),
+        }
+    return summary
+
+
+def find_regressions(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """Files on which a backend is slower than the baseline by more than tolerance."""
+    previous = {(r["backend"], r["file"]): r for r in baseline.get("results", []) if "error" not in r}
+    regressions = []
+    for result in results:
+        before = previous.get((result["backend"], result["file"]))
+        if not before or "error" in result:
+            continue
+        limit = before["seconds"] * (1 + tolerance)
+        if result["seconds"] > limit and result["seconds"] - before["seconds"] > MIN_REGRESSION_SECONDS:
+            regressions.append({
+                "backend": result["backend"],
+                "file": result["file"],
+                "baseline_seconds": before["seconds"],
+                "seconds": result["seconds"],
+                "slowdown": round(result["seconds"] / before["seconds"] - 1, 4),
+            })
+    return regressions
+
+
+def run_benchmark(corpus_dir: str, backends: List[str], page_counts: List[int], kinds: List[str],
+                  repeat: int, seed: int) -> Dict[str, Any]:
+    documents = generate_extraction_corpus(corpus_dir, page_counts=page_counts, kinds=kinds, seed=seed)
+    results = []
+    for backend in backends:
+        fmt = BACKENDS[backend][0]
+        for document in documents:
+            if document["format"] == fmt:
+                results.append(measure(backend, document, repeat))
+    return {
+        "python": sys.version.split()[0],
+        "corpus": {"directory": corpus_dir, "page_counts": page_counts, "kinds": kinds, "seed": seed},
+        "repeat": repeat,
+        "backends": {name: BACKENDS[name][1] for name in backends},
+        "summary": summarize(results),
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark document text extraction backends")
+    parser.add_argument("--worker", nargs=2, metavar=("BACKEND", "PATH"), help=argparse.SUPPRESS)
+    parser.add_argument("--corpus-dir", help="Generated files are reused (default: temp dir)")
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS))
+    parser.add_argument("--pages", nargs="+", type=int, default=list(EXTRACTION_PAGE_COUNTS))
+    parser.add_argument("--kinds", nargs="+", choices=EXTRACTION_KINDS, default=list(EXTRACTION_KINDS))
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per file (median is reported)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--save-baseline", help="Also write the report to this baseline file")
+    parser.add_argument("--baseline", help="Fail if slower than this baseline report")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown per file")
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker[0], args.worker[1], args.repeat)))
+        return 0
+
+    corpus_dir = args.corpus_dir or tempfile.mkdtemp(prefix="extraction-corpus-")
+    report = run_benchmark(corpus_dir, args.backends, args.pages, args.kinds, args.repeat, args.seed)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = find_regressions(report["results"], json.load(f), args.tolerance)
+        report["regressions"] = regressions
+        if regressions:
+            status = 1
+            for r in regressions:
+                print(f"REGRESSION {r['backend']} {r['file']}: {r['baseline_seconds']:.4f}s -> {r['seconds']:.4f}s",
+                      file=sys.stderr)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            f.write(text)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
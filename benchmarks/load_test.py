@@ -0,0 +1,315 @@
+"""
+End-to-end load test of the FastAPI endpoints against the mock LLM server.
+
+Generates a synthetic corpus (JDs, PDF/DOCX resumes and a history of screening results),
+starts the mock LLM server and the application in background threads, then drives
+/list-results, /get-result, /screen, /screen-from-assets and the /ws log fan-out with
+concurrent clients. Writes a JSON report with latency percentiles and throughput per
+scenario; pass a previous report as --baseline to compare commits.
+
+Usage:
+    python -m benchmarks.load_test --resumes 5000 --results 10000 --output report.json
+    python -m benchmarks.load_test --baseline report.json --output new.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.mock_llm_server import MockBehaviour, MockLLMState, MockServerThread, create_app
+
+# Nothing listens here, so the external PDF parser fails fast and PyPDF2 is used
+UNREACHABLE_PDF_PARSER = "http://127.0.0.1:9/parse_document/pdf"
+COMPARED_METRICS = ("throughput_rps", "latency_p50", "latency_p99")
+# Blocking calls added to request handlers show up as event loop lag
+COMPARED_LOOP_METRICS = ("lag_p99_seconds", "max_lag_seconds")
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    return round(sorted_values[min(int(q * len(sorted_values)), len(sorted_values) - 1)], 4)
+
+
+def summarize(latencies: List[float], statuses: Dict[str, int], elapsed: float) -> Dict[str, Any]:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "statuses": statuses,
+        "errors": sum(count for status, count in statuses.items() if not status.startswith("2")),
+        "elapsed": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 3) if elapsed > 0 else None,
+        "latency_mean": round(sum(latencies) / len(latencies), 4) if latencies else None,
+        "latency_p50": percentile(latencies, 0.5),
+        "latency_p90": percentile(latencies, 0.9),
+        "latency_p99": percentile(latencies, 0.99),
+        "latency_max": round(latencies[-1], 4) if latencies else None,
+    }
+
+
+async def run_scenario(request: Callable[[int], Awaitable[int]], total: int, concurrency: int) -> Dict[str, Any]:
+    """Issue total requests from concurrency workers; request(i) returns the HTTP status."""
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < total:
+            index = next_index
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                status = str(await request(index))
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, total)))))
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+class LoadTest:
+    """Scenarios against a running application."""
+
+    def __init__(self, base_url: str, corpus_dir: str, manifest: Dict[str, Any], args: argparse.Namespace):
+        self.base_url = base_url
+        self.corpus_dir = corpus_dir
+        self.manifest = manifest
+        self.args = args
+        self.rng = random.Random(args.seed)
+
+    def pick_resumes(self) -> List[str]:
+        return self.rng.sample(self.manifest["resume_files"], min(self.args.resumes_per_request,
+                                                                  len(self.manifest["resume_files"])))
+
+    async def list_results(self, session: aiohttp.ClientSession) -> Dict[str, Any]:
+        async def request(_):
+            async with session.get(f"{self.base_url}/list-results") as response:
+                await response.read()
+                return response.status
+        return await run_scenario(request, self.args.requests, self.args.concurrency)
+
+    async def get_result(self, session: aiohttp.ClientSession) -> Dict[str, Any]:
+        result_files = self.manifest["result_files"]
+
+        async def request(_):
+            async with session.get(f"{self.base_url}/get-result/{self.rng.choice(result_files)}") as response:
+                await response.read()
+                return response.status
+        return await run_scenario(request, self.args.requests, self.args.concurrency)
+
+    async def screen_from_assets(self, session: aiohttp.ClientSession, total: int) -> Dict[str, Any]:
+        async def request(_):
+            payload = {
+                "jd_filename": self.rng.choice(self.manifest["jd_files"]),
+                "resume_filenames": self.pick_resumes(),
+                "batch_evaluation": self.args.batch_evaluation,
+            }
+            async with session.post(f"{self.base_url}/screen-from-assets", json=payload) as response:
+                await response.read()
+                return response.status
+        return await run_scenario(request, total, self.args.screen_concurrency)
+
+    async def screen_upload(self, session: aiohttp.ClientSession) -> Dict[str, Any]:
+        async def request(_):
+            form = aiohttp.FormData()
+            files = [("jd_file", "job", self.rng.choice(self.manifest["jd_files"]))]
+            files += [("resume_files", "resume", name) for name in self.pick_resumes()]
+            for field, directory, name in files:
+                with open(os.path.join(self.corpus_dir, directory, name), 'rb') as f:
+                    form.add_field(field, f.read(), filename=name)
+            async with session.post(f"{self.base_url}/screen", data=form) as response:
+                await response.read()
+                return response.status
+        return await run_scenario(request, self.args.screen_requests, self.args.screen_concurrency)
+
+    async def ws_fanout(self, session: aiohttp.ClientSession) -> Dict[str, Any]:
+        """Screen from assets while ws_clients listeners receive the log stream."""
+        received: List[int] = []
+        lags: List[float] = []
+        sockets = [await session.ws_connect(f"{self.base_url.replace('http', 'ws', 1)}/ws")
+                   for _ in range(self.args.ws_clients)]
+
+        async def listen(ws, slot: int):
+            async for message in ws:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    break
+                received[slot] += 1
+                timestamp = json.loads(message.data).get("timestamp")
+                if timestamp:
+                    lags.append(time.time() - datetime.fromisoformat(timestamp).timestamp())
+
+        received.extend([0] * len(sockets))
+        listeners = [asyncio.create_task(listen(ws, i)) for i, ws in enumerate(sockets)]
+        try:
+            report = await self.screen_from_assets(session, self.args.screen_requests)
+            await asyncio.sleep(0.5)  # Let the last messages arrive
+        finally:
+            for ws in sockets:
+                await ws.close()
+            await asyncio.gather(*listeners, return_exceptions=True)
+
+        lags.sort()
+        report["ws"] = {
+            "clients": len(sockets),
+            "messages_per_client_min": min(received) if received else 0,
+            "messages_per_client_max": max(received) if received else 0,
+            "delivery_lag_p50": percentile(lags, 0.5),
+            "delivery_lag_p99": percentile(lags, 0.99),
+        }
+        return report
+
+    async def run(self, scenarios: List[str]) -> Dict[str, Any]:
+        timeout = aiohttp.ClientTimeout(total=self.args.request_timeout)
+        connector = aiohttp.TCPConnector(limit=0)
+        results = {}
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            for name in scenarios:
+                logging.getLogger(__name__).warning(f"Running scenario {name}")
+                if name == "list-results":
+                    results[name] = await self.list_results(session)
+                elif name == "get-result":
+                    results[name] = await self.get_result(session)
+                elif name == "screen":
+                    results[name] = await self.screen_upload(session)
+                elif name == "screen-from-assets":
+                    results[name] = await self.screen_from_assets(session, self.args.screen_requests)
+                elif name == "ws-fanout":
+                    results[name] = await self.ws_fanout(session)
+        return results
+
+
+SCENARIOS = ["list-results", "get-result", "screen", "screen-from-assets", "ws-fanout"]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """Relative change of throughput and latency percentiles per scenario (new / baseline - 1)."""
+    comparison = {}
+    for name, scenario in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        comparison[name] = {
+            metric: round(scenario[metric] / previous[metric] - 1, 4)
+            for metric in COMPARED_METRICS
+            if scenario.get(metric) is not None and previous.get(metric)
+        }
+    loop, previous = report.get("event_loop"), baseline.get("event_loop")
+    if loop and previous:
+        comparison["event_loop"] = {
+            metric: round(loop[metric] / previous[metric] - 1, 4)
+            for metric in COMPARED_LOOP_METRICS
+            if loop.get(metric) is not None and previous.get(metric)
+        }
+    return comparison
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    corpus_dir = args.corpus_dir or tempfile.mkdtemp(prefix="screening-load-")
+    started = time.perf_counter()
+    manifest = generate_corpus(corpus_dir, num_jds=args.jds, num_resumes=args.resumes,
+                               num_results=args.results, docx_ratio=args.docx_ratio, seed=args.seed)
+    corpus_seconds = time.perf_counter() - started
+
+    behaviour = MockBehaviour(ttft=args.llm_ttft, ttft_jitter=args.llm_ttft / 2, distribution="lognormal",
+                              decode_rate=args.llm_decode_rate, seed=args.seed)
+    llm_server = MockServerThread(create_app(MockLLMState(behaviour))).start()
+
+    # The application reads its configuration at import time
+    os.environ["ASSETS_DIR"] = corpus_dir
+    os.environ["LLM_BASE_URLS"] = llm_server.base_url
+    os.environ["LLM_API_KEY"] = "mock"
+    os.environ.setdefault("PDF_PARSER_URL", UNREACHABLE_PDF_PARSER)
+    import main as app_module
+    logging.getLogger().setLevel(logging.WARNING)
+
+    app_server = MockServerThread(app_module.app).start()
+    try:
+        base_url = app_server.base_url.rsplit("/v1", 1)[0]
+        scenarios = asyncio.run(LoadTest(base_url, corpus_dir, manifest, args).run(args.scenarios))
+        async def fetch_stats():
+            async with aiohttp.ClientSession() as session:
+                async with session.get(llm_server.base_url.rsplit("/v1", 1)[0] + "/stats") as response:
+                    llm = await response.json()
+                async with session.get(base_url + "/loop-lag") as response:
+                    loop = await response.json()
+            return llm, loop
+        llm_stats, loop_stats = asyncio.run(fetch_stats())
+    finally:
+        app_server.stop()
+        llm_server.stop()
+
+    return {
+        "commit": git_commit(),
+        "created": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "params": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "corpus": dict(manifest["params"], directory=corpus_dir, generation_seconds=round(corpus_seconds, 2)),
+        "scenarios": scenarios,
+        "llm": llm_stats,
+        "event_loop": loop_stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the screening API against a mock LLM")
+    parser.add_argument("--corpus-dir", help="Reused if generated with the same parameters (default: temp dir)")
+    parser.add_argument("--jds", type=int, default=5)
+    parser.add_argument("--resumes", type=int, default=200)
+    parser.add_argument("--results", type=int, default=1000)
+    parser.add_argument("--docx-ratio", type=float, default=0.3)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per read-only scenario")
+    parser.add_argument("--concurrency", type=int, default=20, help="Clients for read-only scenarios")
+    parser.add_argument("--screen-requests", type=int, default=10)
+    parser.add_argument("--screen-concurrency", type=int, default=4)
+    parser.add_argument("--resumes-per-request", type=int, default=5)
+    parser.add_argument("--batch-evaluation", action="store_true")
+    parser.add_argument("--ws-clients", type=int, default=20)
+    parser.add_argument("--llm-ttft", type=float, default=0.05, help="Mean mock LLM time to first token")
+    parser.add_argument("--llm-decode-rate", type=float, default=2000, help="Mock LLM completion tokens per second")
+    parser.add_argument("--request-timeout", type=float, default=600)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Previous report to compare against")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            report["comparison"] = compare(report, json.load(f))
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
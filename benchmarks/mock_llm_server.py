@@ -0,0 +1,477 @@
+"""
+Mock OpenAI-compatible LLM server for offline benchmarking.
+
+Speaks the subset of /v1/chat/completions used by LlamaClient, with and without
+streaming, and answers with canned, schema-valid JSON for the extraction, JD analysis
+and evaluation prompts. It simulates automatic prefix caching and reports cached prompt
+tokens in the response usage.
+
+Timing follows a simple serving model: time to first token drawn from a latency
+distribution, plus uncached prompt tokens at the prefill rate, plus completion tokens at
+the decode rate. Server errors, 429 responses, broken streams and a concurrency cap can
+be injected to exercise retries and admission control.
+
+Run standalone with:
+    python -m benchmarks.mock_llm_server --port 8001 --ttft 0.3 --decode-rate 50 --rate-limit-rate 0.05
+
+and point the application at it with LLM_BASE_URLS=http://127.0.0.1:8001/v1. The
+behaviour can be changed at runtime with POST /config.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Same block granularity as vLLM's automatic prefix caching
+BLOCK_SIZE = 16
+MAX_CACHED_BLOCKS = 65536
+
+_CJK_CHARS = r'\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef'
+_TOKEN_RE = re.compile(rf'[{_CJK_CHARS}]|\s+|[^\s{_CJK_CHARS}]{{1,4}}')
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into pseudo tokens (one per CJK character, up to four other characters)."""
+    return _TOKEN_RE.findall(text)
+
+
+class PrefixCache:
+    """Block-level prefix cache: a block hits only if every block before it hit as well."""
+
+    def __init__(self, block_size: int = BLOCK_SIZE, max_blocks: int = MAX_CACHED_BLOCKS):
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self.blocks: "OrderedDict[str, None]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def lookup_and_insert(self, tokens: List[str]) -> int:
+        """Return the number of cached prefix tokens and cache all full blocks of the prompt."""
+        cached = 0
+        matching = True
+        parent = ""
+        full = len(tokens) - len(tokens) % self.block_size
+        with self.lock:
+            for start in range(0, full, self.block_size):
+                block = "\x00".join(tokens[start:start + self.block_size])
+                key = hashlib.sha1(f"{parent}\x01{block}".encode("utf-8")).hexdigest()
+                if matching and key in self.blocks:
+                    cached += self.block_size
+                    self.blocks.move_to_end(key)
+                else:
+                    matching = False
+                    self.blocks[key] = None
+                    if len(self.blocks) > self.max_blocks:
+                        self.blocks.popitem(last=False)
+                parent = key
+        return cached
+
+    def clear(self):
+        with self.lock:
+            self.blocks.clear()
+
+
+def _stable_score(text: str, salt: str) -> float:
+    """Deterministic pseudo score in [0.2, 0.95] derived from the prompt."""
+    digest = hashlib.md5(f"{salt}:{text}".encode("utf-8")).digest()
+    return round(0.2 + (digest[0] / 255) * 0.75, 2)
+
+
+def _recommendation(score: float) -> str:
+    if score >= 0.8:
+        return "Strong Match - Highly Recommended"
+    if score >= 0.65:
+        return "Good Match - Recommended"
+    if score >= 0.5:
+        return "Moderate Match - Consider for Interview"
+    return "Weak Match - Not Recommended"
+
+
+def _evaluation(text: str) -> Dict[str, Any]:
+    scores = {
+        "skills_match": _stable_score(text, "skills"),
+        "experience_match": _stable_score(text, "experience"),
+        "education_match": _stable_score(text, "education"),
+    }
+    overall = round(sum(scores.values()) / 3, 2)
+    return {
+        "scores": scores,
+        "analysis": {
+            "skills_analysis": "技能与职位要求基本匹配",
+            "experience_analysis": "工作经验与职位相关",
+            "education_analysis": "教育背景满足要求",
+            "overall_analysis": "模拟评估结果",
+        },
+        "overall_score": overall,
+        "recommendation": _recommendation(overall),
+    }
+
+
+JD_RESPONSE = {
+    "job_title": "Senior Software Engineer",
+    "industry": "Technology",
+    "required_skills": ["Python", "AWS", "Docker", "Kubernetes"],
+    "preferred_skills": ["React", "Go"],
+    "responsibilities": ["Design and implement scalable microservices", "Mentor junior developers"],
+    "experience_requirements": {"years": "5", "description": "5+ years of backend development"},
+    "education_requirements": {"degree": "Bachelor", "major": "Computer Science"},
+    "additional_requirements": ["Strong communication skills"],
+}
+
+EXTRACTION_RESPONSE = {
+    "basic_info": {"name": "Mock Candidate", "years_of_experience": "6", "location": "Shanghai"},
+    "contact": {"email": "mock@example.com", "phone": "13800000000"},
+    "summary": "Backend engineer with cloud experience",
+    "skills": ["Python", "Docker", "AWS", "PostgreSQL"],
+    "experience": [{
+        "company": "Tech Corp",
+        "title": "Senior Engineer",
+        "duration": "2019-2024",
+        "responsibilities": ["Built microservices", "Led a team of 5"],
+    }],
+    "education": [{"degree": "Master", "institution": "清华大学", "year": "2018", "major": "Computer Science"}],
+    "projects": [{"name": "Payments", "description": "Payment platform", "technologies": ["Python"], "role": "Lead"}],
+    "certifications": ["AWS Certified Solutions Architect"],
+    "languages": ["English", "Chinese"],
+}
+
+
+def canned_response(prompt: str) -> str:
+    """Pick a schema-valid JSON answer based on which agent built the prompt."""
+    if "candidate_id" in prompt:
+        ids = re.findall(r'^候选人 (\d+)：(.*)$', prompt, re.MULTILINE)
+        results = [dict(_evaluation(line), candidate_id=int(i)) for i, line in ids]
+        return json.dumps({"results": results}, ensure_ascii=False)
+    if "overall_score" in prompt:
+        return json.dumps(_evaluation(prompt), ensure_ascii=False)
+    if "job_title" in prompt:
+        return json.dumps(JD_RESPONSE, ensure_ascii=False)
+    return json.dumps(EXTRACTION_RESPONSE, ensure_ascii=False)
+
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+
+class MockBehaviour:
+    """Latency, throughput and fault injection settings of the mock server."""
+
+    def __init__(self, ttft: float = 0.0, ttft_jitter: float = 0.0, distribution: str = "fixed",
+                 prefill_rate: float = 0.0, decode_rate: float = 0.0, stream_chunk_tokens: int = 4,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, stream_break_rate: float = 0.0,
+                 max_concurrency: int = 0, retry_after: float = 1.0, seed: Optional[int] = None):
+        self.ttft = ttft                        # Mean seconds before the first token
+        self.ttft_jitter = ttft_jitter          # Spread (uniform) or standard deviation (normal, lognormal)
+        self.distribution = distribution
+        self.prefill_rate = prefill_rate        # Uncached prompt tokens per second, 0 = instant
+        self.decode_rate = decode_rate          # Completion tokens per second, 0 = instant
+        self.stream_chunk_tokens = stream_chunk_tokens
+        self.error_rate = error_rate            # Fraction of requests answered with 500
+        self.rate_limit_rate = rate_limit_rate  # Fraction of requests answered with 429
+        self.stream_break_rate = stream_break_rate  # Fraction of streams cut off halfway
+        self.max_concurrency = max_concurrency  # Requests beyond this get 429, 0 = unlimited
+        self.retry_after = retry_after
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.validate()
+
+    def validate(self):
+        if self.distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {self.distribution}")
+        for name in ("error_rate", "rate_limit_rate", "stream_break_rate"):
+            if not 0 <= getattr(self, name) <= 1:
+                raise ValueError(f"{name} must be between 0 and 1")
+
+    def update(self, settings: Dict[str, Any]):
+        """Change settings at runtime; unknown keys raise ValueError."""
+        for key, value in settings.items():
+            if key == "rng" or not hasattr(self, key):
+                raise ValueError(f"Unknown setting: {key}")
+            setattr(self, key, value)
+        if "seed" in settings:
+            self.rng = random.Random(self.seed)
+        self.validate()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {key: value for key, value in vars(self).items() if key != "rng"}
+
+    def sample_ttft(self) -> float:
+        mean, jitter = self.ttft, self.ttft_jitter
+        if mean <= 0 or jitter <= 0 or self.distribution == "fixed":
+            return max(mean, 0.0)
+        if self.distribution == "uniform":
+            return self.rng.uniform(max(mean - jitter, 0.0), mean + jitter)
+        if self.distribution == "normal":
+            return max(self.rng.gauss(mean, jitter), 0.0)
+        # Lognormal with the given mean and standard deviation: a long tail as seen on real servers
+        sigma = math.sqrt(math.log(1 + (jitter / mean) ** 2))
+        return self.rng.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+
+    def prefill_time(self, uncached_tokens: int) -> float:
+        return uncached_tokens / self.prefill_rate if self.prefill_rate > 0 else 0.0
+
+    def decode_time(self, completion_tokens: int) -> float:
+        return completion_tokens / self.decode_rate if self.decode_rate > 0 else 0.0
+
+    def inject(self, rate: float) -> bool:
+        return rate > 0 and self.rng.random() < rate
+
+
+class MockLLMState:
+    """Shared server state: behaviour, the prefix cache and aggregate usage counters."""
+
+    def __init__(self, behaviour: Optional[MockBehaviour] = None):
+        self.behaviour = behaviour or MockBehaviour()
+        self.cache = PrefixCache()
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.reset()
+
+    def reset(self):
+        self.cache.clear()
+        with self.lock:
+            self.stats = {
+                "requests": 0,
+                "streamed": 0,
+                "prompt_tokens": 0,
+                "cached_tokens": 0,
+                "completion_tokens": 0,
+                "errors": 0,
+                "rate_limited": 0,
+                "broken_streams": 0,
+                "peak_in_flight": 0,
+            }
+
+    def record(self, prompt_tokens: int, cached_tokens: int, completion_tokens: int):
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["prompt_tokens"] += prompt_tokens
+            self.stats["cached_tokens"] += cached_tokens
+            self.stats["completion_tokens"] += completion_tokens
+
+    def count(self, counter: str):
+        with self.lock:
+            self.stats[counter] += 1
+
+    def enter(self):
+        with self.lock:
+            self.in_flight += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.in_flight)
+
+    def leave(self):
+        with self.lock:
+            self.in_flight -= 1
+
+
+def _error(status_code: int, message: str, error_type: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"error": {"message": message, "type": error_type, "code": status_code}},
+        headers=headers,
+    )
+
+
+def _chunk(completion_id: str, created: int, model: str, delta: Dict[str, Any],
+           finish_reason: Optional[str] = None) -> str:
+    payload = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": created,
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def create_app(state: Optional[MockLLMState] = None) -> FastAPI:
+    """Create the mock server application."""
+    state = state or MockLLMState()
+    app = FastAPI(title="Mock LLM Server")
+    app.state.mock = state
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "mock-model", "object": "model", "owned_by": "mock"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        behaviour = state.behaviour
+        body = await request.json()
+        messages = body.get("messages", [])
+
+        if behaviour.max_concurrency and state.in_flight >= behaviour.max_concurrency:
+            state.count("rate_limited")
+            return _error(429, "Too many concurrent requests", "rate_limit_exceeded",
+                          {"Retry-After": str(behaviour.retry_after)})
+        if behaviour.inject(behaviour.rate_limit_rate):
+            state.count("rate_limited")
+            return _error(429, "Rate limit exceeded", "rate_limit_exceeded",
+                          {"Retry-After": str(behaviour.retry_after)})
+        if behaviour.inject(behaviour.error_rate):
+            state.count("errors")
+            return _error(500, "Injected server error", "server_error")
+
+        # Chat template: the whole conversation is one token sequence for prefix caching
+        prompt_text = "".join(f"<|{m.get('role')}|>{m.get('content', '')}" for m in messages)
+        user_prompt = messages[-1].get("content", "") if messages else ""
+
+        tokens = tokenize(prompt_text)
+        cached_tokens = state.cache.lookup_and_insert(tokens)
+        content = canned_response(user_prompt)
+        completion = tokenize(content)
+        state.record(len(tokens), cached_tokens, len(completion))
+
+        completion_id = f"chatcmpl-mock-{state.stats['requests']}"
+        created = int(time.time())
+        model = body.get("model", "mock-model")
+        usage = {
+            "prompt_tokens": len(tokens),
+            "completion_tokens": len(completion),
+            "total_tokens": len(tokens) + len(completion),
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        }
+        first_token_delay = behaviour.sample_ttft() + behaviour.prefill_time(len(tokens) - cached_tokens)
+
+        if body.get("stream"):
+            state.count("streamed")
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            break_stream = behaviour.inject(behaviour.stream_break_rate)
+
+            async def events() -> AsyncIterator[str]:
+                state.enter()
+                try:
+                    await asyncio.sleep(first_token_delay)
+                    yield _chunk(completion_id, created, model, {"role": "assistant", "content": ""})
+                    step = max(behaviour.stream_chunk_tokens, 1)
+                    for start in range(0, len(completion), step):
+                        if break_stream and start >= len(completion) // 2:
+                            state.count("broken_streams")
+                            # Makes the server abort the chunked response, like a dropped connection
+                            raise ConnectionAbortedError("Injected stream break")
+                        piece = completion[start:start + step]
+                        await asyncio.sleep(behaviour.decode_time(len(piece)))
+                        yield _chunk(completion_id, created, model, {"content": "".join(piece)})
+                    yield _chunk(completion_id, created, model, {}, "stop")
+                    if include_usage:
+                        yield "data: " + json.dumps({
+                            "id": completion_id, "object": "chat.completion.chunk", "created": created,
+                            "model": model, "choices": [], "usage": usage,
+                        }) + "\n\n"
+                    yield "data: [DONE]\n\n"
+                finally:
+                    state.leave()
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        state.enter()
+        try:
+            await asyncio.sleep(first_token_delay + behaviour.decode_time(len(completion)))
+        finally:
+            state.leave()
+
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        }
+
+    @app.get("/config")
+    async def get_config():
+        return state.behaviour.as_dict()
+
+    @app.post("/config")
+    async def update_config(request: Request):
+        try:
+            state.behaviour.update(await request.json())
+        except ValueError as e:
+            return _error(400, str(e), "invalid_request_error")
+        return state.behaviour.as_dict()
+
+    @app.get("/stats")
+    async def get_stats():
+        return dict(state.stats)
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        state.reset()
+        return {"message": "Stats reset"}
+
+    return app
+
+
+class MockServerThread:
+    """Runs a mock server in a background thread, e.g. for benchmarks."""
+
+    def __init__(self, app: FastAPI, host: str = "127.0.0.1", port: int = 0):
+        self.config = uvicorn.Config(app, host=host, port=port, log_level="warning")
+        self.server = uvicorn.Server(self.config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        sock = self.server.servers[0].sockets[0]
+        host, port = sock.getsockname()[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockServerThread":
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--ttft", type=float, default=0.0, help="Mean seconds to first token")
+    parser.add_argument("--ttft-jitter", type=float, default=0.0,
+                        help="Spread (uniform) or standard deviation (normal, lognormal) of the time to first token")
+    parser.add_argument("--distribution", choices=LATENCY_DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--prefill-rate", type=float, default=0.0, help="Uncached prompt tokens per second (0 = instant)")
+    parser.add_argument("--decode-rate", type=float, default=0.0, help="Completion tokens per second (0 = instant)")
+    parser.add_argument("--stream-chunk-tokens", type=int, default=4)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests failing with 429")
+    parser.add_argument("--stream-break-rate", type=float, default=0.0, help="Fraction of streams cut off halfway")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="Reject requests beyond this with 429 (0 = unlimited)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    behaviour = MockBehaviour(
+        ttft=args.ttft,
+        ttft_jitter=args.ttft_jitter,
+        distribution=args.distribution,
+        prefill_rate=args.prefill_rate,
+        decode_rate=args.decode_rate,
+        stream_chunk_tokens=args.stream_chunk_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        stream_break_rate=args.stream_break_rate,
+        max_concurrency=args.max_concurrency,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(MockLLMState(behaviour)), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Prefix-cache benchmark for the agent prompt layouts.
+
+Screens synthetic candidates against a few JDs through the real agents, pointed at the
+mock LLM server, and compares prefill tokens (prompt tokens not served from the prefix
+cache) of the current prompt layout with the legacy layout that placed the output
+schema after the variable content. Both layouts render JSON with compact_json, so the
+difference comes from the ordering alone.
+
+Usage:
+    python -m benchmarks.prefix_cache_bench --candidates 50 --jds 3
+"""
+import argparse
+import asyncio
+import json
+import random
+from typing import Any, Dict, List
+
+import httpx
+
+from agents.backend_pool import BackendPool
+from agents.decision_maker import DecisionMakerAgent
+from agents.jd_analyzer import JDAnalyzerAgent
+from agents.prompt_builder import compact_json
+from benchmarks.mock_llm_server import MockServerThread, create_app
+
+SKILLS = ["Python", "Java", "Go", "Docker", "Kubernetes", "AWS", "React", "PostgreSQL",
+          "Kafka", "Redis", "Spark", "TensorFlow", "微服务架构", "分布式系统", "机器学习"]
+COMPANIES = ["腾讯科技", "阿里巴巴", "Tech Corp", "StartUp Inc", "字节跳动", "Cloud Co"]
+UNIVERSITIES = ["清华大学", "北京大学", "浙江大学", "State University", "University of Technology"]
+
+# Legacy layouts, kept here only to measure the difference
+LEGACY_EVALUATION_TEMPLATE = """
+        请作为专业的HR评估专家，分析候选人与职位的匹配程度。
+
+        职位要求：
+        {job_requirements}
+
+        候选人信息：
+        {candidate_info}
+
+        请提供详细的评估，并以以下JSON格式返回结果：
+        {{
+            "scores": {{
+                "skills_match": "技能匹配得分(0-1)",
+                "experience_match": "经验匹配得分(0-1)",
+                "education_match": "教育背景匹配得分(0-1)"
+            }},
+            "analysis": {{
+                "skills_analysis": "技能匹配分析",
+                "experience_analysis": "经验匹配分析",
+                "education_analysis": "教育背景匹配分析",
+                "overall_analysis": "整体评估分析"
+            }},
+            "overall_score": "总体匹配得分(0-1)",
+            "recommendation": "建议（'Strong Match - Highly Recommended' | 'Good Match - Recommended' | 'Moderate Match - Consider for Interview' | 'Weak Match - Not Recommended'）"
+        }}
+
+        请确保：
+        1. 所有得分在0到1之间
+        2. 分析要具体且有见地
+        3. 只返回JSON格式数据，不要包含其他说明文字
+        """
+
+LEGACY_JD_TEMPLATE = """
+        请分析以下工作描述，提取关键信息并以JSON格式返回，包含以下字段：
+        {{
+            "job_title": "职位名称",
+            "industry": "所属行业",
+            "required_skills": ["必需技能列表"],
+            "preferred_skills": ["加分技能列表"],
+            "responsibilities": ["工作职责列表"],
+            "experience_requirements": {{
+                "years": "要求年限",
+                "description": "经验要求描述"
+            }},
+            "education_requirements": {{
+                "degree": "学历要求",
+                "major": "专业要求"
+            }},
+            "additional_requirements": ["其他要求列表"]
+        }}
+        工作描述：{jd_text}
+        请确保返回的是有效的JSON格式。只返回JSON数据，不要包含其他说明文字。
+        """
+
+
+def make_candidate(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "basic_info": {"name": f"Candidate {rng.randint(1, 10**6)}", "years_of_experience": str(rng.randint(1, 15))},
+        "skills": rng.sample(SKILLS, rng.randint(3, 8)),
+        "experience": [{
+            "company": rng.choice(COMPANIES),
+            "title": rng.choice(["Software Engineer", "Senior Engineer", "Tech Lead"]),
+            "duration": f"{rng.randint(2010, 2020)}-{rng.randint(2021, 2024)}",
+            "responsibilities": rng.sample(["Built microservices", "Led team", "Optimized queries",
+                                            "Designed data pipelines", "Mentored juniors"], 2),
+        } for _ in range(rng.randint(1, 3))],
+        "education": [{"degree": rng.choice(["Bachelor", "Master"]), "institution": rng.choice(UNIVERSITIES)}],
+    }
+
+
+def make_jd_text(rng: random.Random, index: int) -> str:
+    skills = ", ".join(rng.sample(SKILLS, 5))
+    return (f"Senior Backend Engineer #{index}\nRequired Skills: {skills}\n"
+            f"Responsibilities:\n- Design scalable services\n- Mentor junior developers\n"
+            f"Requirements: {rng.randint(3, 8)}+ years of experience, Bachelor's degree")
+
+
+async def run_layout(layout: str, base_url: str, jd_texts: List[str], candidates: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Run JD analysis and evaluation for every JD/candidate pair and return server usage."""
+    jd_analyzer = JDAnalyzerAgent()
+    decision_maker = DecisionMakerAgent()
+    pool = BackendPool([base_url], api_key="mock")
+    jd_analyzer.llm_client.pool = pool
+    decision_maker.llm_client.pool = pool
+
+    stats_url = base_url.rsplit("/v1", 1)[0] + "/stats"
+    async with httpx.AsyncClient() as http:
+        await http.post(stats_url + "/reset")
+        for jd_text in jd_texts:
+            if layout == "legacy":
+                prompt = LEGACY_JD_TEMPLATE.format(jd_text=jd_text)
+                response = await jd_analyzer.llm_client._call_llm(prompt)
+                job_requirements = json.loads(response)
+            else:
+                job_requirements = await jd_analyzer.process({"text": jd_text})
+
+            for candidate_info in candidates:
+                if layout == "legacy":
+                    await decision_maker.llm_client._call_llm(LEGACY_EVALUATION_TEMPLATE.format(
+                        job_requirements=compact_json(job_requirements),
+                        candidate_info=compact_json(candidate_info),
+                    ))
+                else:
+                    await decision_maker.process({
+                        "candidate_info": candidate_info,
+                        "job_requirements": job_requirements
+                    })
+        stats = (await http.get(stats_url)).json()
+
+    stats["prefill_tokens"] = stats["prompt_tokens"] - stats["cached_tokens"]
+    stats["cache_hit_ratio"] = round(stats["cached_tokens"] / max(stats["prompt_tokens"], 1), 4)
+    return stats
+
+
+async def run_benchmark(num_candidates: int, num_jds: int, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    candidates = [make_candidate(rng) for _ in range(num_candidates)]
+    jd_texts = [make_jd_text(rng, i) for i in range(num_jds)]
+
+    server = MockServerThread(create_app()).start()
+    try:
+        report = {
+            "candidates": num_candidates,
+            "jds": num_jds,
+            "legacy": await run_layout("legacy", server.base_url, jd_texts, candidates),
+            "current": await run_layout("current", server.base_url, jd_texts, candidates),
+        }
+    finally:
+        server.stop()
+
+    legacy, current = report["legacy"]["prefill_tokens"], report["current"]["prefill_tokens"]
+    report["prefill_savings"] = round(1 - current / max(legacy, 1), 4)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare prefix-cache hits of prompt layouts")
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--jds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    report = asyncio.run(run_benchmark(args.candidates, args.jds, args.seed))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
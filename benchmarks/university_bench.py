@@ -0,0 +1,124 @@
+"""
+Micro-benchmark of the university tier lookups.
+
+Compares the alias index (one lookup for all tiers, and the batch API) with the legacy
+per-tier functions that scanned every alias set with substring checks on each call.
+
+Usage:
+    python -m benchmarks.university_bench --names 5000 --repeat 5
+"""
+import argparse
+import json
+import random
+import time
+from typing import Any, Callable, Dict, List
+
+from agents.data.universities import (PROJECT_211_UNIVERSITIES, PROJECT_985_UNIVERSITIES, QS_TOP_20_UNIVERSITIES,
+                                      UniversityIndex, university_tiers_batch)
+
+UNKNOWN_INSTITUTIONS = ["State University", "University of Technology", "深圳职业技术学院", "City College",
+                        "某某师范学院", "Unknown Institute of Science", "江西理工大学", "University of Toronto"]
+SUFFIXES = ["", "计算机学院", "（本科）", " School of Engineering", "研究生院"]
+
+
+# Legacy implementations, kept here only to measure the difference and check parity
+def legacy_is_211_university(university_name: str) -> bool:
+    cleaned_name = university_name.strip().replace("大学", "").replace("学院", "")
+    for uni in PROJECT_211_UNIVERSITIES:
+        if cleaned_name in uni or uni in university_name:
+            return True
+    return False
+
+
+def legacy_is_985_university(university_name: str) -> bool:
+    cleaned_name = university_name.strip().replace("大学", "").replace("学院", "")
+    for uni in PROJECT_985_UNIVERSITIES:
+        if cleaned_name in uni or uni in university_name:
+            return True
+    return False
+
+
+def legacy_is_qs_top20_university(university_name: str) -> bool:
+    cleaned_name = university_name.strip().replace("大学", "").replace("学院", "")
+    for uni in QS_TOP_20_UNIVERSITIES:
+        if cleaned_name.lower() in uni.lower() or uni.lower() in university_name.lower():
+            return True
+    return False
+
+
+def legacy_tiers(university_name: str) -> Dict[str, bool]:
+    return {
+        "is_qs_top20": legacy_is_qs_top20_university(university_name),
+        "is_985": legacy_is_985_university(university_name),
+        "is_211": legacy_is_211_university(university_name),
+    }
+
+
+def generate_names(count: int, seed: int = 42) -> List[str]:
+    """Institution names as an LLM extracts them: aliases, aliases with suffixes, unknown schools."""
+    rng = random.Random(seed)
+    aliases = sorted(QS_TOP_20_UNIVERSITIES | PROJECT_985_UNIVERSITIES | PROJECT_211_UNIVERSITIES)
+    names = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.5:
+            name = rng.choice(aliases) + rng.choice(SUFFIXES)
+        elif roll < 0.6:
+            name = rng.choice(aliases).upper() if rng.random() < 0.5 else rng.choice(aliases).lower()
+        else:
+            name = rng.choice(UNKNOWN_INSTITUTIONS) + rng.choice(SUFFIXES)
+        names.append(name)
+    return names
+
+
+def best_of(func: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def run_benchmark(count: int, repeat: int, seed: int) -> Dict[str, Any]:
+    names = generate_names(count, seed)
+    # A fresh index without the module's lookup cache measures the uncached cost
+    index = UniversityIndex()
+    started = time.perf_counter()
+    UniversityIndex()
+    build_seconds = time.perf_counter() - started
+
+    timings = {
+        "legacy_three_functions": best_of(lambda: [legacy_tiers(name) for name in names], repeat),
+        "index_uncached": best_of(lambda: [index.tiers(name) for name in names], repeat),
+        "index_batch": best_of(lambda: university_tiers_batch(names), repeat),
+    }
+    mismatches = sum(1 for name in names if index.tiers(name) != legacy_tiers(name))
+    legacy = timings["legacy_three_functions"]
+    return {
+        "names": count,
+        "distinct_names": len(set(names)),
+        "index_build_seconds": round(build_seconds, 6),
+        "mismatches": mismatches,
+        "results": {
+            name: {
+                "seconds": round(seconds, 6),
+                "microseconds_per_name": round(seconds / count * 1e6, 3),
+                "speedup": round(legacy / seconds, 2) if seconds else None,
+            }
+            for name, seconds in timings.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark university tier lookups")
+    parser.add_argument("--names", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.names, args.repeat, args.seed), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,18 @@
 import asyncio
 import os
 import tempfile
-from typing import Dict, Any, List
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, WebSocket
+from typing import Dict, Any, List, Optional
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, WebSocket, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse
 from pydantic import BaseModel
 import uvicorn
-from docx import Document
 from pdf2docx import Converter
-import PyPDF2
-import io
 import logging
 import json
 from datetime import datetime
-import shutil
+import time
+from contextlib import asynccontextmanager
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -23,7 +22,7 @@ logger = logging.getLogger(__name__)
 active_connections: List[WebSocket] = []
 
 # Define asset directories
-ASSETS_DIR = "assets"
+ASSETS_DIR = os.getenv("ASSETS_DIR", "assets")
 JD_DIR = os.path.join(ASSETS_DIR, "job")
 RESUME_DIR = os.path.join(ASSETS_DIR, "resume")
 LOGS_DIR = os.path.join(ASSETS_DIR, "logs")
@@ -35,6 +34,9 @@ os.makedirs(RESUME_DIR, exist_ok=True)
 os.makedirs(LOGS_DIR, exist_ok=True)
 os.makedirs(RESULTS_DIR, exist_ok=True)  # Create results directory
 
+# End-to-end time budget for one screening request; remaining resumes are dropped once it passes
+SCREENING_DEADLINE_SECONDS = float(os.getenv("SCREENING_DEADLINE_SECONDS", "900"))
+
 class WebSocketLogger:
     def __init__(self):
         self.connections = active_connections
@@ -72,6 +74,25 @@ class WebSocketLogger:
         except Exception as e:
             logger.error(f"Error writing to log file: {str(e)}")
 
+    async def progress(self, file_name: str, stage: str, field: str, value: Any):
+        """Send a partial result to WebSocket clients as soon as it is available."""
+        shown = value if isinstance(value, (str, int, float)) else json.dumps(value, ensure_ascii=False)
+        progress_entry = {
+            "type": "progress",
+            "file_name": file_name,
+            "stage": stage,
+            "field": field,
+            "value": value,
+            "message": f"[{file_name}] {stage} {field}: {shown}",
+            "level": "info",
+            "timestamp": datetime.now().isoformat()
+        }
+        for connection in self.connections:
+            try:
+                await connection.send_json(progress_entry)
+            except Exception as e:
+                logger.error(f"Error sending progress to WebSocket: {str(e)}")
+
     def get_log_files(self) -> List[str]:
         """Get list of all log files."""
         try:
@@ -99,8 +120,34 @@ from agents.knowledge_extractor import KnowledgeExtractorAgent
 from agents.decision_maker import DecisionMakerAgent
 from agents.jd_analyzer import JDAnalyzerAgent
 from agents.pdf_parser import PDFParserAgent
-
-app = FastAPI(title="Resume Screening System")
+from agents.pdf_text import RESUME_MAX_PAGES, shutdown_pdf_pool
+from agents.text_extraction import SUPPORTED_EXTENSIONS, get_extraction_registry, sniff_format
+from agents.file_store import FileExistsWithOtherContent, get_file_store
+from agents.memory_budget import (MAX_DOCUMENT_BYTES, MAX_REQUEST_BYTES, DocumentTooLarge, check_document_sizes,
+                                  document_footprint, get_memory_budget)
+from agents.resilience import Deadline, DeadlineExceeded
+from agents.backend_pool import get_backend_pool
+from agents.model_router import get_model_router
+from agents.loop_monitor import get_loop_monitor
+from agents.profiling import COLLAPSED_SUFFIX, PSTATS_SUFFIX, ProfilerBusy, RequestProfiler
+from agents.text_profile import TextProfile, profile_text
+from agents.tracing import annotate, start_trace, to_chrome_trace, trace_span
+from agents.metrics import REGISTRY, DOCUMENTS_REJECTED, HTTP_IN_FLIGHT, HTTP_REQUEST_SECONDS, WEBSOCKET_CONNECTIONS
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Probe the LLM backends and watch the event loop for stalls while the server runs."""
+    pools = [get_backend_pool()] + [route.pool for route in get_model_router().routes.values() if route.pool]
+    for backend_pool in pools:
+        backend_pool.start_health_checks()
+    get_loop_monitor().start()
+    yield
+    await get_loop_monitor().stop()
+    for backend_pool in pools:
+        await backend_pool.stop_health_checks()
+    shutdown_pdf_pool()
+
+app = FastAPI(title="Resume Screening System", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -111,6 +158,35 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+@app.middleware("http")
+async def limit_request_size(request: Request, call_next):
+    """Reject request bodies above MAX_REQUEST_BYTES before any of it is parsed."""
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > MAX_REQUEST_BYTES:
+        DOCUMENTS_REJECTED.inc(reason="request_body")
+        return JSONResponse(status_code=413, content={
+            "detail": f"Request body exceeds the limit of {MAX_REQUEST_BYTES / 2**20:g} MB"})
+    return await call_next(request)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Track in-flight requests and request durations by route template."""
+    started = time.perf_counter()
+    status = "500"
+    with HTTP_IN_FLIGHT.track_inprogress():
+        try:
+            response = await call_next(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            route = request.scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=request.method,
+                route=getattr(route, "path", "unmatched"),
+                status=status
+            )
+
 # Initialize agents
 document_converter = DocumentConverterAgent()
 knowledge_extractor = KnowledgeExtractorAgent()
@@ -118,46 +194,38 @@ decision_maker = DecisionMakerAgent()
 jd_analyzer = JDAnalyzerAgent()
 pdf_parser = PDFParserAgent()
 
-async def convert_docx_to_pdf(file_content: bytes) -> str:
-    """Convert DOCX content to text directly."""
-    docx_file = io.BytesIO(file_content)
-    doc = Document(docx_file)
-    return "\n".join([paragraph.text for paragraph in doc.paragraphs])
+extraction_registry = get_extraction_registry()
+memory_budget = get_memory_budget()
 
-async def extract_text_from_pdf(pdf_content: bytes) -> str:
-    """Extract text from PDF content."""
+def upload_size(file: UploadFile) -> int:
+    """Size of an upload; parts above the multipart spool size are already on disk."""
+    if file.size is not None:
+        return file.size
+    size = file.file.seek(0, os.SEEK_END)
+    file.file.seek(0)
+    return size
+
+def check_sizes(sizes: Dict[str, int]):
+    """Reject documents above the per-document or per-request size limits with 413."""
     try:
-        # First try to use the external API parser
-        result = await pdf_parser.parse_pdf(pdf_content)
-        if isinstance(result, dict) and "text" in result:
-            return result["text"]
-        # If the API doesn't return text in expected format, log and fall back to PyPDF2
-        logger.info("External PDF parser didn't return text field, falling back to PyPDF2")
-    except Exception as e:
-        # Log the error and fall back to PyPDF2
-        logger.warning(f"Error using external PDF parser: {str(e)}. Falling back to PyPDF2")
-    
-    # Fall back to original PyPDF2 method
-    pdf_file = io.BytesIO(pdf_content)
-    reader = PyPDF2.PdfReader(pdf_file)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() + "\n"
-    return text
-
-async def process_file(file: UploadFile) -> str:
-    """Process uploaded file: convert if needed and extract text."""
-    content = await file.read()
-    
-    if file.filename.lower().endswith('.docx'):
-        # Convert DOCX directly to text
-        return await convert_docx_to_pdf(content)
-    
-    if file.filename.lower().endswith('.pdf'):
-        # Extract text from PDF
-        return await extract_text_from_pdf(content)
-    
-    raise ValueError(f"Unsupported file type: {file.filename}")
+        check_document_sizes(sizes)
+    except DocumentTooLarge as e:
+        DOCUMENTS_REJECTED.inc(reason="document" if e.limit == MAX_DOCUMENT_BYTES else "request")
+        raise HTTPException(status_code=413, detail=str(e))
+
+async def process_file(file: UploadFile, deadline: Optional[Deadline] = None, max_pages: int = 0) -> str:
+    """Process uploaded file: extract its text with the engine registry.
+
+    The upload is only read into memory once the memory budget admits it, and its bytes
+    and spooled file are released as soon as the text is extracted.
+    """
+    async with memory_budget.reserve(document_footprint(upload_size(file)), deadline):
+        try:
+            content = await file.read()
+            result = await extraction_registry.extract(content, file.filename, deadline, max_pages)
+        finally:
+            await file.close()
+    return result.text
 
 @app.post("/screen")
 async def screen_resumes(
@@ -165,46 +233,52 @@ async def screen_resumes(
     resume_files: List[UploadFile] = File(...)
 ) -> Dict[str, Any]:
     """Screen resumes against a job description."""
+    deadline = Deadline(SCREENING_DEADLINE_SECONDS)
     
     try:
-        # Validate file types
-        allowed_types = ['.pdf', '.docx']
-        if not any(jd_file.filename.lower().endswith(ext) for ext in allowed_types):
+        # Validate file types; the content is sniffed again when the text is extracted
+        allowed_types = list(SUPPORTED_EXTENSIONS)
+        if not jd_file.filename.lower().endswith(SUPPORTED_EXTENSIONS):
             raise HTTPException(status_code=400, detail=f"Job description file must be one of: {allowed_types}")
         
         for resume in resume_files:
-            if not any(resume.filename.lower().endswith(ext) for ext in allowed_types):
+            if not resume.filename.lower().endswith(SUPPORTED_EXTENSIONS):
                 raise HTTPException(status_code=400, detail=f"Resume file {resume.filename} must be one of: {allowed_types}")
+        check_sizes({f.filename: upload_size(f) for f in [jd_file, *resume_files]})
 
         # Log incoming files
         logger.info(f"Processing JD file: {jd_file.filename}")
         logger.info(f"Processing {len(resume_files)} resume files")
 
         # Process job description
-        jd_text = await process_file(jd_file)
+        jd_text = await process_file(jd_file, deadline)
         if not jd_text:
             raise HTTPException(status_code=400, detail="Could not extract text from job description file")
             
-        job_requirements = await jd_analyzer.process({"text": jd_text})
+        job_requirements = await jd_analyzer.process({"text": jd_text, "deadline": deadline})
         
         # Process resumes
         candidates = []
-        for resume_file in resume_files:
+        for index, resume_file in enumerate(resume_files):
+            if deadline.expired():
+                logger.warning(f"Screening deadline exceeded, skipping {len(resume_files) - index} remaining resumes")
+                break
             try:
                 logger.info(f"Processing resume: {resume_file.filename}")
                 # Convert and extract text from resume
-                resume_text = await process_file(resume_file)
+                resume_text = await process_file(resume_file, deadline, RESUME_MAX_PAGES)
                 if not resume_text:
                     logger.warning(f"Could not extract text from {resume_file.filename}")
                     continue
                 
                 # Extract information from resume
-                candidate_info = await knowledge_extractor.process({"text": resume_text})
+                candidate_info = await knowledge_extractor.process({"text": resume_text, "deadline": deadline})
                 
                 # Evaluate candidate
                 evaluation = await decision_maker.process({
                     "candidate_info": candidate_info,
-                    "job_requirements": job_requirements
+                    "job_requirements": job_requirements,
+                    "deadline": deadline
                 })
                 
                 candidates.append({
@@ -212,11 +286,16 @@ async def screen_resumes(
                     "candidate_info": candidate_info,
                     "evaluation": evaluation
                 })
+            except DeadlineExceeded:
+                logger.warning(f"Screening deadline exceeded while processing {resume_file.filename}")
+                break
             except Exception as e:
                 logger.error(f"Error processing {resume_file.filename}: {str(e)}")
                 continue
         
         if not candidates:
+            if deadline.expired():
+                raise HTTPException(status_code=504, detail="Screening deadline exceeded")
             raise HTTPException(status_code=400, detail="No valid resumes could be processed")
 
         # Sort candidates by overall score
@@ -228,6 +307,9 @@ async def screen_resumes(
         }
     except HTTPException as he:
         raise he
+    except DeadlineExceeded as e:
+        logger.error(f"Screening deadline exceeded: {str(e)}")
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.error(f"Error in screen_resumes: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -238,11 +320,11 @@ async def list_files():
     try:
         # Get JD files
         jd_files = [f for f in os.listdir(JD_DIR) 
-                   if f.lower().endswith(('.pdf', '.docx'))]
+                   if f.lower().endswith(SUPPORTED_EXTENSIONS)]
         
         # Get resume files
         resume_files = [f for f in os.listdir(RESUME_DIR) 
-                       if f.lower().endswith(('.pdf', '.docx'))]
+                       if f.lower().endswith(SUPPORTED_EXTENSIONS)]
         
         return {
             "jd_files": jd_files,
@@ -255,6 +337,10 @@ async def list_files():
 class ScreeningRequest(BaseModel):
     jd_filename: str
     resume_filenames: List[str]
+    batch_evaluation: bool = False  # Score several candidates per LLM call
+    deadline_seconds: Optional[float] = None  # Defaults to SCREENING_DEADLINE_SECONDS
+    trace: bool = False  # Attach a timing span tree to each candidate
+    profile: bool = False  # Store a CPU profile of this request next to the result
 
 class RenameRequest(BaseModel):
     new_name: str
@@ -315,6 +401,14 @@ screening_result = ScreeningResult()
 @app.post("/screen-from-assets")
 async def screen_resumes_from_assets(request: ScreeningRequest) -> Dict[str, Any]:
     """Screen resumes using files from assets directories."""
+    deadline = Deadline(request.deadline_seconds or SCREENING_DEADLINE_SECONDS)
+    profiler = None
+    if request.profile:
+        profiler = RequestProfiler()
+        try:
+            profiler.start()
+        except ProfilerBusy as e:
+            raise HTTPException(status_code=409, detail=str(e))
     try:
         await ws_logger.log(f"Starting screening process...")
         await ws_logger.log(f"Processing JD: {request.jd_filename}")
@@ -332,54 +426,104 @@ async def screen_resumes_from_assets(request: ScreeningRequest) -> Dict[str, Any
             if not os.path.exists(path):
                 await ws_logger.log(f"Resume file not found: {os.path.basename(path)}", "error")
                 raise HTTPException(status_code=404, detail=f"Resume file not found: {os.path.basename(path)}")
+        check_sizes({os.path.basename(path): os.path.getsize(path) for path in [jd_path, *resume_paths]})
         
         # Process JD
         try:
-            with open(jd_path, 'rb') as f:
-                jd_content = f.read()
-                await ws_logger.log(f"Reading JD file: {request.jd_filename}")
-                jd_text = await process_file_content(jd_content, request.jd_filename)
-                await ws_logger.log("Analyzing job requirements...")
-                job_requirements = await jd_analyzer.process({"text": jd_text})
-                await ws_logger.log("Successfully analyzed job requirements", "success")
-                await ws_logger.log(f"Job Requirements:\n{json.dumps(job_requirements, indent=2, ensure_ascii=False)}")
+            await ws_logger.log(f"Reading JD file: {request.jd_filename}")
+            jd_profile = await process_stored_file(jd_path, deadline)
+            await ws_logger.log("Analyzing job requirements...")
+            job_requirements = await jd_analyzer.process({
+                "text": jd_profile.text,
+                "profile": jd_profile,
+                "deadline": deadline
+            })
+            await ws_logger.log("Successfully analyzed job requirements", "success")
+            await ws_logger.log(f"Job Requirements:\n{json.dumps(job_requirements, indent=2, ensure_ascii=False)}")
+        except DeadlineExceeded as e:
+            await ws_logger.log(f"Screening deadline exceeded while processing JD: {str(e)}", "error")
+            raise HTTPException(status_code=504, detail=str(e))
         except Exception as e:
             await ws_logger.log(f"Error processing JD file: {str(e)}", "error")
             raise HTTPException(status_code=500, detail=f"Error processing JD file: {str(e)}")
         
         # Process resumes
         candidates = []
-        for resume_path in resume_paths:
+        skipped_resumes = []
+        for index, resume_path in enumerate(resume_paths):
+            if deadline.expired():
+                skipped_resumes = [os.path.basename(p) for p in resume_paths[index:]]
+                await ws_logger.log(f"Screening deadline exceeded, skipping {len(skipped_resumes)} remaining resumes", "error")
+                break
             try:
-                await ws_logger.log(f"Processing resume: {os.path.basename(resume_path)}")
-                with open(resume_path, 'rb') as f:
-                    resume_content = f.read()
-                    resume_text = await process_file_content(resume_content, os.path.basename(resume_path))
-                
-                await ws_logger.log(f"Extracting information from resume...")
-                candidate_info = await knowledge_extractor.process({"text": resume_text})
-                await ws_logger.log(f"Successfully extracted candidate information", "success")
-                await ws_logger.log(f"Candidate Information:\n{json.dumps(candidate_info, indent=2, ensure_ascii=False)}")
+                with start_trace(os.path.basename(resume_path), enabled=request.trace) as trace:
+                    await ws_logger.log(f"Processing resume: {os.path.basename(resume_path)}")
+                    resume_profile = await process_stored_file(resume_path, deadline, RESUME_MAX_PAGES)
                 
-                await ws_logger.log(f"Evaluating candidate...")
-                evaluation = await decision_maker.process({
-                    "candidate_info": candidate_info,
-                    "job_requirements": job_requirements
-                })
-                await ws_logger.log(f"Successfully evaluated candidate", "success")
-                await ws_logger.log(f"Evaluation Results:\n{json.dumps(evaluation, indent=2, ensure_ascii=False)}")
+                    await ws_logger.log(f"Extracting information from resume...")
+                    candidate_info = await knowledge_extractor.process({
+                        "text": resume_profile.text,
+                        "profile": resume_profile,
+                        "deadline": deadline
+                    })
+                    await ws_logger.log(f"Successfully extracted candidate information", "success")
+                    await ws_logger.log(f"Candidate Information:\n{json.dumps(candidate_info, indent=2, ensure_ascii=False)}")
                 
-                candidates.append({
+                    evaluation = None
+                    if not request.batch_evaluation:
+                        await ws_logger.log(f"Evaluating candidate...")
+
+                        async def publish_progress(field: str, value: Any, file_name: str = os.path.basename(resume_path)):
+                            await ws_logger.progress(file_name, "evaluation", field, value)
+
+                        evaluation = await decision_maker.process({
+                            "candidate_info": candidate_info,
+                            "job_requirements": job_requirements,
+                            "on_progress": publish_progress,
+                            "deadline": deadline
+                        })
+                        await ws_logger.log(f"Successfully evaluated candidate", "success")
+                        await ws_logger.log(f"Evaluation Results:\n{json.dumps(evaluation, indent=2, ensure_ascii=False)}")
+
+                candidate = {
                     "file_name": os.path.basename(resume_path),
                     "candidate_info": candidate_info,
                     "evaluation": evaluation
-                })
+                }
+                if trace:
+                    candidate["trace"] = trace.to_dict()
+                candidates.append(candidate)
+            except DeadlineExceeded:
+                skipped_resumes = [os.path.basename(p) for p in resume_paths[index:]]
+                await ws_logger.log(f"Screening deadline exceeded, skipping {len(skipped_resumes)} remaining resumes", "error")
+                break
             except Exception as e:
                 await ws_logger.log(f"Error processing resume {os.path.basename(resume_path)}: {str(e)}", "error")
                 continue
         
+        batch_trace = None
+        if request.batch_evaluation and candidates:
+            await ws_logger.log(f"Evaluating {len(candidates)} candidates in batches...")
+            try:
+                with start_trace("batch_evaluation", enabled=request.trace) as batch_trace:
+                    evaluations = await decision_maker.process_batch({
+                        "candidates": [c["candidate_info"] for c in candidates],
+                        "job_requirements": job_requirements,
+                        "deadline": deadline
+                    })
+                for candidate, evaluation in zip(candidates, evaluations):
+                    candidate["evaluation"] = evaluation
+                    await ws_logger.log(f"Evaluation Results for {candidate['file_name']}:\n{json.dumps(evaluation, indent=2, ensure_ascii=False)}")
+                await ws_logger.log(f"Successfully evaluated candidates", "success")
+            except DeadlineExceeded:
+                await ws_logger.log("Screening deadline exceeded during batch evaluation", "error")
+        
+        # Candidates still waiting for an evaluation when the deadline hit are dropped
+        candidates = [c for c in candidates if c["evaluation"] is not None]
         if not candidates:
             await ws_logger.log("No valid resumes could be processed", "error")
+            if deadline.expired():
+                raise HTTPException(status_code=504, detail="Screening deadline exceeded")
             raise HTTPException(status_code=400, detail="No valid resumes could be processed")
         
         candidates.sort(key=lambda x: x["evaluation"]["overall_score"], reverse=True)
@@ -389,6 +533,12 @@ async def screen_resumes_from_assets(request: ScreeningRequest) -> Dict[str, Any
             "candidates": candidates,
             "job_requirements": job_requirements
         }
+        if skipped_resumes:
+            result["skipped_resumes"] = skipped_resumes
+        if batch_trace:
+            result["batch_trace"] = batch_trace.to_dict()
+        if profiler:
+            result["profile"] = save_profile(profiler, request.jd_filename)
         
         # Save the result
         result_filename = screening_result.save_result(result, request.jd_filename)
@@ -397,30 +547,65 @@ async def screen_resumes_from_assets(request: ScreeningRequest) -> Dict[str, Any
         return result
     except HTTPException as he:
         raise he
+    except DeadlineExceeded as e:
+        await ws_logger.log(f"Screening deadline exceeded: {str(e)}", "error")
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         await ws_logger.log(f"Error in screening process: {str(e)}", "error")
         raise HTTPException(status_code=500, detail=str(e))
-
-async def process_file_content(content: bytes, filename: str) -> str:
-    """Process file content based on file extension."""
+    finally:
+        if profiler and profiler.running:
+            # Failed runs are worth profiling too; there is no result to link the profile from
+            profile = save_profile(profiler, request.jd_filename)
+            await ws_logger.log(f"Saved profile of the failed screening to: {profile['pstats']}")
+
+def save_profile(profiler: RequestProfiler, jd_filename: str) -> Dict[str, Any]:
+    """Store the profile of a screening run in the results directory."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    return profiler.save(RESULTS_DIR, f"profile_{timestamp}_{os.path.splitext(jd_filename)[0]}")
+
+async def process_stored_file(path: str, deadline: Optional[Deadline] = None, max_pages: int = 0) -> TextProfile:
+    """Read a stored document once the memory budget admits it and profile its text.
+
+    The bytes are dropped as soon as the text is extracted, before any LLM call.
+    """
+    digest = get_file_store(os.path.dirname(path)).digest_of(path)
+    async with memory_budget.reserve(document_footprint(os.path.getsize(path)), deadline):
+        with open(path, 'rb') as f:
+            content = f.read()
+        return await process_file_content(content, os.path.basename(path), deadline, max_pages, digest)
+
+async def process_file_content(content: bytes, filename: str, deadline: Optional[Deadline] = None,
+                               max_pages: int = 0, digest: Optional[str] = None) -> TextProfile:
+    """Extract the text of a file based on its content and profile it; max_pages caps PDF pages.
+
+    digest is the SHA-256 of content if the file store already knows it.
+    """
+    with trace_span("text_extraction", file=filename, bytes=len(content)):
+        return await _process_file_content(content, filename, deadline, max_pages, digest)
+
+async def _process_file_content(content: bytes, filename: str, deadline: Optional[Deadline] = None,
+                                max_pages: int = 0, digest: Optional[str] = None) -> TextProfile:
     try:
         await ws_logger.log(f"Processing file content for: {filename}")
-        if filename.lower().endswith('.docx'):
-            text = await convert_docx_to_pdf(content)
-        elif filename.lower().endswith('.pdf'):
-            text = await extract_text_from_pdf(content)
-        else:
-            raise ValueError(f"Unsupported file type: {filename}")
+        extraction = await extraction_registry.extract(content, filename, deadline, max_pages, digest=digest)
+        await ws_logger.log(f"Extracted {extraction.format} with {extraction.backend}"
+                            + (" (cached)" if extraction.cached else f" in {extraction.seconds:.2f}s"))
         
-        if not text:
+        profile = profile_text(extraction.text)
+        if not profile.text:
             await ws_logger.log(f"Failed to extract text from {filename}", "error")
             raise ValueError(f"Failed to extract text from {filename}")
+        annotate(chars=profile.chars, tokens=profile.tokens, language=profile.language)
             
         await ws_logger.log(f"Successfully processed file content for: {filename}", "success")
+        sections = ", ".join(s["name"] for s in profile.sections)
+        await ws_logger.log(f"Text profile: {profile.chars} chars, ~{profile.tokens} tokens, "
+                            f"language {profile.language}, sections: {sections}")
         # Log the first 200 characters of extracted text
-        preview = text#[:200] + "..." if len(text) > 200 else text
+        preview = profile.text#[:200] + "..." if len(text) > 200 else text
         await ws_logger.log(f"Extracted text preview:\n{preview}")
-        return text
+        return profile
     except Exception as e:
         await ws_logger.log(f"Error processing file content for {filename}: {str(e)}", "error")
         raise
@@ -437,14 +622,14 @@ async def upload_resume(file: UploadFile = File(...)):
 
 async def upload_file(file: UploadFile, directory: str):
     """Helper function to handle file uploads."""
-    if not file.filename.lower().endswith(('.pdf', '.docx')):
-        raise HTTPException(status_code=400, detail="Only PDF and DOCX files are allowed")
+    if not file.filename.lower().endswith(SUPPORTED_EXTENSIONS) or sniff_format(file.file, file.filename) is None:
+        raise HTTPException(status_code=400, detail="Only PDF, DOCX, text, Markdown and HTML files are allowed")
+    check_sizes({file.filename: upload_size(file)})
     
     try:
-        file_path = os.path.join(directory, file.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        return {"filename": file.filename}
+        return await get_file_store(directory).save(file.read, file.filename)
+    except FileExistsWithOtherContent as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error uploading file: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -494,6 +679,7 @@ async def rename_file(type: str, old_name: str, request: RenameRequest):
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
     active_connections.append(websocket)
+    WEBSOCKET_CONNECTIONS.set(len(active_connections))
     try:
         while True:
             # Keep the connection alive
@@ -502,16 +688,20 @@ async def websocket_endpoint(websocket: WebSocket):
         logger.error(f"WebSocket error: {str(e)}")
     finally:
         active_connections.remove(websocket)
+        WEBSOCKET_CONNECTIONS.set(len(active_connections))
 
 @app.post("/parse-pdf")
 async def parse_pdf(file: UploadFile = File(...)) -> Dict[str, Any]:
     """Parse PDF file using external API."""
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+    size = upload_size(file)
+    check_sizes({file.filename: size})
     
     try:
-        content = await file.read()
-        result = await pdf_parser.parse_pdf(content)
+        async with memory_budget.reserve(document_footprint(size)):
+            content = await file.read()
+            result = await pdf_parser.parse_pdf(content)
         return result
     except Exception as e:
         logger.error(f"Error parsing PDF: {str(e)}")
@@ -578,5 +768,72 @@ async def get_result(filename: str):
         logger.error(f"Error getting result: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/get-profile/{filename}")
+async def get_profile(filename: str, format: str = "pstats"):
+    """Download the CPU profile of a screening run as pstats or collapsed stacks.
+
+    filename is either the result file of a run screened with profile=true or the name
+    of a profile file itself.
+    """
+    if format not in ("pstats", "collapsed"):
+        raise HTTPException(status_code=400, detail="format must be pstats or collapsed")
+    filename = os.path.basename(filename)
+    if not filename.endswith((PSTATS_SUFFIX, COLLAPSED_SUFFIX)):
+        try:
+            result = screening_result.get_result(filename)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Result not found")
+        profile = result.get("result", {}).get("profile")
+        if not profile:
+            raise HTTPException(status_code=404, detail="Result has no profile; screen with profile=true")
+        filename = profile[format]
+    path = os.path.join(RESULTS_DIR, filename)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "text/plain" if filename.endswith(COLLAPSED_SUFFIX) else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=filename)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: stage and LLM latencies, fallbacks, tokens and in-flight requests."""
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/llm-backends")
+async def llm_backends():
+    """Health and latency of each LLM backend, and how calls were routed to models."""
+    backends = get_backend_pool().stats()
+    for route in get_model_router().routes.values():
+        if route.pool:
+            backends += route.pool.stats()
+    return {"backends": backends, "routing": get_model_router().stats()}
+
+@app.get("/extraction-engines")
+async def extraction_engines():
+    """Text extraction engines with their observed performance, the most recent files and the memory budget."""
+    return {**extraction_registry.stats(), "memory_budget": memory_budget.stats()}
+
+@app.get("/loop-lag")
+async def loop_lag(reset: bool = False):
+    """Event loop lag percentiles and the stacks of recent callbacks that blocked the loop."""
+    stats = get_loop_monitor().stats()
+    if reset:
+        get_loop_monitor().reset()
+    return stats
+
+@app.get("/get-trace/{filename}")
+async def get_trace(filename: str):
+    """Export the per-resume traces of a screening result in the Chrome trace event format."""
+    try:
+        result = screening_result.get_result(filename)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Result not found")
+    screening = result.get("result", {})
+    traces = [c["trace"] for c in screening.get("candidates", []) if c.get("trace")]
+    if screening.get("batch_trace"):
+        traces.append(screening["batch_trace"])
+    if not traces:
+        raise HTTPException(status_code=404, detail="Result has no traces; screen with trace=true")
+    return to_chrome_trace(traces)
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
@@ -0,0 +1,122 @@
+import asyncio
+import openai
+import pytest
+from agents import backend_pool
+from agents.backend_pool import BackendPool, parse_base_urls
+
+def _server_error(status_code=502):
+    error = openai.InternalServerError.__new__(openai.InternalServerError)
+    error.status_code = status_code
+    return error
+
+@pytest.fixture
+def pool():
+    return BackendPool(["http://llm-a.invalid/v1", "http://llm-b.invalid/v1"], health_check_interval=0)
+
+def test_parse_base_urls():
+    """Test parsing of the comma-separated backend list."""
+    assert parse_base_urls(" http://a/v1/, http://b/v1 ,") == ["http://a/v1", "http://b/v1"]
+
+@pytest.mark.asyncio
+async def test_routes_to_least_outstanding(pool):
+    """Test that concurrent requests are spread over the backends."""
+    async with pool.backend() as first:
+        async with pool.backend() as second:
+            assert first is not second
+    assert all(b.outstanding == 0 for b in pool.backends)
+
+@pytest.mark.asyncio
+async def test_ejects_after_consecutive_failures(pool):
+    """Test that a backend is ejected after repeated failures and skipped afterwards."""
+    bad = pool.backends[0]
+    for _ in range(backend_pool.EJECT_AFTER_FAILURES):
+        with pytest.raises(openai.InternalServerError):
+            async with pool.backend():
+                pool.backends[1].outstanding += 1  # keep the bad backend preferred
+                try:
+                    raise _server_error()
+                finally:
+                    pool.backends[1].outstanding -= 1
+    assert not bad.healthy
+    for _ in range(3):
+        async with pool.backend() as backend:
+            assert backend is pool.backends[1]
+
+@pytest.mark.asyncio
+async def test_client_errors_do_not_eject(pool):
+    """Test that request errors (4xx) are not blamed on the backend."""
+    for _ in range(backend_pool.EJECT_AFTER_FAILURES + 1):
+        with pytest.raises(ValueError):
+            async with pool.backend():
+                raise ValueError("bad request")
+    assert all(b.healthy for b in pool.backends)
+
+@pytest.mark.asyncio
+async def test_probe_readmits_backend(pool, monkeypatch):
+    """Test that a passing health check re-admits an ejected backend."""
+    backend = pool.backends[0]
+    backend.eject("test")
+
+    async def fake_list():
+        return []
+
+    monkeypatch.setattr(backend.client.models, "list", fake_list)
+    assert await pool.probe(backend)
+    assert backend.healthy
+
+@pytest.mark.asyncio
+async def test_probe_failure_ejects_backend(pool, monkeypatch):
+    """Test that a failing health check ejects the backend."""
+    backend = pool.backends[1]
+
+    async def fake_list():
+        raise ConnectionError("down")
+
+    monkeypatch.setattr(backend.client.models, "list", fake_list)
+    assert not await pool.probe(backend)
+    assert not backend.healthy
+
+@pytest.mark.asyncio
+async def test_ejected_backend_gets_trial_after_cooldown(pool, monkeypatch):
+    """Test that a successful trial request after the cooldown re-admits the backend."""
+    backend = pool.backends[0]
+    backend.eject("test")
+    monkeypatch.setattr(backend_pool, "EJECTION_COOLDOWN", 0.0)
+    pool.backends[1].outstanding += 1
+    async with pool.backend() as chosen:
+        assert chosen is backend
+    pool.backends[1].outstanding -= 1
+    assert backend.healthy
+
+@pytest.mark.asyncio
+async def test_stats_report_latency(pool):
+    """Test that per-backend stats include request counts and latency percentiles."""
+    async with pool.backend():
+        await asyncio.sleep(0.01)
+    stats = {s["base_url"]: s for s in pool.stats()}
+    used = [s for s in stats.values() if s["requests"]]
+    assert len(used) == 1
+    assert used[0]["latency_p50"] >= 0.01
+    assert used[0]["healthy"]
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_per_backend():
+    """Test that every replica adds its own request slots."""
+    pool = BackendPool(["http://llm-a.invalid/v1", "http://llm-b.invalid/v1"], health_check_interval=0,
+                       max_concurrency=1)
+    async with pool.backend() as first, pool.backend() as second:
+        assert first is not second
+        third = asyncio.create_task(pool.backend().__aenter__())
+        await asyncio.sleep(0.01)
+        assert not third.done()
+    await asyncio.wait_for(third, timeout=1)
+
+@pytest.mark.asyncio
+async def test_overload_backs_off_one_backend(pool):
+    """Test that a 429 shrinks only the limit of the replica that returned it."""
+    with pytest.raises(openai.InternalServerError):
+        async with pool.backend() as overloaded:
+            raise _server_error(503)
+    other = next(b for b in pool.backends if b is not overloaded)
+    assert int(overloaded.concurrency.limit) < int(other.concurrency.limit)
+    assert {s["base_url"]: s["concurrency_limit"] for s in pool.stats()}[other.base_url] == other.concurrency.max_limit
@@ -0,0 +1,97 @@
+import json
+import pytest
+from agents.chunking import merge_results, split_text
+from agents.jd_analyzer import JDAnalyzerAgent
+from agents.knowledge_extractor import KnowledgeExtractorAgent
+from agents.prompt_builder import estimate_tokens
+
+def make_cv(publications=40):
+    lines = ["Dr. Jane Roe", "Professor of Computer Science", "Experience"]
+    lines += [f"Lab {i} | Research Scientist | {2000 + i}-{2001 + i}" for i in range(5)]
+    lines += ["Publications"]
+    lines += [f"{i}. Roe J. et al. A study of distributed consensus, part {i}. Journal of Systems, {1990 + i}."
+              for i in range(publications)]
+    lines += ["Skills", "Python, C++, TLA+"]
+    return "\n".join(lines)
+
+def test_short_text_is_one_chunk():
+    """Test that text below the threshold is not split."""
+    assert split_text("Skills\nPython", max_tokens=100) == ["Skills\nPython"]
+
+def test_split_on_section_boundaries():
+    """Test that chunks stay within the limit and whole sections are kept together."""
+    text = make_cv()
+    chunks = split_text(text, max_tokens=300)
+    assert len(chunks) > 2
+    assert all(estimate_tokens(chunk) <= 300 for chunk in chunks)
+    assert chunks[0].endswith("Lab 4 | Research Scientist | 2004-2005")
+    assert chunks[-1].endswith("Skills\nPython, C++, TLA+")
+    # The long publication list is split at line boundaries and its heading repeated
+    assert all(chunk.startswith("Publications\n") for chunk in chunks[1:])
+    lines = [line for chunk in chunks for line in chunk.split("\n") if line != "Publications"]
+    assert lines == [line for line in text.split("\n") if line != "Publications"]
+
+def test_split_long_line():
+    """Test that a line longer than a chunk is cut into slices."""
+    chunks = split_text("技" * 250, max_tokens=100)
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
+
+def test_merge_deduplicates():
+    """Test that skills, experiences and projects found in several chunks are merged once."""
+    merged = merge_results([
+        {"summary": "Researcher", "skills": ["Python", "C++"],
+         "experience": [{"company": "Lab 4", "title": "Scientist", "duration": "2004-2005",
+                         "responsibilities": ["Consensus"]}],
+         "basic_info": {"name": "Jane Roe"}},
+        {"summary": "Ignored", "skills": ["python", "TLA+", "TLA+"],
+         "experience": [{"company": "lab 4", "title": "Scientist", "duration": "2004 - 2005",
+                         "responsibilities": ["Teaching"]}],
+         "projects": [{"name": "Raft"}, {"name": "raft", "role": "Lead"}],
+         "basic_info": {"name": "", "location": "Boston"}},
+    ])
+    assert merged["summary"] == "Researcher"
+    assert merged["skills"] == ["Python", "C++", "TLA+"]
+    assert merged["experience"] == [{"company": "Lab 4", "title": "Scientist", "duration": "2004-2005",
+                                     "responsibilities": ["Consensus", "Teaching"]}]
+    assert merged["projects"] == [{"name": "Raft", "role": "Lead"}]
+    assert merged["basic_info"] == {"name": "Jane Roe", "location": "Boston"}
+
+@pytest.mark.asyncio
+async def test_long_resume_is_extracted_in_chunks(monkeypatch):
+    """Test that a long resume without sectioned plan is extracted chunk by chunk and merged."""
+    monkeypatch.setattr("agents.knowledge_extractor.CHUNKED_EXTRACTION_MAX_TOKENS", 300)
+    monkeypatch.setattr("agents.sectionizer.SECTIONED_EXTRACTION", False)
+    agent = KnowledgeExtractorAgent()
+    texts = []
+
+    async def fake_extract_fields(text, language, fields, deadline=None):
+        texts.append(text)
+        return {"skills": ["Python"], "experience": [{"company": f"Lab {len(texts)}"}]}
+
+    agent.llm_client.extract_fields = fake_extract_fields
+    result = await agent.process({"text": make_cv()})
+    assert len(texts) > 2
+    assert result["skills"] == ["Python"]
+    assert len(result["experience"]) == len(texts)
+
+@pytest.mark.asyncio
+async def test_long_jd_is_analyzed_in_chunks(monkeypatch):
+    """Test that a long JD is analyzed per chunk and a chunk with invalid JSON is skipped."""
+    monkeypatch.setattr("agents.jd_analyzer.CHUNKED_EXTRACTION_MAX_TOKENS", 300)
+    agent = JDAnalyzerAgent()
+    text = "\n".join(["Senior Engineer", "Responsibilities"] + [f"- Own service {i} end to end" for i in range(60)]
+                     + ["Requirements"] + [f"- Experience with system {i}" for i in range(60)])
+    calls = []
+
+    async def fake_call_llm(prompt, deadline=None, route=None):
+        calls.append(prompt)
+        if len(calls) == 2:
+            return "not json"
+        return json.dumps({"job_title": "Senior Engineer" if len(calls) == 1 else "",
+                           "required_skills": ["Go", "go", "Kafka"]})
+
+    monkeypatch.setattr(agent.llm_client, "_call_llm", fake_call_llm)
+    result = await agent.process({"text": text})
+    assert len(calls) > 2
+    assert result["job_title"] == "Senior Engineer"
+    assert result["required_skills"] == ["Go", "Kafka"]
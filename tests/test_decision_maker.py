@@ -1,5 +1,10 @@
+import json
+import httpx
+import openai
 import pytest
-from agents.decision_maker import DecisionMakerAgent
+from agents.decision_maker import BATCH_PROMPT_BUDGET, DecisionMakerAgent, MAX_BATCH_SIZE
+from agents.prompt_builder import compact_json, estimate_tokens
+from agents.resilience import DeadlineExceeded
 
 @pytest.fixture
 def decision_maker():
@@ -121,4 +126,150 @@ async def test_generate_recommendation(decision_maker):
     ]
     
     assert all(isinstance(r, str) for r in recommendations)
-    assert len(set(recommendations)) > 1  # Different scores should yield different recommendations 
\ No newline at end of file
+    assert len(set(recommendations)) > 1  # Different scores should yield different recommendations
+
+
+def _batch_entry(candidate_id, score):
+    return {
+        "candidate_id": candidate_id,
+        "scores": {"skills_match": score, "experience_match": score, "education_match": score},
+        "analysis": {"overall_analysis": "ok"},
+        "overall_score": score,
+        "recommendation": "Good Match - Recommended"
+    }
+
+@pytest.mark.asyncio
+async def test_process_batch_single_call(decision_maker, sample_candidate_info, sample_job_requirements, monkeypatch):
+    """Test that a small batch is evaluated in one LLM call with a shared JD header."""
+    prompts = []
+
+    async def fake_call_llm(prompt, deadline=None, route=None):
+        prompts.append(prompt)
+        return json.dumps({"results": [_batch_entry(1, 0.4), _batch_entry(0, 1.5)]})
+
+    monkeypatch.setattr(decision_maker.llm_client, "_call_llm", fake_call_llm)
+    evaluations = await decision_maker.process_batch({
+        "candidates": [sample_candidate_info, sample_candidate_info],
+        "job_requirements": sample_job_requirements
+    })
+
+    assert len(prompts) == 1
+    assert prompts[0].count("required_skills") == 1
+    assert [e["overall_score"] for e in evaluations] == [1.0, 0.4]
+
+@pytest.mark.asyncio
+async def test_process_batch_falls_back_per_candidate(decision_maker, sample_candidate_info, sample_job_requirements, monkeypatch):
+    """Test that only candidates with missing or malformed results are re-evaluated."""
+    prompts = []
+
+    async def fake_call_llm(prompt, deadline=None, route=None):
+        prompts.append(prompt)
+        if len(prompts) == 1:
+            malformed = _batch_entry(2, 0.3)
+            del malformed["recommendation"]
+            return json.dumps({"results": [_batch_entry(0, 0.9), malformed]})
+        entry = _batch_entry(0, 0.5)
+        del entry["candidate_id"]
+        return json.dumps(entry)
+
+    monkeypatch.setattr(decision_maker.llm_client, "_call_llm", fake_call_llm)
+    evaluations = await decision_maker.process_batch({
+        "candidates": [sample_candidate_info] * 3,
+        "job_requirements": sample_job_requirements
+    })
+
+    assert len(prompts) == 3
+    assert [e["overall_score"] for e in evaluations] == [0.9, 0.5, 0.5]
+
+@pytest.mark.asyncio
+async def test_process_batch_survives_failing_single_fallback(decision_maker, sample_candidate_info,
+                                                              sample_job_requirements, monkeypatch):
+    """Test that a failing single re-evaluation yields the default evaluation for that candidate only."""
+    calls = []
+
+    async def fake_call_llm(prompt, deadline=None, route=None):
+        calls.append(prompt)
+        if len(calls) == 1:
+            raise RuntimeError("batch call failed")
+        if len(calls) == 2:
+            raise openai.APITimeoutError(request=httpx.Request("POST", "http://llm.invalid"))
+        entry = _batch_entry(0, 0.7)
+        del entry["candidate_id"]
+        return json.dumps(entry)
+
+    monkeypatch.setattr(decision_maker.llm_client, "_call_llm", fake_call_llm)
+    evaluations = await decision_maker.process_batch({
+        "candidates": [sample_candidate_info] * 2,
+        "job_requirements": sample_job_requirements
+    })
+
+    assert len(calls) == 3
+    assert evaluations[0] == decision_maker._default_evaluation()
+    assert evaluations[1]["overall_score"] == 0.7
+
+@pytest.mark.asyncio
+async def test_process_batch_raises_deadline_from_fallback(decision_maker, sample_candidate_info,
+                                                           sample_job_requirements, monkeypatch):
+    """Test that the deadline still ends a batch evaluation during the single fallback."""
+    calls = []
+
+    async def fake_call_llm(prompt, deadline=None, route=None):
+        calls.append(prompt)
+        if len(calls) == 1:
+            return json.dumps({"results": []})
+        raise DeadlineExceeded("deadline")
+
+    monkeypatch.setattr(decision_maker.llm_client, "_call_llm", fake_call_llm)
+    with pytest.raises(DeadlineExceeded):
+        await decision_maker.process_batch({
+            "candidates": [sample_candidate_info],
+            "job_requirements": sample_job_requirements
+        })
+
+def test_plan_batches_respects_budget(decision_maker, sample_candidate_info, sample_job_requirements):
+    """Test that batch size is bounded by the token budgets."""
+    requirements = decision_maker._render_requirements(sample_job_requirements)
+    batches = decision_maker._plan_batches([sample_candidate_info] * 20, requirements)
+    assert sum(len(b) for b in batches) == 20
+    assert all(len(b) <= MAX_BATCH_SIZE for b in batches)
+    assert [index for batch in batches for index, _ in batch] == list(range(20))
+
+@pytest.mark.asyncio
+async def test_process_batch_fits_oversized_job_requirements(decision_maker, sample_candidate_info,
+                                                             sample_job_requirements, monkeypatch):
+    """Test that job requirements over the prompt budget are cut instead of the candidate profiles."""
+    sample_job_requirements["responsibilities"] = [f"Maintain service number {i} in production" for i in range(3000)]
+    assert estimate_tokens(compact_json(sample_job_requirements)) > BATCH_PROMPT_BUDGET
+    prompts = []
+
+    async def fake_call_llm(prompt, deadline=None, route=None):
+        prompts.append(prompt)
+        return json.dumps({"results": [_batch_entry(0, 0.8), _batch_entry(1, 0.6)]})
+
+    monkeypatch.setattr(decision_maker.llm_client, "_call_llm", fake_call_llm)
+    evaluations = await decision_maker.process_batch({
+        "candidates": [sample_candidate_info] * 2,
+        "job_requirements": sample_job_requirements
+    })
+
+    assert len(prompts) == 1 and estimate_tokens(prompts[0]) <= BATCH_PROMPT_BUDGET
+    assert prompts[0].count(compact_json(sample_candidate_info)) == 2
+    assert [e["overall_score"] for e in evaluations] == [0.8, 0.6]
+
+@pytest.mark.asyncio
+async def test_prompt_prefix_is_stable_across_candidates(decision_maker, sample_candidate_info, sample_job_requirements, monkeypatch):
+    """Test that instructions, schema and job requirements form a shared prompt prefix."""
+    prompts = []
+
+    async def fake_call_llm(prompt, deadline=None, route=None):
+        prompts.append(prompt)
+        return json.dumps(_batch_entry(0, 0.5))
+
+    monkeypatch.setattr(decision_maker.llm_client, "_call_llm", fake_call_llm)
+    other_candidate = dict(sample_candidate_info, skills=["Go"])
+    for candidate_info in (sample_candidate_info, other_candidate):
+        await decision_maker.process({"candidate_info": candidate_info, "job_requirements": sample_job_requirements})
+
+    shared = prompts[0][:prompts[0].index("候选人信息：")]
+    assert prompts[1].startswith(shared)
+    assert "overall_score" in shared and "required_skills" in shared
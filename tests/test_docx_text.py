@@ -0,0 +1,48 @@
+import io
+from docx import Document
+from docx.enum.text import WD_TAB_ALIGNMENT
+from agents.docx_text import extract_docx_text, iter_docx_lines
+from benchmarks.corpus import docx_bytes
+from benchmarks.extraction_bench import legacy_python_docx
+
+def save(document):
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+def test_paragraphs_match_python_docx():
+    """Test that paragraph text matches python-docx, including tabs and breaks."""
+    document = Document()
+    document.add_paragraph("张三 | 后端工程师")
+    paragraph = document.add_paragraph("Skills:\tPython")
+    paragraph.paragraph_format.tab_stops.add_tab_stop(914400, WD_TAB_ALIGNMENT.RIGHT)
+    paragraph.add_run(", Go").add_break()
+    document.add_paragraph("")
+    content = save(document)
+    assert extract_docx_text(content) == legacy_python_docx(content) == "张三 | 后端工程师\nSkills:\tPython, Go\n\n"
+
+def test_tables_in_document_order():
+    """Test that table rows are extracted between the paragraphs around them."""
+    content = docx_bytes(["教育背景"], table_rows=[["学校", "专业", "年份"], ["浙江大学", "计算机科学", "2018"]])
+    assert extract_docx_text(content) == "教育背景\n学校 | 专业 | 年份\n浙江大学 | 计算机科学 | 2018"
+    assert "浙江大学" not in legacy_python_docx(content)
+
+def test_nested_table_and_multi_paragraph_cell():
+    """Test that nested tables and cell paragraphs become part of their cell."""
+    document = Document()
+    table = document.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = "工作经历"
+    cell = table.cell(0, 1)
+    cell.text = "腾讯"
+    cell.add_paragraph("后端工程师")
+    inner = cell.add_table(rows=1, cols=2)
+    inner.cell(0, 0).text = "2020"
+    inner.cell(0, 1).text = "2023"
+    document.add_paragraph("End")
+    assert list(iter_docx_lines(save(document))) == ["工作经历 | 腾讯 后端工程师 2020 | 2023", "End"]
+
+def test_reads_paths(tmp_path):
+    """Test that files are read from a path as well."""
+    path = tmp_path / "resume.docx"
+    path.write_bytes(docx_bytes(["Jane Doe", "Engineer"]))
+    assert extract_docx_text(str(path)) == "Jane Doe\nEngineer"
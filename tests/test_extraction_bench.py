@@ -0,0 +1,27 @@
+from benchmarks.corpus import generate_extraction_corpus
+from benchmarks.extraction_bench import find_regressions, run_worker
+
+def test_worker_measures_extraction(tmp_path):
+    """Test that a worker run reports timing, memory and text length."""
+    documents = generate_extraction_corpus(str(tmp_path), page_counts=[2], kinds=["text"])
+    pdf = next(d for d in documents if d["format"] == "pdf")
+    result = run_worker("document_converter_pdf", pdf["path"], repeat=1)
+    assert result["seconds"] > 0
+    assert result["text_length"] > 1000
+    assert result["peak_rss_mb"] > 0
+
+def test_find_regressions():
+    """Test that only slowdowns beyond the tolerance and the noise floor are reported."""
+    baseline = {"results": [
+        {"backend": "pypdf2", "file": "a.pdf", "seconds": 0.1},
+        {"backend": "pypdf2", "file": "b.pdf", "seconds": 0.001},
+        {"backend": "pypdf2", "file": "c.pdf", "seconds": 0.1},
+    ]}
+    results = [
+        {"backend": "pypdf2", "file": "a.pdf", "seconds": 0.2},
+        {"backend": "pypdf2", "file": "b.pdf", "seconds": 0.002},
+        {"backend": "pypdf2", "file": "c.pdf", "seconds": 0.11},
+    ]
+    regressions = find_regressions(results, baseline, tolerance=0.25)
+    assert [r["file"] for r in regressions] == ["a.pdf"]
+    assert regressions[0]["slowdown"] == 1.0
@@ -0,0 +1,82 @@
+import hashlib
+import io
+import os
+import pytest
+from agents import file_store
+from agents.file_store import FileExistsWithOtherContent, FileStore
+
+def reader(content):
+    stream = io.BytesIO(content)
+
+    async def read(size):
+        return stream.read(size)
+    return read
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_store, "UPLOAD_CHUNK_BYTES", 4)
+    return FileStore(str(tmp_path))
+
+@pytest.mark.asyncio
+async def test_streams_and_hashes(store, tmp_path):
+    """Test that an upload is written in chunks with its SHA-256 and no temp file is left."""
+    content = b"Jane Doe, Python engineer"
+    result = await store.save(reader(content), "resume.pdf")
+    assert result == {"filename": "resume.pdf", "sha256": hashlib.sha256(content).hexdigest(),
+                      "deduplicated": False, "bytes": len(content)}
+    assert (tmp_path / "resume.pdf").read_bytes() == content
+    assert os.listdir(tmp_path) == ["resume.pdf"]
+    assert store.digest_of(str(tmp_path / "resume.pdf")) == result["sha256"]
+
+@pytest.mark.asyncio
+async def test_identical_content_is_linked(store, tmp_path):
+    """Test that content stored before, also outside the store, is hard linked."""
+    (tmp_path / "existing.pdf").write_bytes(b"same bytes")
+    result = await store.save(reader(b"same bytes"), "copy.pdf")
+    assert result["deduplicated"] and result["linked_to"] == "existing.pdf"
+    assert os.path.samefile(tmp_path / "existing.pdf", tmp_path / "copy.pdf")
+    assert store.digest_of(str(tmp_path / "copy.pdf")) == hashlib.sha256(b"same bytes").hexdigest()
+
+@pytest.mark.asyncio
+async def test_same_name(store, tmp_path):
+    """Test that re-uploading a file is accepted and different content under its name is refused."""
+    await store.save(reader(b"first"), "resume.pdf")
+    assert (await store.save(reader(b"first"), "resume.pdf"))["deduplicated"]
+    with pytest.raises(FileExistsWithOtherContent):
+        await store.save(reader(b"second"), "resume.pdf")
+    assert (tmp_path / "resume.pdf").read_bytes() == b"first"
+    assert os.listdir(tmp_path) == ["resume.pdf"]
+
+@pytest.mark.asyncio
+async def test_failed_upload_leaves_nothing(store, tmp_path):
+    """Test that an upload broken off midway leaves neither the file nor a temp file."""
+    async def read(size):
+        raise ConnectionResetError("client went away")
+    with pytest.raises(ConnectionResetError):
+        await store.save(read, "resume.pdf")
+    assert os.listdir(tmp_path) == []
+
+@pytest.mark.asyncio
+async def test_path_components_are_dropped(store, tmp_path):
+    """Test that an upload cannot be written outside the directory."""
+    result = await store.save(reader(b"content"), "../../resume.pdf")
+    assert result["filename"] == "resume.pdf" and (tmp_path / "resume.pdf").exists()
+
+@pytest.mark.asyncio
+async def test_directory_is_hashed_once(store, tmp_path, monkeypatch):
+    """Test that the directory is scanned on the first commit only, and stale entries are skipped."""
+    (tmp_path / "a.pdf").write_bytes(b"a")
+    (tmp_path / "b.pdf").write_bytes(b"b")
+    scans, hashed = [], []
+    scandir, hash_file = os.scandir, file_store.hash_file
+    monkeypatch.setattr(file_store.os, "scandir", lambda path: scans.append(path) or scandir(path))
+    monkeypatch.setattr(file_store, "hash_file", lambda path: hashed.append(path) or hash_file(path))
+    await store.save(reader(b"c"), "c.pdf")
+    await store.save(reader(b"d"), "d.pdf")
+    assert len(scans) == 1 and len(hashed) == 2
+    assert (await store.save(reader(b"c"), "e.pdf"))["linked_to"] == "c.pdf"
+    os.remove(tmp_path / "a.pdf")
+    result = await store.save(reader(b"a"), "f.pdf")
+    assert not result["deduplicated"] and (tmp_path / "f.pdf").read_bytes() == b"a"
+    assert (await store.save(reader(b"a"), "g.pdf"))["linked_to"] == "f.pdf"
+    assert len(scans) == 1 and len(hashed) == 2
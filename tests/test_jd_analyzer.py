@@ -120,4 +120,21 @@ async def test_extract_skills(jd_analyzer):
     """Test skill extraction from task."""
     task_text = "Design and implement scalable microservices using Python and Docker"
     skills = await jd_analyzer._extract_skills(task_text)
-    assert isinstance(skills, list) 
\ No newline at end of file
+    assert isinstance(skills, list)
+
+
+@pytest.mark.asyncio
+async def test_prompt_places_jd_text_last(jd_analyzer, sample_jd_text, monkeypatch):
+    """Test that the JD text follows the static instructions so the prefix can be cached."""
+    prompts = []
+
+    async def fake_call_llm(prompt, deadline=None, route=None):
+        prompts.append(prompt)
+        return '{"job_title": "Senior Software Engineer"}'
+
+    monkeypatch.setattr(jd_analyzer.llm_client, "_call_llm", fake_call_llm)
+    result = await jd_analyzer.process({"text": sample_jd_text})
+
+    assert result["job_title"] == "Senior Software Engineer"
+    assert prompts[0].index("additional_requirements") < prompts[0].index("Senior Software Engineer")
+    assert prompts[0].rstrip().endswith("Location: Remote")
@@ -0,0 +1,41 @@
+import json
+import pytest
+from agents.json_stream import IncrementalJSONParser, parse_json_response
+
+@pytest.fixture
+def evaluation_text():
+    return json.dumps({
+        "scores": {"skills_match": 0.8, "experience_match": 0.6},
+        "analysis": {"overall_analysis": '包含 } 和 " 的分析'},
+        "overall_score": 0.75,
+        "recommendation": "Good Match - Recommended"
+    }, ensure_ascii=False)
+
+def test_fields_published_in_order(evaluation_text):
+    """Test that each top-level field is published once it is complete."""
+    parser = IncrementalJSONParser()
+    published = []
+    for i in range(0, len(evaluation_text), 3):
+        published.extend(key for key, _ in parser.feed(evaluation_text[i:i + 3]))
+
+    assert published == ["scores", "analysis", "overall_score", "recommendation"]
+    assert parser.done
+    assert json.loads(parser.text()) == json.loads(evaluation_text)
+
+def test_scalar_waits_for_delimiter():
+    """Test that numbers are only published when the following delimiter arrives."""
+    parser = IncrementalJSONParser()
+    assert parser.feed('Sure! {"overall_score": 0.7') == []
+    assert parser.feed('5, "recommendation": "Strong') == [("overall_score", 0.75)]
+    assert parser.feed(' Match"') == [("recommendation", "Strong Match")]
+    assert not parser.done
+
+def test_parse_json_response_ignores_surrounding_text():
+    """Test that prose after the object (even with braces) does not break parsing."""
+    response = 'Here you go:\n{"job_title": "Engineer"}\nNote: fields in {} are optional.'
+    assert parse_json_response(response) == {"job_title": "Engineer"}
+
+def test_parse_json_response_invalid():
+    """Test that a response without JSON raises JSONDecodeError."""
+    with pytest.raises(json.JSONDecodeError):
+        parse_json_response("no json here")
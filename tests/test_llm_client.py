@@ -0,0 +1,97 @@
+import asyncio
+import json
+import pytest
+from types import SimpleNamespace
+from agents.backend_pool import BackendPool
+from agents.llm_client import LlamaClient
+from agents.resilience import Deadline, DeadlineExceeded, RetryPolicy
+
+class FakeStream:
+    """Async iterator mimicking an OpenAI chat completion stream."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.consumed = 0
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.consumed >= len(self.chunks):
+            raise StopAsyncIteration
+        text = self.chunks[self.consumed]
+        self.consumed += 1
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+    async def close(self):
+        self.closed = True
+
+@pytest.fixture
+def llm_client():
+    return LlamaClient(pool=BackendPool(["http://llm.invalid/v1"]))
+
+def _install_stream(llm_client, monkeypatch, chunks):
+    stream = FakeStream(chunks)
+
+    async def fake_create(**kwargs):
+        assert kwargs["stream"] is True
+        return stream
+
+    monkeypatch.setattr(llm_client.pool.backends[0].client.chat.completions, "create", fake_create)
+    return stream
+
+@pytest.mark.asyncio
+async def test_stream_llm_publishes_fields(llm_client, monkeypatch):
+    """Test that fields are published while streaming and the JSON text is returned."""
+    stream = _install_stream(llm_client, monkeypatch, ['{"overall_', 'score": 0.8,', ' "recommendation": "Go"}', " trailing"])
+    published = []
+
+    async def on_field(key, value):
+        published.append((key, value))
+
+    response = await llm_client._stream_llm("prompt", on_field=on_field)
+
+    assert published == [("overall_score", 0.8), ("recommendation", "Go")]
+    assert json.loads(response) == {"overall_score": 0.8, "recommendation": "Go"}
+    assert stream.consumed == 3
+    assert stream.closed
+
+@pytest.mark.asyncio
+async def test_stream_llm_aborts_when_required_fields_parsed(llm_client, monkeypatch):
+    """Test that generation stops as soon as all required fields are parsed."""
+    stream = _install_stream(llm_client, monkeypatch, ['{"overall_score": 0.8, ', '"recommendation": "Go", ', '"extra": "x"}'])
+
+    response = await llm_client._stream_llm("prompt", required_fields={"overall_score", "recommendation"})
+
+    assert json.loads(response) == {"overall_score": 0.8, "recommendation": "Go"}
+    assert stream.consumed == 2
+    assert stream.closed
+
+@pytest.mark.asyncio
+async def test_call_llm_retries_transient_errors(monkeypatch):
+    """Test that a transient failure is retried and the second attempt succeeds."""
+    llm_client = LlamaClient(retry_policy=RetryPolicy(max_attempts=3, base_delay=0.01),
+                             pool=BackendPool(["http://llm.invalid/v1"]))
+    calls = []
+
+    async def fake_create(**kwargs):
+        calls.append(kwargs["timeout"])
+        if len(calls) == 1:
+            raise asyncio.TimeoutError()
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))])
+
+    monkeypatch.setattr(llm_client.pool.backends[0].client.chat.completions, "create", fake_create)
+    assert await llm_client._call_llm("prompt", deadline=Deadline(5)) == "ok"
+    assert len(calls) == 2
+    assert all(timeout <= 5 for timeout in calls)
+
+@pytest.mark.asyncio
+async def test_call_llm_respects_deadline(llm_client, monkeypatch):
+    """Test that no request is sent once the deadline has passed."""
+    async def fake_create(**kwargs):
+        raise AssertionError("LLM must not be called after the deadline")
+
+    monkeypatch.setattr(llm_client.pool.backends[0].client.chat.completions, "create", fake_create)
+    with pytest.raises(DeadlineExceeded):
+        await llm_client._call_llm("prompt", deadline=Deadline(0))
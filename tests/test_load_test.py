@@ -0,0 +1,25 @@
+import os
+from benchmarks.corpus import generate_corpus
+from benchmarks.load_test import compare, percentile, summarize
+
+def test_generate_corpus_is_reused(tmp_path):
+    """Test that a corpus is generated once per set of parameters."""
+    manifest = generate_corpus(str(tmp_path), num_jds=1, num_resumes=4, num_results=3, docx_ratio=0.5, seed=1)
+    assert len(os.listdir(tmp_path / "resume")) == 4
+    assert len(os.listdir(tmp_path / "results")) == 3
+    resume = tmp_path / "resume" / manifest["resume_files"][0]
+    mtime = resume.stat().st_mtime_ns
+    assert generate_corpus(str(tmp_path), num_jds=1, num_resumes=4, num_results=3, docx_ratio=0.5, seed=1) == manifest
+    assert resume.stat().st_mtime_ns == mtime
+
+def test_summarize_and_compare():
+    """Test latency percentiles and the comparison against a baseline report."""
+    assert percentile([], 0.5) is None
+    summary = summarize([0.1 * i for i in range(1, 11)], {"200": 9, "500": 1}, elapsed=2.0)
+    assert summary["errors"] == 1
+    assert summary["throughput_rps"] == 5.0
+    assert summary["latency_p50"] == 0.6
+    baseline = {"scenarios": {"get-result": dict(summary, throughput_rps=4.0)}}
+    comparison = compare({"scenarios": {"get-result": summary}}, baseline)
+    assert comparison["get-result"]["throughput_rps"] == 0.25
+    assert comparison["get-result"]["latency_p50"] == 0.0
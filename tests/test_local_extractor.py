@@ -0,0 +1,100 @@
+import pytest
+from agents.knowledge_extractor import KnowledgeExtractorAgent
+from agents.local_extractor import (cross_check, extract_basic_info, extract_contact, extract_local,
+                                    find_institutions, skippable_fields)
+from agents.metrics import EXTRACTION_CROSSCHECK
+from agents.text_profile import profile_text
+
+RESUME = """姓名：王五
+年龄：29
+现居：杭州
+电话：+86 138-1234-5678
+邮箱：wangwu@example.com
+5年以上工作经验
+工作经历
+2019-2024 阿里巴巴 后端工程师
+教育背景
+毕业于浙江大学 计算机科学 本科 2019
+"""
+
+def test_extract_contact():
+    """Test email and phone extraction, including separators and country codes."""
+    assert extract_contact(RESUME) == {"email": "wangwu@example.com", "phone": "13812345678"}
+    assert extract_contact("Phone: +1 (415) 555-0134, jane.doe@mail.co.uk") == {
+        "email": "jane.doe@mail.co.uk", "phone": "+1 (415) 555-0134"}
+    assert extract_contact("2019-2024 阿里巴巴") == {}
+
+def test_extract_basic_info():
+    """Test labelled basic information in Chinese and English."""
+    assert extract_basic_info(RESUME) == {"name": "王五", "age": "29", "years_of_experience": "5", "location": "杭州"}
+    assert extract_basic_info("Name: Jane Doe\n8+ years of professional experience") == {
+        "name": "Jane Doe", "years_of_experience": "8"}
+
+def test_phone_number_on_its_own_line():
+    """Test that a phone number alone on a line survives normalization and is extracted and cross-checked."""
+    text = "王五\n13812345678\nwangwu@example.com\n工作经历\n2019-2024 阿里巴巴 后端工程师\n"
+    local = extract_local(profile_text(text))
+    assert local["contact"] == {"email": "wangwu@example.com", "phone": "13812345678"}
+    assert skippable_fields(local) == ["contact"]
+    result = cross_check({"contact": {"email": "wangwu@example.com"}}, local, profile_text(text).text)
+    assert result["contact"]["phone"] == "13812345678"
+
+def test_basic_info_is_read_from_the_header():
+    """Test that name, age and location labels outside the candidate's own sections are ignored."""
+    text = ("张三\n电话：13812345678\n工作经历\nName: Atlas 推荐系统\n服务60岁以上用户\n"
+            "Location: 北京\n教育背景\n浙江大学 2019\n")
+    assert extract_local(profile_text(text))["basic_info"] == {}
+    assert extract_basic_info("Page: 12\nTotal pages: 34") == {}
+    local = extract_local(profile_text("个人信息\n姓名：张三\n年龄：28\n" + text))
+    assert local["basic_info"] == {"name": "张三", "age": "28"}
+
+def test_find_institutions():
+    """Test known aliases, generic university names and prefixes."""
+    assert find_institutions("毕业于浙江大学 计算机科学 本科 2019") == ["浙江大学"]
+    assert find_institutions("毕业于某某职业技术学院 2015") == ["某某职业技术学院"]
+    assert find_institutions("B.S. Computer Science, Portland State University, 2016") == ["Portland State University"]
+    assert find_institutions("2019-2024 阿里巴巴 后端工程师") == []
+
+def test_extract_local_reads_education_section():
+    """Test that education entries come from the education section with their year."""
+    local = extract_local(profile_text(RESUME))
+    assert local["education"] == [{"institution": "浙江大学", "year": "2019"}]
+    assert skippable_fields(local) == ["contact"]
+    assert skippable_fields(extract_local(profile_text("邮箱：a@b.com\n浙江大学"))) == []
+
+def test_cross_check_outcomes():
+    """Test that local values fill and correct the LLM result and outcomes are counted."""
+    local = extract_local(profile_text(RESUME))
+    before = {outcome: EXTRACTION_CROSSCHECK.get(field="education.institution", outcome=outcome)
+              for outcome in ("agree", "corrected")}
+    llm_result = {
+        "basic_info": {"name": "王五", "age": 30},
+        "education": [{"institution": "浙江工业大学", "degree": "本科"}],
+    }
+    result = cross_check(llm_result, local, profile_text(RESUME).text)
+    assert result["contact"] == {"email": "wangwu@example.com", "phone": "13812345678"}
+    assert result["basic_info"]["age"] == "29"
+    assert result["basic_info"]["location"] == "杭州"
+    # The hallucinated institution is replaced, the LLM's degree is kept
+    assert result["education"] == [{"institution": "浙江大学", "degree": "本科"}]
+    assert EXTRACTION_CROSSCHECK.get(field="education.institution", outcome="corrected") == before["corrected"] + 1
+
+    result = cross_check({"education": [{"institution": "浙江大学"}]}, local, RESUME)
+    assert EXTRACTION_CROSSCHECK.get(field="education.institution", outcome="agree") == before["agree"] + 1
+    assert llm_result["education"][0]["institution"] == "浙江工业大学"
+
+@pytest.mark.asyncio
+async def test_prompt_skips_locally_complete_contact():
+    """Test that the LLM is not asked for contact details found locally."""
+    agent = KnowledgeExtractorAgent()
+    requested = []
+
+    async def fake_extract_structured_info(text, language, deadline=None, input_tokens=None, fields=()):
+        requested.extend(fields)
+        return {"contact": {"email": "wrong@example.com"}, "education": []}
+
+    agent.llm_client.extract_structured_info = fake_extract_structured_info
+    result = await agent.process({"text": RESUME})
+    assert "contact" not in requested and "education" in requested
+    assert result["contact"]["email"] == "wangwu@example.com"
+    assert result["education"][0]["institution"] == "浙江大学"
@@ -0,0 +1,41 @@
+import asyncio
+import time
+import pytest
+from agents.loop_monitor import LoopMonitor
+
+def blocking_parse():
+    time.sleep(0.3)
+
+@pytest.mark.asyncio
+async def test_stall_captures_blocking_stack():
+    """Test that a callback blocking the loop is reported with its stack."""
+    monitor = LoopMonitor(interval=0.02, stall_threshold=0.1)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.1)
+        blocking_parse()
+        await asyncio.sleep(0.1)
+    finally:
+        await monitor.stop()
+    stats = monitor.stats()
+    assert stats["stalls"] == 1
+    stall = stats["recent_stalls"][0]
+    assert stall["lag_seconds"] >= 0.2
+    assert any("blocking_parse" in line for line in stall["stack"])
+    assert stats["max_lag_seconds"] >= 0.2
+    assert stats["lag_p50_seconds"] < 0.1
+
+@pytest.mark.asyncio
+async def test_idle_loop_has_no_stalls():
+    """Test that an idle loop records lag samples but no stalls, and that reset clears them."""
+    monitor = LoopMonitor(interval=0.01, stall_threshold=0.2)
+    monitor.start()
+    monitor.start()
+    await asyncio.sleep(0.1)
+    await monitor.stop()
+    stats = monitor.stats()
+    assert stats["samples"] >= 3
+    assert stats["stalls"] == 0
+    assert stats["lag_p99_seconds"] is not None
+    monitor.reset()
+    assert monitor.stats()["samples"] == 0
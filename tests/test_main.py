@@ -76,4 +76,15 @@ def test_screen_resumes_sorting(client, sample_request_data):
     
     if len(candidates) > 1:
         scores = [c["evaluation"]["overall_score"] for c in candidates]
-        assert scores == sorted(scores, reverse=True)  # Check if scores are sorted in descending order 
\ No newline at end of file
+        assert scores == sorted(scores, reverse=True)  # Check if scores are sorted in descending order
+
+
+def test_upload_does_not_overwrite(client, tmp_path, monkeypatch):
+    """Test that uploading different content under a stored name is refused rather than overwriting it."""
+    monkeypatch.setattr("main.RESUME_DIR", str(tmp_path))
+    upload = lambda content: client.post("/upload-resume", files={"file": ("resume.txt", content, "text/plain")})
+    assert upload(b"Jane Doe, Python engineer").status_code == 200
+    response = upload(b"Jane Doe, Python engineer")
+    assert response.status_code == 200 and response.json()["deduplicated"]
+    assert upload(b"John Roe, Go engineer").status_code == 400
+    assert (tmp_path / "resume.txt").read_bytes() == b"Jane Doe, Python engineer"
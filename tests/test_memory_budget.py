@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+from agents.memory_budget import MB, DocumentTooLarge, MemoryBudget, check_document_sizes
+from agents.resilience import Deadline, DeadlineExceeded
+
+def test_check_document_sizes():
+    """Test the per-document and per-request size limits."""
+    check_document_sizes({"a.pdf": 10 * MB, "b.pdf": 10 * MB}, max_document=10 * MB, max_request=20 * MB)
+    with pytest.raises(DocumentTooLarge) as error:
+        check_document_sizes({"a.pdf": 11 * MB}, max_document=10 * MB, max_request=20 * MB)
+    assert error.value.limit == 10 * MB and "a.pdf" in str(error.value)
+    with pytest.raises(DocumentTooLarge) as error:
+        check_document_sizes({"a.pdf": 8 * MB, "b.pdf": 8 * MB, "c.pdf": 8 * MB}, max_document=10 * MB,
+                             max_request=20 * MB)
+    assert error.value.size == 24 * MB
+
+@pytest.mark.asyncio
+async def test_waits_until_memory_is_released():
+    """Test that a document is admitted only once earlier ones release their memory."""
+    budget = MemoryBudget(100)
+    async with budget.reserve(60):
+        waiter = asyncio.create_task(budget.acquire(50))
+        await asyncio.sleep(0)
+        assert not waiter.done() and budget.stats()["waiting"] == 1
+    assert await waiter == 50
+    assert budget.reserved == 50 and budget.waited == 1
+
+@pytest.mark.asyncio
+async def test_admits_in_arrival_order():
+    """Test that small documents do not overtake a large one that is waiting."""
+    budget = MemoryBudget(100)
+    order = []
+
+    async def document(name, nbytes):
+        async with budget.reserve(nbytes):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async with budget.reserve(40):
+        tasks = [asyncio.create_task(document("large", 90))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(document("small", 10)))
+        await asyncio.sleep(0)
+        assert order == []
+    await asyncio.gather(*tasks)
+    assert order == ["large", "small"] and budget.reserved == 0
+
+@pytest.mark.asyncio
+async def test_oversized_document_runs_alone():
+    """Test that a document larger than the budget is admitted when nothing else is reserved."""
+    budget = MemoryBudget(100)
+    async with budget.reserve(500):
+        assert budget.reserved == 100
+
+@pytest.mark.asyncio
+async def test_deadline_while_waiting():
+    """Test that waiting past the deadline raises and leaves the queue to the others."""
+    budget = MemoryBudget(100)
+    async with budget.reserve(80):
+        with pytest.raises(DeadlineExceeded):
+            await budget.acquire(50, Deadline(0.01))
+        follower = asyncio.create_task(budget.acquire(20))
+        assert await follower == 20
+    assert budget.reserved == 20 and budget.stats()["waiting"] == 0
+
+@pytest.mark.asyncio
+async def test_disabled_budget():
+    """Test that a budget of 0 admits everything without reserving."""
+    budget = MemoryBudget(0)
+    async with budget.reserve(10 * MB):
+        assert budget.reserved == 0
@@ -0,0 +1,62 @@
+import pytest
+from fastapi.testclient import TestClient
+from agents.metrics import MetricsRegistry, record_llm_usage, timed_stage, LLM_CACHE_HIT_RATIO, STAGE_ERRORS, STAGE_SECONDS
+from main import app
+
+def test_histogram_renders_cumulative_buckets():
+    """Test the Prometheus text format of a histogram."""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("stage_seconds", "Stage duration.", ["stage"], buckets=[0.1, 1])
+    histogram.observe(0.05, stage="parse")
+    histogram.observe(0.5, stage="parse")
+    histogram.observe(5, stage="parse")
+    text = registry.render()
+    assert "# TYPE stage_seconds histogram" in text
+    assert 'stage_seconds_bucket{stage="parse",le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{stage="parse",le="1"} 2' in text
+    assert 'stage_seconds_bucket{stage="parse",le="+Inf"} 3' in text
+    assert 'stage_seconds_count{stage="parse"} 3' in text
+
+def test_counter_and_gauge():
+    """Test counters, gauges and label validation."""
+    registry = MetricsRegistry()
+    counter = registry.counter("fallbacks_total", "Fallbacks.", ["kind"])
+    counter.inc(kind="pypdf2")
+    counter.inc(2, kind="pypdf2")
+    gauge = registry.gauge("in_flight", "In flight.")
+    with gauge.track_inprogress():
+        assert gauge.get() == 1
+    assert gauge.get() == 0
+    assert 'fallbacks_total{kind="pypdf2"} 3' in registry.render()
+    with pytest.raises(ValueError):
+        counter.inc(kind="pypdf2", extra="x")
+    with pytest.raises(ValueError):
+        counter.inc(-1, kind="pypdf2")
+
+@pytest.mark.asyncio
+async def test_timed_stage_records_errors():
+    """Test that a decorated stage is timed whether it succeeds or raises."""
+    @timed_stage("test_stage")
+    async def failing():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await failing()
+    assert STAGE_SECONDS.count(stage="test_stage") == 1
+    assert STAGE_ERRORS.get(stage="test_stage") == 1
+
+def test_cache_hit_ratio():
+    """Test that the cache hit ratio accumulates over responses."""
+    record_llm_usage("Test", "ratio-model", 100, 10, 50)
+    record_llm_usage("Test", "ratio-model", 100, 10, 100)
+    assert LLM_CACHE_HIT_RATIO.get(model="ratio-model") == 0.75
+
+def test_metrics_endpoint():
+    """Test that /metrics serves the registry and records request durations by route."""
+    client = TestClient(app)
+    client.get("/list-results")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{method="GET",route="/list-results",status="200"}' in response.text
+    assert "# TYPE screening_stage_duration_seconds histogram" in response.text
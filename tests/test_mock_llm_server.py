@@ -0,0 +1,77 @@
+import json
+import pytest
+from agents.backend_pool import BackendPool
+from agents.llm_client import LlamaClient
+from agents.rate_limiter import LLMRateLimiter
+from agents.resilience import RetryPolicy, StreamInterrupted
+from benchmarks.mock_llm_server import MockBehaviour, MockLLMState, MockServerThread, create_app
+
+@pytest.fixture(scope="module")
+def mock_server():
+    state = MockLLMState(MockBehaviour(seed=1))
+    server = MockServerThread(create_app(state)).start()
+    yield server, state
+    server.stop()
+
+@pytest.fixture
+def llm_client(mock_server):
+    server, state = mock_server
+    state.behaviour.update({"error_rate": 0.0, "rate_limit_rate": 0.0, "stream_break_rate": 0.0})
+    state.reset()
+    return LlamaClient(
+        pool=BackendPool([server.base_url], api_key="mock", health_check_interval=0),
+        rate_limiter=LLMRateLimiter(),
+        retry_policy=RetryPolicy(max_attempts=3, base_delay=0.01),
+    )
+
+def test_behaviour_rejects_unknown_settings():
+    """Test that runtime configuration is validated."""
+    behaviour = MockBehaviour()
+    with pytest.raises(ValueError):
+        behaviour.update({"latency": 1})
+    with pytest.raises(ValueError):
+        behaviour.update({"error_rate": 2})
+
+def test_lognormal_latency_has_requested_mean():
+    """Test that sampled time to first token follows the configured mean."""
+    behaviour = MockBehaviour(ttft=0.5, ttft_jitter=0.5, distribution="lognormal", seed=7)
+    samples = [behaviour.sample_ttft() for _ in range(5000)]
+    assert 0.45 < sum(samples) / len(samples) < 0.55
+    assert min(samples) > 0
+
+@pytest.mark.asyncio
+async def test_extraction_against_mock_server(llm_client):
+    """Test that the extraction call gets a schema-valid answer from the mock server."""
+    result = await llm_client.extract_structured_info("Python developer at Tech Corp", "en")
+    assert result["skills"]
+    assert isinstance(result["experience"], list)
+
+@pytest.mark.asyncio
+async def test_streaming_against_mock_server(llm_client):
+    """Test that streamed evaluations are parsed field by field."""
+    fields = []
+
+    async def on_field(key, value):
+        fields.append(key)
+
+    response = await llm_client._stream_llm('返回 "overall_score"', on_field=on_field)
+    assert "overall_score" in json.loads(response)
+    assert "scores" in fields
+
+@pytest.mark.asyncio
+async def test_injected_rate_limits_are_retried(llm_client, mock_server):
+    """Test that injected 429 responses are retried by the client."""
+    _, state = mock_server
+    state.behaviour.update({"rate_limit_rate": 0.5, "seed": 3})
+    for _ in range(5):
+        await llm_client._call_llm('"job_title"')
+    assert state.stats["rate_limited"] > 0
+    assert state.stats["requests"] == 5
+
+@pytest.mark.asyncio
+async def test_broken_stream_raises(llm_client, mock_server):
+    """Test that a stream cut off by the server surfaces as StreamInterrupted."""
+    _, state = mock_server
+    state.behaviour.update({"stream_break_rate": 1.0})
+    with pytest.raises(StreamInterrupted):
+        await llm_client._stream_llm('"job_title"')
@@ -0,0 +1,102 @@
+import pytest
+from agents.backend_pool import BackendPool
+from agents.decision_maker import DecisionMakerAgent
+from agents.jd_analyzer import JDAnalyzerAgent
+from agents.llm_client import LlamaClient, check_extraction_schema
+from agents.model_router import ModelRoute, ModelRouter
+
+RULES = [
+    {"agent": "KnowledgeExtractor", "languages": ["en"], "max_input_tokens": 1000, "route": "small"},
+    {"agent": "KnowledgeExtractor", "max_input_tokens": 500, "route": "medium"},
+]
+
+@pytest.fixture
+def router():
+    return ModelRouter({
+        "large": ModelRoute("large", "large-model"),
+        "medium": ModelRoute("medium", "medium-model"),
+        "small": ModelRoute("small", "small-model"),
+    }, RULES)
+
+def test_route_by_agent_size_and_language(router):
+    """Test that the first rule matching agent, input size and language wins."""
+    assert router.route("KnowledgeExtractor", 800, "en").name == "small"
+    assert router.route("KnowledgeExtractor", 400, "zh").name == "medium"
+    assert router.route("KnowledgeExtractor", 2000, "en").name == "large"
+    assert router.route("DecisionMaker", 100, "en").name == "large"
+
+def test_rules_for_unconfigured_routes_are_skipped():
+    """Test that rules naming a route that is not configured fall through to the default."""
+    router = ModelRouter({"large": ModelRoute("large", "large-model")}, RULES)
+    assert router.route("KnowledgeExtractor", 100, "en").name == "large"
+
+def test_escalation_stops_at_large(router):
+    """Test that escalation goes to the large model exactly once."""
+    assert router.escalate(router.routes["small"]).name == "large"
+    assert router.escalate(router.routes["large"]) is None
+    assert router.counters["escalations"] == 1
+
+def test_check_extraction_schema():
+    """Test validation of extraction results."""
+    check_extraction_schema({"basic_info": {}, "skills": ["Python"]})
+    with pytest.raises(ValueError):
+        check_extraction_schema({"skills": "Python"})
+    with pytest.raises(ValueError):
+        check_extraction_schema({"unexpected": 1})
+
+@pytest.mark.asyncio
+async def test_invalid_small_model_output_escalates(router, monkeypatch):
+    """Test that invalid JSON from the small model is retried on the large model."""
+    llm_client = LlamaClient(pool=BackendPool(["http://llm.invalid/v1"]), router=router)
+    models = []
+
+    async def fake_call_llm(prompt, deadline=None, route=None):
+        models.append(route.model)
+        return '{"skills": [' if route.name == "small" else '{"skills": ["Python"]}'
+
+    monkeypatch.setattr(llm_client, "_call_llm", fake_call_llm)
+    result = await llm_client._call_llm_json("prompt", "KnowledgeExtractor", validate=check_extraction_schema,
+                                             input_tokens=100, language="en")
+    assert result == {"skills": ["Python"]}
+    assert models == ["small-model", "large-model"]
+
+@pytest.mark.asyncio
+async def test_schema_failure_on_large_model_raises(router, monkeypatch):
+    """Test that invalid output from the large model is not retried."""
+    llm_client = LlamaClient(pool=BackendPool(["http://llm.invalid/v1"]), router=router)
+    calls = []
+
+    async def fake_call_llm(prompt, deadline=None, route=None):
+        calls.append(route.name)
+        return '{"skills": "Python"}'
+
+    monkeypatch.setattr(llm_client, "_call_llm", fake_call_llm)
+    with pytest.raises(ValueError):
+        await llm_client._call_llm_json("prompt", "DecisionMaker", validate=check_extraction_schema)
+    assert calls == ["large"]
+
+@pytest.mark.asyncio
+async def test_jd_analysis_and_evaluation_are_routed(router, monkeypatch):
+    """Test that per-agent rules apply to JD analysis and evaluation and invalid output escalates."""
+    router.rules = [{"agent": "JDAnalyzer", "route": "small"}, {"agent": "DecisionMaker", "route": "medium"}]
+    jd_analyzer, decision_maker = JDAnalyzerAgent(), DecisionMakerAgent()
+    routes = []
+
+    async def fake_call_llm(prompt, deadline=None, route=None):
+        routes.append(route.name)
+        if route.name == "small":
+            return '{"job_title": '
+        if route.name == "medium":
+            return '{"overall_score": 0.5}'
+        return ('{"job_title": "Engineer"}' if "工作描述" in prompt else
+                '{"scores": {"skills_match": 0.7}, "analysis": {}, "overall_score": 0.7, "recommendation": "Good"}')
+
+    for agent in (jd_analyzer, decision_maker):
+        agent.llm_client.router = router
+        monkeypatch.setattr(agent.llm_client, "_call_llm", fake_call_llm)
+    job_requirements = await jd_analyzer.process({"text": "Engineer\nPython"})
+    evaluation = await decision_maker.process({"candidate_info": {"skills": ["Python"]},
+                                               "job_requirements": job_requirements})
+    assert job_requirements["job_title"] == "Engineer" and evaluation["overall_score"] == 0.7
+    assert routes == ["small", "large", "medium", "large"]
+    assert router.counters["escalations"] == 2
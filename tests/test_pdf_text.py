@@ -0,0 +1,68 @@
+import pytest
+from agents import pdf_text
+from agents.pdf_text import extract_pdf_text, page_ranges, shutdown_pdf_pool, worker_ranges
+from agents.profiling import RequestProfiler
+from benchmarks.corpus import LINES_PER_PAGE, pdf_bytes
+from benchmarks.extraction_bench import legacy_pypdf2
+
+@pytest.fixture
+def parallel(monkeypatch):
+    """Extract PDFs from four pages on by two workers, in ranges of at least three pages."""
+    monkeypatch.setattr(pdf_text, "PDF_WORKERS", 2)
+    monkeypatch.setattr(pdf_text, "PDF_PARALLEL_MIN_PAGES", 4)
+    monkeypatch.setattr(pdf_text, "PDF_PAGES_PER_TASK", 3)
+    yield
+    shutdown_pdf_pool()
+
+def make_pdf(pages):
+    return pdf_bytes([f"Page {page} line {line}" for page in range(pages) for line in range(LINES_PER_PAGE)])
+
+def test_page_ranges():
+    """Test that page ranges cover every page once and in order."""
+    assert page_ranges(7, 3) == [(0, 3), (3, 6), (6, 7)]
+    assert page_ranges(0, 3) == []
+
+def test_worker_ranges(parallel, monkeypatch):
+    """Test that a document is split into one range per worker, and not split if one range would do."""
+    assert worker_ranges(10) == [(0, 5), (5, 10)]
+    assert worker_ranges(5) == [(0, 3), (3, 5)]
+    assert worker_ranges(3) == []
+    monkeypatch.setattr(pdf_text, "PDF_PAGES_PER_TASK", 8)
+    assert worker_ranges(6) == []
+
+@pytest.mark.asyncio
+async def test_parallel_matches_serial(parallel):
+    """Test that page-parallel extraction reassembles the pages in order."""
+    content = make_pdf(10)
+    text = await extract_pdf_text(content)
+    assert text == legacy_pypdf2(content)
+    assert text.index("Page 2 line 0") < text.index("Page 3 line 0") < text.index("Page 9 line 0")
+
+@pytest.mark.asyncio
+async def test_small_pdf_is_extracted_serially(parallel, monkeypatch):
+    """Test that PDFs below the page threshold or fitting one task do not use the worker processes."""
+    monkeypatch.setattr(pdf_text, "get_pdf_pool", lambda: pytest.fail("pool used"))
+    content = make_pdf(3)
+    assert await extract_pdf_text(content) == legacy_pypdf2(content)
+    monkeypatch.setattr(pdf_text, "PDF_PAGES_PER_TASK", 8)
+    content = make_pdf(6)
+    assert await extract_pdf_text(content) == legacy_pypdf2(content)
+
+@pytest.mark.asyncio
+async def test_max_pages(parallel):
+    """Test that only the first max_pages pages are read."""
+    text = await extract_pdf_text(make_pdf(10), max_pages=5)
+    assert "Page 4 line 0" in text and "Page 5" not in text
+    assert await extract_pdf_text(make_pdf(3), max_pages=2) == legacy_pypdf2(make_pdf(2))
+
+@pytest.mark.asyncio
+async def test_worker_stats_are_profiled(parallel):
+    """Test that worker processes report their profile to the request profiler."""
+    profiler = RequestProfiler()
+    profiler.start()
+    try:
+        await extract_pdf_text(make_pdf(7))
+    finally:
+        profiler.stop()
+    assert len(profiler.worker_stats) == 2
+    assert any(func[2] == "extract_page_range" for func in profiler.pstats().stats)
@@ -0,0 +1,54 @@
+import asyncio
+import io
+import pstats
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from agents.profiling import ProfilerBusy, RequestProfiler, current_profiler, run_profiled
+
+def busy_parse(seconds: float) -> int:
+    deadline = time.perf_counter() + seconds
+    count = 0
+    while time.perf_counter() < deadline:
+        count += 1
+    return count
+
+@pytest.mark.asyncio
+async def test_profile_of_request(tmp_path):
+    """Test that a profile covers the loop thread, executor threads and worker processes."""
+    profiler = RequestProfiler(sample_interval=0.001)
+    profiler.start()
+    assert current_profiler() is profiler
+    busy_parse(0.05)
+    await asyncio.to_thread(busy_parse, 0.05)
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        result, stats = await asyncio.get_running_loop().run_in_executor(executor, run_profiled, busy_parse, 0.01)
+    profiler.add_worker_stats(stats)
+    assert result > 0
+    summary = profiler.save(str(tmp_path), "profile_test")
+    assert not profiler.running
+    assert current_profiler() is None
+    assert summary["worker_profiles"] == 1
+    assert summary["samples"] > 0
+
+    loaded = pstats.Stats(str(tmp_path / summary["pstats"]), stream=io.StringIO())
+    busy = [key for key in loaded.stats if key[2] == "busy_parse"]
+    assert sum(loaded.stats[key][1] for key in busy) == 2  # Loop thread and worker process
+    collapsed = (tmp_path / summary["collapsed"]).read_text().splitlines()
+    assert any(line.startswith("event_loop;") and "busy_parse" in line for line in collapsed)
+    assert any(line.startswith("executor;") and "busy_parse" in line for line in collapsed)
+    stack, count = collapsed[0].rsplit(" ", 1)
+    assert int(count) >= 1
+
+def test_one_profile_at_a_time():
+    """Test that a second concurrent profile is refused."""
+    profiler = RequestProfiler()
+    profiler.start()
+    try:
+        with pytest.raises(ProfilerBusy):
+            RequestProfiler().start()
+    finally:
+        profiler.stop()
+    second = RequestProfiler()
+    second.start()
+    second.stop()
@@ -0,0 +1,97 @@
+import json
+import pytest
+from agents.prompt_builder import (
+    PromptBuilder,
+    CANDIDATE_KEY_PRIORITIES,
+    clean_text,
+    compact_json,
+    estimate_tokens,
+    fit_json,
+    truncate_text,
+)
+
+@pytest.fixture
+def candidate_info():
+    return {
+        "basic_info": {"name": "John Doe", "age": ""},
+        "contact": {"email": "john@example.com", "phone": None},
+        "summary": "Experienced software engineer",
+        "skills": ["Python", "JavaScript", "Docker"],
+        "experience": [{"company": "Tech Corp", "title": "Engineer", "responsibilities": []}],
+        "education": [],
+        "certifications": [],
+    }
+
+def test_estimate_tokens():
+    """Test token estimation for Latin and CJK text."""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("清华大学") == 4
+
+def test_compact_json_drops_empty_fields(candidate_info):
+    """Test that compact JSON has no indentation and no empty fields."""
+    result = compact_json(candidate_info)
+    assert "\n" not in result
+    assert json.loads(result) == {
+        "basic_info": {"name": "John Doe"},
+        "contact": {"email": "john@example.com"},
+        "summary": "Experienced software engineer",
+        "skills": ["Python", "JavaScript", "Docker"],
+        "experience": [{"company": "Tech Corp", "title": "Engineer"}],
+    }
+
+def test_clean_text_strips_boilerplate():
+    """Test removal of page footers, repeated headers and duplicate whitespace."""
+    text = "Confidential\nJohn Doe   Resume\n\n\n\nPage 1 of 3\nConfidential\nSkills:\tPython\n(cid:12)\n-----\n"
+    text += "第2页/共3页\nConfidential\n- 3 -\n"
+    assert clean_text(text) == "John Doe Resume\n\nSkills: Python"
+    assert clean_text("ACME CV\nSkills\fACME CV\nExperience\fACME CV\nEducation") == "Skills\n\nExperience\n\nEducation"
+
+def test_clean_text_keeps_content_lines():
+    """Test that job titles repeated within the pages and lines holding only a number are kept."""
+    text = "Acme\nSoftware Engineer\n2019\nGlobex\nSoftware Engineer\n12\nInitech\nSoftware Engineer\n13812345678"
+    assert clean_text(text) == text
+    assert clean_text("Page 1 of 2\nSoftware Engineer\n2019\nPage 2 of 2\nSoftware Engineer") == (
+        "Software Engineer\n2019\nSoftware Engineer")
+
+def test_truncate_text_fits_budget():
+    """Test that truncated text stays within the token budget."""
+    text = "\n".join(f"line number {i} with some content" for i in range(200))
+    truncated = truncate_text(text, 100)
+    assert estimate_tokens(truncated) <= 100
+    assert truncated.startswith("line number 0")
+    assert truncate_text("short", 100) == "short"
+
+def test_fit_json_keeps_high_priority_keys(candidate_info):
+    """Test that low-priority keys are dropped first when JSON exceeds the budget."""
+    candidate_info["skills"] = [f"skill-{i}" for i in range(50)]
+    result = json.loads(fit_json(candidate_info, 60, CANDIDATE_KEY_PRIORITIES))
+    assert "skills" in result
+    assert "contact" not in result
+    assert estimate_tokens(json.dumps(result, ensure_ascii=False, separators=(",", ":"))) <= 60
+
+def test_build_reports_tokens_saved(candidate_info):
+    """Test that the builder reports prompt size and savings."""
+    stats = PromptBuilder("DecisionMaker").add_json("candidate_info", candidate_info).build("""
+        Evaluate the candidate:
+        {candidate_info}
+        Return {{"overall_score": 0}}
+        """)
+    assert stats["prompt"].startswith("Evaluate the candidate:\n{")
+    assert stats["prompt"].endswith('Return {"overall_score": 0}')
+    assert stats["tokens_saved"] > 0
+    assert stats["prompt_tokens"] == estimate_tokens(stats["prompt"])
+    assert stats["truncated_sections"] == []
+
+def test_build_enforces_budget():
+    """Test that the lowest-priority section is truncated to respect the budget."""
+    long_text = "\n".join(f"Responsibility {i}: built and operated services" for i in range(500))
+    stats = (
+        PromptBuilder("JDAnalyzer", budget=300)
+        .add_text("jd", "Senior Engineer", priority=2)
+        .add_text("resume", long_text, priority=1)
+        .build("JD: {jd}\nResume: {resume}")
+    )
+    assert stats["prompt_tokens"] <= 300
+    assert "Senior Engineer" in stats["prompt"]
+    assert stats["truncated_sections"] == ["resume"]
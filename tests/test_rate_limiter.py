@@ -0,0 +1,125 @@
+import asyncio
+import time
+import httpx
+import openai
+import pytest
+from agents.rate_limiter import AdaptiveConcurrencyLimiter, LLMRateLimiter, TokenBucket, retry_after
+from agents.resilience import Deadline, DeadlineExceeded
+
+def _status_error(status_code):
+    error = openai.RateLimitError.__new__(openai.RateLimitError)
+    error.status_code = status_code
+    return error
+
+@pytest.mark.asyncio
+async def test_token_bucket_waits_for_refill():
+    """Test that requests beyond the bucket wait for tokens to be refilled."""
+    bucket = TokenBucket(tokens_per_minute=6000, capacity=100)  # 100 tokens per second
+    await bucket.acquire(100)
+    started = time.monotonic()
+    await bucket.acquire(20)
+    assert time.monotonic() - started >= 0.15
+
+@pytest.mark.asyncio
+async def test_token_bucket_respects_deadline():
+    """Test that waiting for tokens gives up when the deadline would pass first."""
+    bucket = TokenBucket(tokens_per_minute=60, capacity=10)
+    await bucket.acquire(10)
+    with pytest.raises(DeadlineExceeded):
+        await bucket.acquire(10, Deadline(0.5))
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped():
+    """Test that no more than the limit of requests run at the same time."""
+    limiter = LLMRateLimiter(tokens_per_minute=10**6, max_concurrency=2)
+    running, peak = 0, 0
+
+    async def request():
+        nonlocal running, peak
+        async with limiter.slot(10):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(request() for _ in range(8)))
+    assert peak == 2
+    assert limiter.stats()["in_flight"] == 0
+    assert limiter.stats()["requests"] == 8
+
+@pytest.mark.asyncio
+async def test_overload_halves_concurrency():
+    """Test multiplicative decrease on 429 responses."""
+    limiter = LLMRateLimiter(tokens_per_minute=10**6, max_concurrency=8)
+    with pytest.raises(openai.RateLimitError):
+        async with limiter.slot(10):
+            raise _status_error(429)
+    assert limiter.stats()["concurrency_limit"] == 4
+    assert limiter.stats()["overloaded"] == 1
+
+def test_additive_increase_and_slow_latency():
+    """Test additive increase on fast responses and decrease on slow ones."""
+    limiter = AdaptiveConcurrencyLimiter(max_limit=8, latency_target=1.0)
+    limiter.limit = 2.0
+    for _ in range(4):
+        limiter.on_success(0.1)
+    assert 3.0 <= limiter.limit < 4.0
+    limiter.on_success(5.0)
+    assert limiter.limit < 2.0
+
+@pytest.mark.asyncio
+async def test_usage_is_reconciled():
+    """Test that unused estimated tokens are returned to the bucket."""
+    limiter = LLMRateLimiter(tokens_per_minute=1000, max_concurrency=1)
+    async with limiter.slot(800) as permit:
+        permit.record_usage(200)
+    assert limiter.stats()["tokens_available"] >= 800
+
+@pytest.mark.asyncio
+async def test_timeout_counts_as_overload():
+    """Test that a call timeout shrinks the window, unless the caller's deadline ran out."""
+    limiter = LLMRateLimiter(tokens_per_minute=10**6, max_concurrency=8)
+    with pytest.raises(asyncio.TimeoutError):
+        async with limiter.slot(10):
+            raise asyncio.TimeoutError()
+    assert limiter.stats()["concurrency_limit"] == 4
+    deadline = Deadline(0)
+    with pytest.raises(asyncio.TimeoutError):
+        async with limiter.slot(10):
+            raise asyncio.TimeoutError()
+    with pytest.raises(DeadlineExceeded):
+        async with limiter.slot(10, deadline):
+            raise DeadlineExceeded("deadline")
+    assert limiter.stats()["overloaded"] == 2
+
+@pytest.mark.asyncio
+async def test_retry_after_holds_new_requests():
+    """Test that new requests wait out the Retry-After of a 429."""
+    limiter = LLMRateLimiter(tokens_per_minute=10**6, max_concurrency=8)
+    error = openai.RateLimitError("slow down", response=httpx.Response(
+        429, headers={"Retry-After": "0.2"}, request=httpx.Request("POST", "http://llm.invalid")), body=None)
+    with pytest.raises(openai.RateLimitError):
+        async with limiter.slot(10):
+            raise error
+    assert retry_after(error) == 0.2
+    started = time.monotonic()
+    async with limiter.slot(10):
+        pass
+    assert time.monotonic() - started >= 0.15
+    with pytest.raises(DeadlineExceeded):
+        limiter.concurrency.on_overload(retry_after=5)
+        async with limiter.slot(10, Deadline(0.5)):
+            pass
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_passes_wakeup_on():
+    """Test that a woken waiter cancelled before taking its slot hands it to the next one."""
+    limiter = AdaptiveConcurrencyLimiter(max_limit=1)
+    await limiter.acquire()
+    first = asyncio.create_task(limiter.acquire())
+    second = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    limiter.release()
+    first.cancel()
+    await asyncio.wait_for(second, timeout=1)
+    assert first.cancelled() and limiter.in_flight == 1
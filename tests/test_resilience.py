@@ -0,0 +1,34 @@
+import asyncio
+import pytest
+from agents.resilience import Deadline, DeadlineExceeded, RetryPolicy, call_timeout
+
+def test_deadline_remaining_and_timeout():
+    """Test that call timeouts are capped by the remaining deadline."""
+    deadline = Deadline(10)
+    assert 9 < deadline.remaining() <= 10
+    assert deadline.timeout(120) <= 10
+    assert deadline.timeout(1) == 1
+    assert call_timeout(30) == 30
+    assert not deadline.expired()
+
+def test_expired_deadline_check():
+    """Test that checking an expired deadline raises DeadlineExceeded."""
+    deadline = Deadline(0)
+    assert deadline.expired()
+    with pytest.raises(DeadlineExceeded):
+        deadline.check("LLM call")
+
+def test_backoff_is_bounded():
+    """Test that jittered backoff never exceeds the exponential cap."""
+    policy = RetryPolicy(base_delay=0.5, max_delay=4.0)
+    for attempt in range(10):
+        assert 0 <= policy.backoff(attempt) <= min(4.0, 0.5 * 2 ** attempt)
+
+def test_should_retry():
+    """Test which errors are retried and that retries are bounded."""
+    policy = RetryPolicy(max_attempts=3)
+    assert policy.should_retry(asyncio.TimeoutError(), 0, 0.1)
+    assert not policy.should_retry(asyncio.TimeoutError(), 2, 0.1)
+    assert not policy.should_retry(ValueError("bad prompt"), 0, 0.1)
+    assert not policy.should_retry(DeadlineExceeded(), 0, 0.1)
+    assert not policy.should_retry(asyncio.TimeoutError(), 0, 5.0, Deadline(1))
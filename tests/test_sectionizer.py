@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+from agents.knowledge_extractor import KnowledgeExtractorAgent
+from agents.llm_client import EXTRACTION_FIELDS, extraction_instructions
+from agents.resilience import DeadlineExceeded
+from agents.sectionizer import plan_extraction, sectionize
+from agents.text_profile import profile_text
+
+RESUME = """李四
+邮箱：lisi@example.com
+工作经历
+2018-2023 腾讯科技 高级工程师
+- 负责支付系统，使用 Go 和 Kafka
+教育背景
+浙江大学 计算机科学 硕士 2018
+专业技能
+Go、Kafka、MySQL
+"""
+
+def test_sectionize_groups_sections():
+    """Test that sections are grouped by the fields extracted from them."""
+    texts = sectionize(profile_text(RESUME))
+    assert texts["profile"] == "李四\n邮箱：lisi@example.com"
+    assert texts["experience"].startswith("工作经历\n2018-2023")
+    assert texts["education"] == "教育背景\n浙江大学 计算机科学 硕士 2018"
+    assert texts["skills"] == "专业技能\nGo、Kafka、MySQL"
+
+def test_plan_assigns_every_field_once():
+    """Test that every candidate field is extracted by exactly one group."""
+    plan = plan_extraction(profile_text(RESUME), min_tokens=0)
+    fields = [field for spec in plan.values() for field in spec["fields"]]
+    assert sorted(fields) == sorted(EXTRACTION_FIELDS)
+    # No projects heading: projects are looked for in the work experience
+    assert plan["experience"]["fields"] == ["experience", "projects"]
+    assert plan["skills"]["fields"] == ["skills"]
+
+def test_plan_falls_back_to_single_call():
+    """Test that short or unstructured resumes are extracted in one call."""
+    assert plan_extraction(profile_text(RESUME)) is None  # Below the default token threshold
+    assert plan_extraction(profile_text("李四\n腾讯科技 高级工程师\n浙江大学"), min_tokens=0) is None
+
+@pytest.mark.asyncio
+async def test_sections_are_extracted_concurrently_and_merged():
+    """Test that section calls run concurrently and a failed group falls back to defaults."""
+    agent = KnowledgeExtractorAgent()
+    plan = plan_extraction(profile_text(RESUME), min_tokens=0)
+    running, peak, calls = 0, 0, []
+
+    async def fake_extract_fields(text, language, fields, deadline=None):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        calls.append((fields, text))
+        if fields == ["skills"]:
+            raise ValueError("invalid JSON")
+        return {field: [{"institution": "浙江大学"}] if field == "education" else f"{field} value" for field in fields}
+
+    agent.llm_client.extract_fields = fake_extract_fields
+    result = await agent.extract_sections(plan, "zh")
+    assert peak == len(plan) == 4
+    assert "skills" not in result
+    assert result["basic_info"] == "basic_info value"
+    assert result["projects"] == "projects value"
+    assert all("浙江大学" not in text for fields, text in calls if fields != ["education"])
+
+@pytest.mark.asyncio
+async def test_deadline_propagates_from_sections():
+    """Test that an expired deadline in any section aborts the extraction."""
+    agent = KnowledgeExtractorAgent()
+    plan = plan_extraction(profile_text(RESUME), min_tokens=0)
+
+    async def fake_extract_fields(text, language, fields, deadline=None):
+        raise DeadlineExceeded("late")
+
+    agent.llm_client.extract_fields = fake_extract_fields
+    with pytest.raises(DeadlineExceeded):
+        await agent.extract_sections(plan, "zh")
+
+def test_section_prompt_lists_only_its_fields():
+    """Test that a section prompt only asks for the fields of its group."""
+    instructions = extraction_instructions("en", ["education"])
+    assert "1. education: List of educational background with:" in instructions
+    assert "institution: School/University name" in instructions
+    assert "experience" not in instructions
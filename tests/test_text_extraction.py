@@ -0,0 +1,116 @@
+import io
+import pytest
+from agents import text_extraction
+from agents.text_extraction import (ExtractionEngine, ExtractionRegistry, HTMLEngine, PlainTextEngine,
+                                    UnsupportedFormat, sniff_format, text_quality)
+from benchmarks.corpus import docx_bytes, pdf_bytes
+
+class FakeEngine(ExtractionEngine):
+    formats = ("pdf",)
+
+    def __init__(self, name, priority=50, text="text", error=None):
+        super().__init__()
+        self.name = name
+        self.priority = priority
+        self.text = text
+        self.error = error
+        self.calls = 0
+
+    async def extract(self, content, max_pages=0):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return self.text
+
+PDF = b"%PDF-1.4\n%fake"
+
+def test_sniff_format():
+    """Test that the format comes from the content rather than the extension."""
+    assert sniff_format(pdf_bytes(["Jane Doe"]), "resume.pdf") == "pdf"
+    assert sniff_format(docx_bytes(["Jane Doe"]), "resume.pdf") == "docx"
+    assert sniff_format(b"<!DOCTYPE html><html><body>Jane</body></html>", "resume.txt") == "html"
+    assert sniff_format(b"# Jane Doe\n\n- Python", "resume.md") == "markdown"
+    assert sniff_format("张三 后端工程师".encode("gb18030"), "resume.txt") == "text"
+    assert sniff_format(b"\x89PNG\r\n\x1a\n\x00\x00", "resume.pdf") is None
+    assert sniff_format(b"PK\x03\x04broken", "resume.docx") is None
+
+def test_sniff_file_is_rewound():
+    """Test that sniffing an upload leaves the file at its start."""
+    upload = io.BytesIO(docx_bytes(["Jane Doe"]))
+    assert sniff_format(upload, "resume.docx") == "docx"
+    assert upload.tell() == 0
+
+def test_text_quality():
+    """Test the garbled character ratio of an extraction."""
+    assert text_quality("") == {"chars": 0, "non_whitespace": 0, "lines": 0, "garbled_ratio": 0.0}
+    assert text_quality("ab\n(cid:12)�")["garbled_ratio"] == round(2 / 11, 4)
+
+def test_engines_ordered_by_priority_then_speed():
+    """Test that priority decides first and observed seconds per MB second."""
+    remote, slow, fast = FakeEngine("remote", 100), FakeEngine("slow"), FakeEngine("fast")
+    slow.record_success(2.0, 2**20)
+    fast.record_success(0.5, 2**20)
+    registry = ExtractionRegistry([slow, fast, remote])
+    assert [e.name for e in registry.engines_for("pdf")] == ["remote", "fast", "slow"]
+    remote.local = False
+    assert [e.name for e in registry.engines_for("pdf", local_only=True)] == ["fast", "slow"]
+
+def test_failing_engine_is_tried_last():
+    """Test that an engine goes last after repeated failures."""
+    remote, local = FakeEngine("remote", 100), FakeEngine("local")
+    registry = ExtractionRegistry([remote, local])
+    for _ in range(text_extraction.EJECT_AFTER_FAILURES):
+        remote.record_failure(ValueError("down"))
+    assert [e.name for e in registry.engines_for("pdf")] == ["local", "remote"]
+
+@pytest.mark.asyncio
+async def test_falls_back_on_error_and_empty_text():
+    """Test that the next engine is tried when one fails or returns no text."""
+    registry = ExtractionRegistry([FakeEngine("remote", 100, error=ValueError("down")),
+                                   FakeEngine("blank", 75, text=" \n"), FakeEngine("local", 50, text="Jane Doe")])
+    result = await registry.extract(PDF, "resume.pdf")
+    assert (result.text, result.backend, result.format) == ("Jane Doe", "local", "pdf")
+    assert [a["outcome"] for a in result.attempts] == ["error", "empty", "ok"]
+    assert registry.recent[-1]["backend"] == "local" and registry.recent[-1]["file"] == "resume.pdf"
+
+@pytest.mark.asyncio
+async def test_empty_text_when_no_engine_finds_any():
+    """Test that an empty extraction is returned rather than an error, and not cached."""
+    engine = FakeEngine("blank", text="")
+    registry = ExtractionRegistry([engine])
+    assert (await registry.extract(PDF, "scan.pdf")).text == ""
+    await registry.extract(PDF, "scan.pdf")
+    assert engine.calls == 2
+
+@pytest.mark.asyncio
+async def test_raises_when_all_engines_fail():
+    """Test that the last error is raised if no engine succeeds."""
+    registry = ExtractionRegistry([FakeEngine("remote", 100, error=ValueError("down")),
+                                   FakeEngine("local", error=KeyError("broken"))])
+    with pytest.raises(KeyError):
+        await registry.extract(PDF, "resume.pdf")
+    with pytest.raises(UnsupportedFormat):
+        await registry.extract(b"\x00\x01binary", "resume.pdf")
+
+@pytest.mark.asyncio
+async def test_results_are_cached_by_content():
+    """Test that the same content is extracted once, whatever its file name."""
+    engine = FakeEngine("local", text="Jane Doe")
+    registry = ExtractionRegistry([engine])
+    await registry.extract(PDF, "a.pdf")
+    result = await registry.extract(PDF, "b.pdf")
+    assert result.cached and result.text == "Jane Doe" and engine.calls == 1
+    await registry.extract(PDF, "a.pdf", max_pages=2)
+    assert engine.calls == 2
+
+@pytest.mark.asyncio
+async def test_text_and_html_engines():
+    """Test extraction of plain text and of the visible text of HTML."""
+    registry = ExtractionRegistry([PlainTextEngine(), HTMLEngine()])
+    text = await registry.extract("张三\n后端工程师".encode("gb18030"), "resume.txt")
+    assert (text.text, text.backend) == ("张三\n后端工程师", "plain_text")
+    html = (b"<html><head><title>CV</title><style>p {}</style></head><body><h1>Jane Doe</h1>"
+            b"<p>Python &amp; Go</p><table><tr><td>MIT</td><td>2018</td></tr></table>"
+            b"<script>var x = 1;</script></body></html>")
+    result = await registry.extract(html, "resume.html")
+    assert (result.text, result.backend) == ("Jane Doe\nPython & Go\nMIT | 2018", "html_text")
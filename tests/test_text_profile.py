@@ -0,0 +1,87 @@
+import hashlib
+import pytest
+from agents.knowledge_extractor import KnowledgeExtractorAgent
+from agents.prompt_builder import estimate_tokens
+from agents.text_profile import match_heading, profile_text
+
+RESUME = """张三\r\n电话: 13800000000\x0c
+
+(cid:3)
+一、工作经历：
+腾讯科技   后端工程师   2020-2023
+- 1 -
+
+
+Skills: Python, Go
+教育背景
+清华大学 计算机科学 2016-2020
+第 2 页 共 2 页
+"""
+
+def test_normalization():
+    """Test that whitespace, page breaks, glyph artifacts and page numbers are cleaned up."""
+    profile = profile_text(RESUME)
+    assert profile.text == ("张三\n电话: 13800000000\n\n一、工作经历：\n腾讯科技 后端工程师 2020-2023\n\n"
+                            "Skills: Python, Go\n教育背景\n清华大学 计算机科学 2016-2020")
+    assert profile.lines == 7
+    assert profile_text(profile.text).text == profile.text
+
+def test_statistics_match_separate_scans():
+    """Test that the single pass agrees with hashing and counting the normalized text separately."""
+    profile = profile_text(RESUME)
+    assert profile.sha256 == hashlib.sha256(profile.text.encode("utf-8")).hexdigest()
+    assert profile.chars == len(profile.text)
+    assert profile.tokens == estimate_tokens(profile.text)
+    assert profile.latin_words == 3
+    assert profile.language == "zh"
+    assert profile_text("Senior engineer at 腾讯").language == "en"
+
+def test_boilerplate_lines():
+    """Test that every kind of boilerplate line is dropped by the combined pattern, and only those."""
+    lines = ["Page 3 of 5", "2 / 5", "第 1 页", "— 4 —", "=====", "References available upon request.",
+             "Page 3 of Python", "2020 - 2023"]
+    assert profile_text("\n".join(lines)).text == "Page 3 of Python\n2020 - 2023"
+
+def test_number_lines_are_kept():
+    """Test that a phone number or a year on its own line is not taken for a page number."""
+    text = "张三\n13812345678\n浙江大学\n2019\n12\n- 2 -"
+    assert profile_text(text).text == "张三\n13812345678\n浙江大学\n2019\n12"
+
+def test_character_counts():
+    """Test that Han, other CJK and Latin counts agree with counting each separately."""
+    profile = profile_text("東京のエンジニア 김철수 ＡＢＣ\nPython 工程师")
+    assert (profile.han_chars, profile.cjk_chars, profile.latin_words) == (5, 5 + 6 + 3 + 3, 1)
+    assert profile.tokens == estimate_tokens(profile.text)
+
+def test_sections():
+    """Test section boundaries with Chinese and English headings."""
+    profile = profile_text(RESUME)
+    assert [s["name"] for s in profile.sections] == ["header", "experience", "skills", "education"]
+    assert profile.section_text("header") == "张三\n电话: 13800000000"
+    assert profile.section_text("experience") == "一、工作经历：\n腾讯科技 后端工程师 2020-2023"
+    assert profile.section_text("education").endswith("2016-2020")
+    assert profile.to_dict()["sections"][1]["heading"] == "一、工作经历："
+
+@pytest.mark.parametrize("line,name", [
+    ("Work Experience", "experience"),
+    ("【项目经历】", "projects"),
+    ("3. Education:", "education"),
+    ("任职要求：", "requirements"),
+    ("Skills: Python, Java, Go", "skills"),
+    ("Experienced engineer building distributed systems", None),
+    ("负责后端服务开发", None),
+])
+def test_match_heading(line, name):
+    """Test heading detection."""
+    assert match_heading(line) == name
+
+def test_empty_text():
+    """Test that empty or boilerplate-only text profiles as empty."""
+    profile = profile_text("\n  \n- 3 -\n")
+    assert profile.text == "" and profile.sections == [] and profile.tokens == 0
+
+def test_detect_language():
+    """Test that the extractor's language detection uses the profile."""
+    agent = KnowledgeExtractorAgent()
+    assert agent.detect_language("负责后端服务开发") == "zh"
+    assert agent.detect_language("Backend developer") == "en"
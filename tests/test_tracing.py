@@ -0,0 +1,79 @@
+import time
+from types import SimpleNamespace
+import pytest
+from agents.backend_pool import BackendPool
+from agents.llm_client import LlamaClient
+from agents.metrics import timed_stage
+from agents.tracing import annotate, start_trace, to_chrome_trace, trace_span
+
+def test_span_tree():
+    """Test that nested spans form a tree with wall and CPU times."""
+    with start_trace("resume.pdf") as trace:
+        with trace_span("text_extraction", file="resume.pdf"):
+            annotate(backend="pypdf2")
+            time.sleep(0.01)
+        with trace_span("evaluation"):
+            pass
+    tree = trace.to_dict()
+    assert tree["name"] == "resume.pdf"
+    extraction, evaluation = tree["children"]
+    assert extraction["attributes"] == {"file": "resume.pdf", "backend": "pypdf2"}
+    assert extraction["wall_ms"] >= 10
+    assert extraction["cpu_ms"] >= 0
+    assert evaluation["start_ms"] >= extraction["start_ms"] + extraction["wall_ms"]
+
+def test_spans_outside_trace_are_ignored():
+    """Test that instrumentation is a no-op without an active trace."""
+    with trace_span("orphan") as span:
+        span.set(ignored=True)
+        annotate(ignored=True)
+    with start_trace("disabled", enabled=False) as trace:
+        assert trace is None
+
+def test_failed_span_records_error():
+    """Test that a span closed by an exception carries the error type."""
+    with start_trace("resume.pdf") as trace:
+        with pytest.raises(ValueError):
+            with trace_span("extraction"):
+                raise ValueError("bad")
+    assert trace.to_dict()["children"][0]["attributes"]["error"] == "ValueError"
+
+def test_chrome_trace_export():
+    """Test conversion to Chrome trace events, one thread per resume."""
+    traces = []
+    for name in ("a.pdf", "b.docx"):
+        with start_trace(name) as trace:
+            with trace_span("extraction"):
+                pass
+        traces.append(trace.to_dict())
+    exported = to_chrome_trace(traces)
+    complete = [e for e in exported["traceEvents"] if e["ph"] == "X"]
+    assert [(e["name"], e["tid"]) for e in complete] == [("a.pdf", 1), ("extraction", 1), ("b.docx", 2), ("extraction", 2)]
+    assert all(e["dur"] >= 0 and "cpu_ms" in e["args"] for e in complete)
+
+@pytest.mark.asyncio
+async def test_llm_call_spans(monkeypatch):
+    """Test that LLM calls record queue wait and token usage inside the stage span."""
+    llm_client = LlamaClient(pool=BackendPool(["http://llm.invalid/v1"]), agent="Test")
+
+    async def fake_create(**kwargs):
+        usage = SimpleNamespace(prompt_tokens=120, completion_tokens=30, total_tokens=150,
+                                prompt_tokens_details=SimpleNamespace(cached_tokens=96))
+        message = SimpleNamespace(content='{"ok": true}')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+    monkeypatch.setattr(llm_client.pool.backends[0].client.chat.completions, "create", fake_create)
+
+    @timed_stage("evaluation")
+    async def evaluate():
+        return await llm_client._call_llm("prompt")
+
+    with start_trace("resume.pdf") as trace:
+        await evaluate()
+    stage = trace.to_dict()["children"][0]
+    request = stage["children"][0]
+    assert stage["name"] == "evaluation"
+    assert request["name"] == "llm_request"
+    assert request["attributes"]["cached_tokens"] == 96
+    assert request["attributes"]["agent"] == "Test"
+    assert request["children"][0]["name"] == "queue_wait"
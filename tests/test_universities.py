@@ -0,0 +1,41 @@
+import pytest
+from agents.aho_corasick import AhoCorasick
+from agents.data.universities import (QS_TOP_20_UNIVERSITIES, PROJECT_211_UNIVERSITIES, is_211_university,
+                                      is_985_university, is_qs_top20_university, university_tiers,
+                                      university_tiers_batch)
+from benchmarks.university_bench import generate_names, legacy_tiers
+
+EDGE_CASES = ["", "   ", "大学", "学院", "北京", "北大", "清华大学", "Harvard", "harvard university",
+              "STANFORD UNIVERSITY", "mit", "Tech", "中国地质大学（武汉）", "中国地质大学（北京）",
+              "武汉大学计算机学院", "University of Toronto", "深圳大学", "ucl", " 南京大学 "]
+
+@pytest.mark.parametrize("name", EDGE_CASES)
+def test_parity_with_legacy_edge_cases(name):
+    """Test that the index gives the same tiers as the legacy functions, quirks included."""
+    assert university_tiers(name) == legacy_tiers(name)
+
+def test_parity_with_legacy_generated_names():
+    """Test parity on every alias and a generated mix of institution names."""
+    names = generate_names(2000, seed=7) + sorted(QS_TOP_20_UNIVERSITIES | PROJECT_211_UNIVERSITIES)
+    assert university_tiers_batch(names) == [legacy_tiers(name) for name in names]
+
+def test_single_tier_functions():
+    """Test the per-tier functions built on the index."""
+    assert is_985_university("浙江大学")
+    assert is_211_university("苏州大学") and not is_985_university("苏州大学")
+    assert is_qs_top20_university("imperial college london")
+    assert not is_qs_top20_university("深圳大学")
+
+def test_batch_returns_independent_results():
+    """Test that duplicate names in a batch do not share result dicts."""
+    first, second = university_tiers_batch(["清华大学", "清华大学"])
+    first["is_985"] = False
+    assert second["is_985"] is True
+
+def test_aho_corasick_matches():
+    """Test masks and overlapping matches of the automaton."""
+    automaton = AhoCorasick({"he": 1, "she": 2, "his": 4, "hers": 8})
+    assert automaton.find("ushers") == 1 | 2 | 8
+    assert automaton.find("ushers", stop_mask=2) & 2
+    assert automaton.find("xyz") == 0
+    assert sorted(automaton.iter_matches("ushers")) == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]